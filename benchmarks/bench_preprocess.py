@@ -0,0 +1,59 @@
+# benchmarks/bench_preprocess.py
+"""
+Throughput of the row-wise `.apply` parsers vs the vectorized column versions
+used by `clean_columns`.
+
+    python -m benchmarks.bench_preprocess [rows]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from src import preprocess
+
+def make_raw(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    price = rng.integers(500, 150000, n).astype(str).astype(object)
+    price[rng.random(n) < 0.2] = "₹12,500"
+    price[rng.random(n) < 0.05] = None
+    age = rng.integers(0, 120, n).astype(str).astype(object)
+    age[rng.random(n) < 0.1] = "about 7 months"
+    age[rng.random(n) < 0.05] = None
+    return pd.DataFrame({
+        "category": rng.choice(["mobile", "Laptop ", "furniture", "toys", None], n),
+        "condition": rng.choice(["like new", "Good ", "fair", "used", None], n),
+        "age_months": age,
+        "asking_price": price,
+    })
+
+COLUMNS = [
+    ("asking_price", preprocess.parse_price, preprocess.parse_price_series),
+    ("age_months", preprocess.parse_age, preprocess.parse_age_series),
+    ("condition", preprocess.normalize_condition, preprocess.normalize_condition_series),
+    ("category", preprocess.category_normalize, preprocess.category_normalize_series),
+]
+
+def main(rows: int = 10_000_000):
+    df = make_raw(rows)
+    apply_total = vector_total = 0.0
+    for col, scalar, vectorized in COLUMNS:
+        start = time.perf_counter()
+        want = df[col].apply(scalar)
+        apply_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = vectorized(df[col])
+        vector_secs = time.perf_counter() - start
+
+        assert got.equals(want), f"{col}: vectorized output differs from apply()"
+        apply_total += apply_secs
+        vector_total += vector_secs
+        print(f"{col:<13}: apply {rows / apply_secs:>12,.0f} rows/sec | "
+              f"vectorized {rows / vector_secs:>12,.0f} rows/sec | {apply_secs / vector_secs:5.1f}x")
+    print(f"{'all columns':<13}: apply {rows / apply_total:>12,.0f} rows/sec | "
+          f"vectorized {rows / vector_total:>12,.0f} rows/sec | {apply_total / vector_total:5.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
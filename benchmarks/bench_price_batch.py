@@ -0,0 +1,48 @@
+# benchmarks/bench_price_batch.py
+"""
+Throughput of the per-row `suggest_price` loop vs `suggest_prices_batch`.
+
+    python -m benchmarks.bench_price_batch [rows]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from src.agents.price_agent import suggest_price, suggest_prices_batch, RATES, CONDITION_MULT
+
+def make_catalog(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "title": "Item",
+        "category": rng.choice(list(RATES) + ["Other"], n),
+        "brand": rng.choice(["Apple", "Sony", "Xiaomi", "Dell", "Ikea", "Nike"], n),
+        "condition": rng.choice(list(CONDITION_MULT), n),
+        "age_months": rng.integers(0, 120, n),
+        "asking_price": rng.integers(500, 150000, n).astype(float),
+        "location": "Mumbai",
+    })
+
+def main(rows: int = 200_000):
+    df = make_catalog(rows)
+    loop_rows = min(rows, 20_000)
+
+    start = time.perf_counter()
+    looped = [suggest_price(row.to_dict()) for _, row in df.head(loop_rows).iterrows()]
+    loop_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = suggest_prices_batch(df)
+    batch_secs = time.perf_counter() - start
+
+    assert batch.head(loop_rows).to_dict("records") == looped, "batch output differs from suggest_price"
+
+    loop_rate = loop_rows / loop_secs
+    batch_rate = rows / batch_secs
+    print(f"per-row loop : {loop_rate:>12,.0f} rows/sec ({loop_rows:,} rows)")
+    print(f"batch        : {batch_rate:>12,.0f} rows/sec ({rows:,} rows)")
+    print(f"speedup      : {batch_rate / loop_rate:>12.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
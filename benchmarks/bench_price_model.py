@@ -0,0 +1,67 @@
+# benchmarks/bench_price_model.py
+"""
+Per-call latency of the price rules: the direct `(1 - rate) ** age` formula
+vs the precomputed `PriceModel` tables, plus `suggest_price` end to end and
+the batch path.
+
+    python -m benchmarks.bench_price_model [calls]
+"""
+
+import sys
+import time
+import random
+
+from src.agents.price_agent import (
+    MODEL, RATES, DEFAULT_RATE, CONDITION_MULT, PREMIUM_BRANDS,
+    rule_range, suggest_price, suggest_prices_batch,
+)
+from benchmarks.bench_price_batch import make_catalog
+
+def pow_range(base, age, condition, category, brand):
+    # the rules as written before the lookup tables
+    rate = RATES.get(category, DEFAULT_RATE)
+    adjusted = base * ((1 - rate) ** age) * CONDITION_MULT.get(condition, 1.0)
+    if brand in PREMIUM_BRANDS:
+        adjusted *= 1.05
+    return int(adjusted * 0.88), int(adjusted * 1.12)
+
+def per_call(fn, args) -> float:
+    start = time.perf_counter()
+    for a in args:
+        fn(*a)
+    return (time.perf_counter() - start) / len(args) * 1e9
+
+def main(calls: int = 200_000):
+    rng = random.Random(0)
+    args = [
+        (rng.uniform(500, 150000), rng.randint(0, MODEL.max_age), rng.choice(list(CONDITION_MULT)),
+         rng.choice(list(RATES) + ["Other"]), rng.choice(["apple", "dell", "sony", "ikea"]))
+        for _ in range(calls)
+    ]
+    assert all(pow_range(*a) == rule_range(*a) for a in args[:10_000])
+
+    for _ in range(2):  # warm-up, then report the second round
+        pow_ns = per_call(pow_range, args)
+        table_ns = per_call(rule_range, args)
+        factor_pow_ns = per_call(lambda c, a: (1 - RATES.get(c, DEFAULT_RATE)) ** a, [(a[3], a[1]) for a in args])
+        factor_ns = per_call(MODEL.factor, [(a[3], a[1]) for a in args])
+    products = [
+        {"title": "Item", "asking_price": b, "age_months": a, "condition": cd, "category": c, "brand": br}
+        for b, a, cd, c, br in args[:50_000]
+    ]
+    suggest_ns = per_call(suggest_price, [(p,) for p in products])
+
+    df = make_catalog(1_000_000)
+    start = time.perf_counter()
+    suggest_prices_batch(df)
+    batch_ns = (time.perf_counter() - start) / len(df) * 1e9
+
+    print(f"depreciation factor, pow   : {factor_pow_ns:8.0f} ns/call")
+    print(f"depreciation factor, table : {factor_ns:8.0f} ns/call")
+    print(f"rule_range, pow            : {pow_ns:8.0f} ns/call")
+    print(f"rule_range, table          : {table_ns:8.0f} ns/call")
+    print(f"suggest_price              : {suggest_ns:8.0f} ns/call")
+    print(f"suggest_prices_batch       : {batch_ns:8.0f} ns/row (1M rows)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
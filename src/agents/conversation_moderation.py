@@ -0,0 +1,107 @@
+# src/agents/conversation_moderation.py
+"""
+Conversation-aware moderation.
+
+Scammers split contact details over several messages ("98765" then
+"43210", "cheapdeals" then ".com") so no single message trips the phone
+or URL checks. `moderate_in_conversation(conversation_id, text)` keeps the
+last TAIL_CHARS characters of each conversation in a bounded LRU/TTL store
+and, besides the normal per-message checks, looks for phone numbers and
+links that straddle the boundary between the previous message and the new
+one. Messages are stored with a newline between them and only the fragments
+at that edge are joined: a digit run ending one message and starting the
+next (where one of the two messages is nothing but its digits), or a domain
+piece with no sentence punctuation at the end of the earlier message. So
+"meet." + "In the evening" or "for 98000" + "65432 was the MRP" stay
+separate sentences. Only the tail is carried, so each message costs
+O(len(text) + TAIL_CHARS) however long the conversation gets, and matches
+lying entirely inside the tail (already reported with the earlier message)
+are not reported again.
+
+Config (env):
+- CONVERSATION_TAIL_CHARS  characters carried between messages (default 64)
+- CONVERSATION_MAX         conversations kept (default 100000)
+- CONVERSATION_TTL         seconds of inactivity before a tail is dropped (default 3600)
+"""
+
+import os
+import re
+import threading
+
+from src.cache import TTLCache
+from src.agents import moderation_agent
+from src.agents.moderation_agent import message_labels, _compose
+
+TAIL_CHARS = int(os.getenv("CONVERSATION_TAIL_CHARS", "64"))
+
+TAILS = TTLCache(
+    maxsize=int(os.getenv("CONVERSATION_MAX", "100000")),
+    ttl=float(os.getenv("CONVERSATION_TTL", "3600")),
+)
+_lock = threading.Lock()
+
+BOUNDARY = "\n"
+
+# digit runs (with the separators PHONE_RE accepts) and URL/domain pieces at
+# the end of the earlier message and the start of the new one
+DIGITS_END_RE = re.compile(r"\d(?:[ \-.\u2011]?\d)*$")
+DIGITS_START_RE = re.compile(r"^\d(?:[ \-.\u2011]?\d)*")
+# an earlier message ending in ".", "?" etc. ended a sentence, not a domain
+DOMAIN_END_RE = re.compile(r"[\w\-./:]*[\w\-/:]$")
+DOMAIN_START_RE = re.compile(r"^[\w\-./:]+")
+
+def _straddles(regex, joined: str, boundary: int) -> bool:
+    # a match that starts in the tail and ends in the new message
+    return any(m.start() < boundary < m.end() for m in regex.finditer(joined))
+
+def _edges(tail: str, text: str, end_re, start_re):
+    end, start = end_re.search(tail), start_re.search(text)
+    if not end or not start:
+        return None
+    return end, start
+
+def split_signals(tail: str, text: str, scanner=None) -> list:
+    """Labels ("phone", "spam_link") found only across the tail/text boundary."""
+    if not tail or not text:
+        return []
+    scanner = scanner or moderation_agent.get_scanner()
+    found = []
+
+    edges = _edges(tail, text, DIGITS_END_RE, DIGITS_START_RE)
+    if edges:
+        end, start = edges
+        # "98765" + "43210" or "call me on 98765" + "43210", but not a number
+        # ending one sentence and another number starting the next
+        tail_bare = end.start() == 0 or tail[end.start() - 1] == BOUNDARY
+        text_bare = start.end() == len(text)
+        if (tail_bare or text_bare) and _straddles(scanner.phone_re, end.group() + start.group(), len(end.group())):
+            found.append("phone")
+
+    edges = _edges(tail, text, DOMAIN_END_RE, DOMAIN_START_RE)
+    if edges:
+        end, start = edges
+        if _straddles(scanner.url_re, (end.group() + start.group()).lower(), len(end.group())):
+            found.append("spam_link")
+    return found
+
+SPLIT_REASONS = {
+    "phone": "Phone number split across messages.",
+    "spam_link": "URL or domain link split across messages.",
+}
+
+def moderate_in_conversation(conversation_id: str, text) -> dict:
+    """`moderate_message` plus detection of phone numbers / links split across messages."""
+    if not isinstance(text, str):
+        text = str(text)
+    t = text.strip()
+    labels, reasons = message_labels(t)
+
+    with _lock:
+        tail = TAILS.get(conversation_id, "")
+        TAILS.put(conversation_id, (tail + BOUNDARY + t)[-TAIL_CHARS:])
+
+    for label in split_signals(tail, t):
+        if label not in labels:
+            labels.append(label)
+            reasons.append(SPLIT_REASONS[label])
+    return _compose(labels, reasons)
@@ -0,0 +1,170 @@
+# src/agents/fair_range.py
+"""
+Fair price range shared by the fraud and negotiation agents.
+
+The range is estimated from a neutral per-category baseline instead of the
+seller's asking price, so it depends only on (category, brand, condition,
+age_months). Results are memoized in a bounded LRU/TTL cache; only the
+numeric band is needed, so no LLM explanation is requested.
+
+When FAIR_RANGE_MODEL points at a model fitted by `python -m src.fit_fair_range`,
+the band comes from observed catalog price quantiles for the most specific
+group with enough listings:
+  (category, brand, condition, age bucket) -> (category, condition, age bucket)
+  -> (category, age bucket) -> (category)
+and only falls back to the baseline rule when no group matches.
+
+Config (env):
+- FAIR_RANGE_CACHE_SIZE  max cached keys (default 10000)
+- FAIR_RANGE_CACHE_TTL   seconds before an entry is recomputed (default 3600)
+- FAIR_RANGE_MODEL       path to a fitted .npz model (default: unset, rules only)
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from src.cache import TTLCache
+from src.agents.price_agent import rule_range, rule_ranges, _column, _to_int
+
+# neutral baselines per category
+BASELINES = {
+    "Mobile": 30000,
+    "Laptop": 50000,
+    "Furniture": 20000,
+    "Electronics": 25000,
+    "Camera": 30000,
+    "Fashion": 5000,
+}
+DEFAULT_BASELINE = 20000
+
+FAIR_RANGE_CACHE = TTLCache(
+    maxsize=int(os.getenv("FAIR_RANGE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("FAIR_RANGE_CACHE_TTL", "3600")),
+)
+
+def fair_range_key(product: dict) -> tuple:
+    # normalized the same way suggest_price reads the fields
+    return (
+        product.get("category"),
+        product.get("brand", "").lower(),
+        product.get("condition", "Good"),
+        int(product.get("age_months", 0)),
+    )
+
+# --- fitted model ---
+MODEL_VERSION = 1
+SEP = "\x1f"
+# group keys from most to least specific; see FairRangeModel.key
+LEVELS = (
+    ("category", "brand", "condition", "age_bucket"),
+    ("category", "condition", "age_bucket"),
+    ("category", "age_bucket"),
+    ("category",),
+)
+
+class FairRangeModel:
+    """Fitted (low, high) quantiles per group, looked up by dict in O(1)."""
+
+    def __init__(self, ranges: dict, age_bucket: int, max_bucket: int):
+        self.ranges = ranges            # joined group key -> (low, high)
+        self.age_bucket = age_bucket
+        self.max_bucket = max_bucket
+
+    @staticmethod
+    def key(level: int, parts: dict) -> str:
+        return str(level) + SEP + SEP.join(str(parts[f]) for f in LEVELS[level])
+
+    def bucket(self, age: int) -> int:
+        return min(max(int(age), 0) // self.age_bucket, self.max_bucket)
+
+    def lookup(self, category, brand: str, condition, age: int):
+        """(low, high) of the most specific fitted group, or None."""
+        parts = {
+            "category": "" if pd.isna(category) else category,
+            "brand": brand,
+            "condition": "" if pd.isna(condition) else condition,
+            "age_bucket": self.bucket(age),
+        }
+        for level in range(len(LEVELS)):
+            found = self.ranges.get(self.key(level, parts))
+            if found is not None:
+                return found
+        return None
+
+    def save(self, path: str):
+        keys = list(self.ranges)
+        bands = np.array([self.ranges[k] for k in keys], dtype=np.int64).reshape(-1, 2)
+        np.savez_compressed(
+            path,
+            version=np.int64(MODEL_VERSION),
+            age_bucket=np.int64(self.age_bucket),
+            max_bucket=np.int64(self.max_bucket),
+            keys=np.array(keys, dtype=np.str_),
+            low=bands[:, 0],
+            high=bands[:, 1],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FairRangeModel":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != MODEL_VERSION:
+                raise ValueError(f"{path}: unsupported fair range model version {int(z['version'])}")
+            ranges = dict(zip(z["keys"].tolist(), zip(z["low"].tolist(), z["high"].tolist())))
+            return cls(ranges, int(z["age_bucket"]), int(z["max_bucket"]))
+
+_model = None
+_model_path = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The FAIR_RANGE_MODEL model, loaded once per path (None when unset)."""
+    global _model, _model_path
+    path = os.getenv("FAIR_RANGE_MODEL", "")
+    if not path:
+        return None
+    with _model_lock:
+        if _model_path != path:
+            _model, _model_path = FairRangeModel.load(path), path
+        return _model
+
+def _compute(key: tuple) -> tuple:
+    category, brand, condition, age = key
+    model = get_model()
+    if model is not None:
+        found = model.lookup(category, brand, condition, age)
+        if found is not None:
+            return found
+    baseline = BASELINES.get(category, DEFAULT_BASELINE)
+    return rule_range(float(baseline), age, condition, category, brand)
+
+def fair_range(product: dict) -> tuple:
+    """(min_price, max_price) a neutral listing of this product should fetch."""
+    key = fair_range_key(product)
+    return FAIR_RANGE_CACHE.get_or_compute(key, lambda: _compute(key))
+
+def fair_ranges_batch(df: pd.DataFrame) -> tuple:
+    """
+    Vectorized `fair_range` over every row of `df`: (min, max) int64 arrays.
+    Each distinct (category, brand, condition, age) profile is priced once
+    and scattered back to its rows; the cache is not used.
+    """
+    keys = pd.DataFrame({
+        "category": _column(df, "category", None),
+        "brand": _column(df, "brand", "").fillna("").astype(str).str.lower(),
+        "condition": _column(df, "condition", "Good"),
+        "age": _to_int(_column(df, "age_months", 0).astype(np.float64).to_numpy(), "age_months"),
+    }, index=df.index)
+    codes = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    uniq = keys.iloc[first]
+
+    baseline = uniq["category"].map(BASELINES).fillna(DEFAULT_BASELINE).astype(np.float64).to_numpy()
+    low, high = rule_ranges(baseline, uniq["age"].to_numpy(), uniq["condition"], uniq["category"], uniq["brand"])
+    model = get_model()
+    if model is not None:
+        for i, (category, brand, condition, age) in enumerate(uniq.itertuples(index=False)):
+            found = model.lookup(category, brand, condition, age)
+            if found is not None:
+                low[i], high[i] = found
+    return low[codes], high[codes]
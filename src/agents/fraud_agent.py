@@ -4,43 +4,41 @@ Fraud/Anomaly Detection Agent
 Now independent of asking_price:
 - Estimates fair range using neutral baseline.
 - Compares seller's asking price to that fair range.
+
+`detect_fraud_batch(df)` screens a whole catalog with array operations.
 """
 
-from src.agents.price_agent import suggest_price
+import numpy as np
+import pandas as pd
+from src.agents.fair_range import fair_range, fair_ranges_batch
+from src.agents.price_agent import records_frame
 
-# neutral baselines per category
-BASELINES = {
-    "Mobile": 30000,
-    "Laptop": 50000,
-    "Furniture": 20000,
-    "Electronics": 25000,
-    "Camera": 30000,
-    "Fashion": 5000,
-}
+UNDER_FACTOR = 0.5   # suspicious below this share of the fair minimum
+OVER_FACTOR = 2.0    # suspicious above this multiple of the fair maximum
+SAFE_REASON = "Asking price is within the expected range."
 
-def detect_fraud(product: dict) -> dict:
-    # pick neutral baseline instead of seller's asking price
-    baseline = BASELINES.get(product.get("category"), 20000)
+def _under_reason(asking, min_price) -> str:
+    return f"Asking price ₹{asking} is more than 50% below the fair minimum ₹{min_price}. Possible scam listing."
 
-    # clone product but override asking_price
-    neutral_product = {**product, "asking_price": baseline}
+def _over_reason(asking, max_price) -> str:
+    return f"Asking price ₹{asking} is more than 200% above the fair maximum ₹{max_price}. Overpriced listing."
 
-    # estimate fair range
-    fair_range = suggest_price(neutral_product)
-    min_price = fair_range.get("suggested_price_min", 0)
-    max_price = fair_range.get("suggested_price_max", 0)
+def detect_fraud(product: dict, fair: tuple = None) -> dict:
+    # estimate fair range from the neutral baseline (cached per product profile),
+    # unless the caller already has it
+    min_price, max_price = fair or fair_range(product)
 
     asking = product.get("asking_price", 0)
 
     status = "Safe"
-    reason = "Asking price is within the expected range."
+    reason = SAFE_REASON
 
-    if asking < 0.5 * min_price:
+    if asking < UNDER_FACTOR * min_price:
         status = "Suspicious"
-        reason = f"Asking price ₹{asking} is more than 50% below the fair minimum ₹{min_price}. Possible scam listing."
-    elif asking > 2.0 * max_price:
+        reason = _under_reason(asking, min_price)
+    elif asking > OVER_FACTOR * max_price:
         status = "Suspicious"
-        reason = f"Asking price ₹{asking} is more than 200% above the fair maximum ₹{max_price}. Overpriced listing."
+        reason = _over_reason(asking, max_price)
 
     return {
         "status": status,
@@ -49,3 +47,43 @@ def detect_fraud(product: dict) -> dict:
         "suggested_min": min_price,
         "suggested_max": max_price
     }
+
+def detect_fraud_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized `detect_fraud` over every row of `df`.
+    Returns a frame aligned to df.index with status, reason, asking_price,
+    suggested_min and suggested_max (identical to the per-row results).
+    """
+    min_price, max_price = fair_ranges_batch(df)
+    asking = df["asking_price"] if "asking_price" in df.columns else pd.Series(0, index=df.index)
+    values = asking.to_numpy()
+    with np.errstate(invalid="ignore"):
+        under = values < UNDER_FACTOR * min_price
+        over = ~under & (values > OVER_FACTOR * max_price)
+
+    reason = np.full(len(df), SAFE_REASON, dtype=object)
+    # only flagged rows need a formatted message; tolist() gives the same
+    # Python scalars the per-row dicts would hold
+    for mask, fmt, bound in ((under, _under_reason, min_price), (over, _over_reason, max_price)):
+        rows = np.flatnonzero(mask)
+        reason[rows] = [fmt(a, b) for a, b in zip(asking.iloc[rows].tolist(), bound[rows].tolist())]
+
+    return pd.DataFrame({
+        "status": np.where(under | over, "Suspicious", "Safe").astype(object),
+        "reason": reason,
+        "asking_price": asking.to_numpy(),
+        "suggested_min": min_price,
+        "suggested_max": max_price,
+    }, index=df.index)
+
+# dict.get defaults of fair_range_key and detect_fraud (category has none)
+PRODUCT_DEFAULTS = {"asking_price": 0, "age_months": 0, "condition": "Good", "brand": ""}
+
+def detect_fraud_many(products: list) -> list:
+    """`detect_fraud` for a list of product dicts, through `detect_fraud_batch`."""
+    if not products:
+        return []
+    df = records_frame(products, PRODUCT_DEFAULTS)
+    # keep each asking price as given (a mixed int/float column would turn 500 into 500.0)
+    df["asking_price"] = pd.Series([p.get("asking_price", 0) for p in products], index=df.index, dtype=object)
+    return detect_fraud_batch(df).to_dict("records")
@@ -34,6 +34,17 @@ SPAM_KEYPHRASES = [
 # Simple url regex
 URL_RE = re.compile(r"(https?://\S+|www\.\S+|\S+\.(com|in|net|org)\b)")
 
+# Existence-only folds used by the scanner. A plain 10-digit run is a special
+# case of the grouped phone pattern, whose optional country-code prefix can't
+# change whether a match exists; likewise `\S+` only needs one `\S` to match.
+PHONE_RE = re.compile(r"(?=\d)(?:\d{3}[-\s]?\d{3}[-\s]?\d{4}|\b(?:\d[\s\-\.\u2011]?){9,13}\d\b)")
+URL_HINT_RE = re.compile(r"https?://\S|www\.\S|\S\.(?:com|in|net|org)\b")
+
+WORD_RE = re.compile(r"\w+")
+PROMO_RE = re.compile(r"\bfree\b|\bdiscount\b|\bpromo\b")
+PUNCT_RE = re.compile(r"[!?.]{4,}")
+REPEAT_RE = re.compile(r"(.)\1{6,}", flags=re.IGNORECASE)
+
 # Short helper
 def contains_phone(text: str) -> bool:
     for p in PHONE_PATTERNS:
@@ -42,7 +53,7 @@ def contains_phone(text: str) -> bool:
     return False
 
 def find_blacklisted_words(text: str):
-    words = set(re.findall(r"\w+", text.lower()))
+    words = set(WORD_RE.findall(text.lower()))
     return sorted(list(words & BLACKLIST))
 
 def contains_url(text: str) -> bool:
@@ -50,13 +61,13 @@ def contains_url(text: str) -> bool:
 
 def excessive_punctuation(text: str) -> bool:
     # e.g., "!!!!!!" or "???!!!" or repeated emoji/punctuations
-    if re.search(r"[!?.]{4,}", text):
+    if PUNCT_RE.search(text):
         return True
     return False
 
 def repeated_chars(text: str) -> bool:
     # e.g., "loooooool", "hiiiiii"
-    return bool(re.search(r"(.)\1{6,}", text, flags=re.IGNORECASE))
+    return bool(REPEAT_RE.search(text))
 
 def spam_score_from_text(text: str) -> float:
     """Heuristic spam score 0..1 from various signals"""
@@ -66,7 +77,7 @@ def spam_score_from_text(text: str) -> float:
         score += 0.5
     if any(phrase in t for phrase in SPAM_KEYPHRASES):
         score += 0.3
-    if re.search(r"\bfree\b|\bdiscount\b|\bpromo\b", t):
+    if PROMO_RE.search(t):
         score += 0.2
     if repeated_chars(t):
         score += 0.1
@@ -74,47 +85,132 @@ def spam_score_from_text(text: str) -> float:
         score += 0.1
     return min(1.0, score)
 
-def moderate_message(text: str) -> dict:
+
+class PhraseMatcher:
     """
-    Analyze a chat message and return classification + reason.
+    `any(p in text for p in phrases)` for small or very large phrase lists.
+
+    Up to REGEX_MAX phrases are folded into one regex alternation. Larger
+    lists (think 100k terms) are indexed by their first PREFIX characters:
+    a search collects the text's PREFIX-grams, looks each one up and only
+    substring-checks the phrases sharing it, and building the index is a
+    single pass instead of compiling a huge regex.
     """
-    if not isinstance(text, str):
-        text = str(text)
 
-    t = text.strip()
-    labels = []
-    reasons = []
+    REGEX_MAX = 200
+    PREFIX = 4
 
-    # Phone detection
-    if contains_phone(t):
-        labels.append("phone")
-        reasons.append("Contains phone number or numeric contact info.")
+    def __init__(self, phrases):
+        phrases = set(phrases)
+        self.always = "" in phrases   # "" is a substring of everything
+        phrases.discard("")
+        self.size = len(phrases)
+        self.regex = self.index = None
+        if len(phrases) <= self.REGEX_MAX:
+            if phrases:
+                # longest first so the alternation never stops at a shorter prefix
+                ordered = sorted(phrases, key=len, reverse=True)
+                self.regex = re.compile("|".join(re.escape(p) for p in ordered))
+            return
+        k = self.PREFIX
+        self.short = frozenset(p for p in phrases if len(p) < k)
+        self.short_lengths = tuple(sorted({len(p) for p in self.short}))
+        index = {}
+        for p in phrases:
+            if len(p) >= k:
+                index.setdefault(p[:k], []).append(p)
+        self.index = index
 
-    # URL / possible phishing / spam
-    if contains_url(t):
-        labels.append("spam_link")
-        reasons.append("Contains a URL or domain link.")
+    def search(self, text: str) -> bool:
+        if self.always:
+            return True
+        if self.index is None:
+            return self.regex is not None and self.regex.search(text) is not None
+        for n in self.short_lengths:
+            if not self.short.isdisjoint({text[i:i + n] for i in range(len(text) - n + 1)}):
+                return True
+        k, index = self.PREFIX, self.index
+        for gram in {text[i:i + k] for i in range(len(text) - k + 1)}:
+            candidates = index.get(gram)
+            if candidates is not None and any(p in text for p in candidates):
+                return True
+        return False
 
-    # Blacklisted abusive words
-    abusive_found = find_blacklisted_words(t)
-    if abusive_found:
-        labels.append("abusive")
-        reasons.append(f"Contains abusive/offensive words: {', '.join(abusive_found)}")
 
-    # Spam signals
-    spam_score = spam_score_from_text(t)
-    if spam_score >= 0.35:
-        labels.append("spam")
-        reasons.append(f"High spam-like content (score={spam_score:.2f}).")
+class ModerationScanner:
+    """
+    All moderation signals compiled once.
 
-    # Excessive punctuation / repeated chars
-    if excessive_punctuation(t):
-        labels.append("excessive_punct")
-        reasons.append("Excessive punctuation found.")
-    if repeated_chars(t):
-        labels.append("repeated_chars")
-        reasons.append("Contains elongated/repeated characters (possible spam/noise).")
+    `scan(text)` lowercases the message once and evaluates every signal a
+    single time (the helpers above re-run the URL, punctuation and
+    repeated-char checks inside `spam_score_from_text`). Phone and URL checks
+    use single existence regexes, the spam keyphrases go through a
+    PhraseMatcher, and the blacklist is a frozenset probed with word tokens.
+
+    Scanners are immutable: to change the rules, compile a new one and swap
+    it in with `set_scanner` (see src/moderation_rules.py).
+    """
+
+    def __init__(self, blacklist=BLACKLIST, spam_keyphrases=SPAM_KEYPHRASES,
+                 phone_re=PHONE_RE, url_re=URL_HINT_RE, version="builtin"):
+        self.blacklist = frozenset(blacklist)
+        self.phone_re = phone_re
+        self.url_re = url_re
+        self.keyphrases = PhraseMatcher(spam_keyphrases)
+        self.version = version
+        self._frozen = True
 
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("ModerationScanner is immutable; compile a new one instead")
+        object.__setattr__(self, name, value)
+
+    def scan(self, t: str) -> dict:
+        low = t.lower()
+        url = bool(self.url_re.search(low))
+        punct = bool(PUNCT_RE.search(t))
+        repeated = bool(REPEAT_RE.search(t))
+        if t.isascii():
+            # lowercasing ASCII can't change either check
+            punct_low, repeated_low = punct, repeated
+        else:
+            punct_low = bool(PUNCT_RE.search(low))
+            repeated_low = bool(REPEAT_RE.search(low))
+
+        score = 0.0
+        if url:
+            score += 0.5
+        if self.keyphrases.search(low):
+            score += 0.3
+        if PROMO_RE.search(low):
+            score += 0.2
+        if repeated_low:
+            score += 0.1
+        if punct_low:
+            score += 0.1
+
+        return {
+            "phone": bool(self.phone_re.search(t)),
+            "url": url,
+            "abusive": sorted(set(WORD_RE.findall(low)) & self.blacklist),
+            "spam_score": min(1.0, score),
+            "excessive_punct": punct,
+            "repeated_chars": repeated,
+        }
+
+
+SCANNER = ModerationScanner()
+
+def get_scanner() -> ModerationScanner:
+    return SCANNER
+
+def set_scanner(scanner: ModerationScanner) -> ModerationScanner:
+    """Atomically replace the active scanner; returns the previous one."""
+    global SCANNER
+    previous, SCANNER = SCANNER, scanner
+    return previous
+
+def _compose(labels: list, reasons: list) -> dict:
     # If none flagged, safe
     if len(labels) == 0:
         return {
@@ -154,6 +250,54 @@ def moderate_message(text: str) -> dict:
         "confidence": round(conf, 2)
     }
 
+def moderate_message(text: str) -> dict:
+    """
+    Analyze a chat message and return classification + reason.
+    """
+    return _compose(*message_labels(text))
+
+def message_labels(text) -> tuple:
+    """(labels, reasons) for one message, before they are composed into a verdict."""
+    if not isinstance(text, str):
+        text = str(text)
+
+    t = text.strip()
+    signals = SCANNER.scan(t)  # one global read, so a concurrent swap is all-or-nothing
+    labels = []
+    reasons = []
+
+    # Phone detection
+    if signals["phone"]:
+        labels.append("phone")
+        reasons.append("Contains phone number or numeric contact info.")
+
+    # URL / possible phishing / spam
+    if signals["url"]:
+        labels.append("spam_link")
+        reasons.append("Contains a URL or domain link.")
+
+    # Blacklisted abusive words
+    abusive_found = signals["abusive"]
+    if abusive_found:
+        labels.append("abusive")
+        reasons.append(f"Contains abusive/offensive words: {', '.join(abusive_found)}")
+
+    # Spam signals
+    spam_score = signals["spam_score"]
+    if spam_score >= 0.35:
+        labels.append("spam")
+        reasons.append(f"High spam-like content (score={spam_score:.2f}).")
+
+    # Excessive punctuation / repeated chars
+    if signals["excessive_punct"]:
+        labels.append("excessive_punct")
+        reasons.append("Excessive punctuation found.")
+    if signals["repeated_chars"]:
+        labels.append("repeated_chars")
+        reasons.append("Contains elongated/repeated characters (possible spam/noise).")
+
+    return labels, reasons
+
 
 # Simple demo when run directly
 if __name__ == "__main__":
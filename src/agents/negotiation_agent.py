@@ -8,29 +8,12 @@ Now independent of asking_price:
 - Final agreed price = midpoint between buyer offer and seller offer.
 """
 
-from src.agents.price_agent import suggest_price
+from src.agents.fair_range import fair_range
 
-# neutral baselines per category
-BASELINES = {
-    "Mobile": 30000,
-    "Laptop": 50000,
-    "Furniture": 20000,
-    "Electronics": 25000,
-    "Camera": 30000,
-    "Fashion": 5000,
-}
-
-def negotiate_price(product: dict) -> dict:
-    # choose a neutral baseline
-    baseline = BASELINES.get(product.get("category"), 20000)
-
-    # clone product but override asking_price for fair range calc
-    neutral_product = {**product, "asking_price": baseline}
-
-    # estimate fair range
-    fair_range = suggest_price(neutral_product)
-    min_price = fair_range.get("suggested_price_min", 0)
-    max_price = fair_range.get("suggested_price_max", 0)
+def negotiate_price(product: dict, fair: tuple = None) -> dict:
+    # estimate fair range from the neutral baseline (cached per product profile),
+    # unless the caller already has it
+    min_price, max_price = fair or fair_range(product)
 
     asking = product.get("asking_price", 0)
 
@@ -0,0 +1,131 @@
+# src/agents/negotiation_sim.py
+"""
+Multi-round negotiation engine.
+
+Both sides follow a time-dependent concession strategy: over `rounds`
+rounds an offer moves from the side's opening price towards its
+reservation price as
+
+    offer_t = open + (reserve - open) * (t / rounds) ** (1 / beta)
+
+so `beta` < 1 holds out until late (boulware), 1 concedes linearly and
+> 1 gives ground early (conceder). Offers alternate: in round t the
+seller asks s_t and the buyer takes it if s_t <= b_t; otherwise the buyer
+counters b_t and the seller takes that if b_t >= s_{t+1}. No acceptance by
+the last round means no deal.
+
+Reservation prices come from the fair range (low, high): sellers won't go
+below a band around the fair maximum and buyers won't pay above a similar,
+slightly higher band, so some pairs can never agree. `negotiate` plays one
+deterministic game with the midpoints of those bands. `simulate` draws
+thousands of buyers and sellers (reservations, openings and strategy
+betas) and plays them all at once as a (simulations x rounds) NumPy
+array, returning the deal price distribution and close probability.
+"""
+
+import numpy as np
+
+from src.agents.fair_range import fair_range
+
+STRATEGIES = {"boulware": 0.3, "linear": 1.0, "conceder": 3.0}
+DEFAULT_ROUNDS = 10
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# reservation / opening prices as multiples of the fair range (low, high)
+SELLER_RESERVE = (0.85, 1.05)   # x fair maximum
+BUYER_RESERVE = (0.9, 1.15)     # x fair maximum
+BUYER_OPEN = (0.5, 0.9)         # x fair minimum
+BETA_SPREAD = 0.35              # lognormal sigma around the strategy beta
+
+def _beta(strategy) -> float:
+    if isinstance(strategy, (int, float)):
+        if strategy <= 0:
+            raise ValueError("strategy beta must be positive")
+        return float(strategy)
+    try:
+        return STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {strategy!r}; use one of {sorted(STRATEGIES)} or a positive beta")
+
+def offer_curve(opening, reserve, beta, rounds: int) -> np.ndarray:
+    """Offers for rounds 1..rounds; array inputs broadcast to (n, rounds)."""
+    t = np.arange(1, rounds + 1) / rounds
+    opening, reserve, beta = (np.asarray(x, dtype=np.float64)[..., None] for x in (opening, reserve, beta))
+    return opening + (reserve - opening) * t ** (1.0 / beta)
+
+def _first_deal(seller: np.ndarray, buyer: np.ndarray) -> tuple:
+    """(closed mask, 0-based deal round, deal price) for (n, rounds) offer matrices."""
+    rounds = seller.shape[-1]
+    # events in order: buyer takes s_1, seller takes b_1, buyer takes s_2, ...
+    accept = np.empty(seller.shape[:-1] + (2 * rounds - 1,), dtype=bool)
+    price = np.empty(accept.shape, dtype=np.float64)
+    accept[..., 0::2] = buyer >= seller
+    price[..., 0::2] = seller
+    accept[..., 1::2] = buyer[..., :-1] >= seller[..., 1:]
+    price[..., 1::2] = buyer[..., :-1]
+
+    closed = accept.any(axis=-1)
+    event = accept.argmax(axis=-1)
+    deal = np.take_along_axis(price, event[..., None], axis=-1)[..., 0]
+    return closed, event // 2, deal
+
+def negotiate(product: dict, rounds: int = DEFAULT_ROUNDS,
+              buyer_strategy="linear", seller_strategy="linear") -> dict:
+    """One deterministic negotiation with a round-by-round transcript."""
+    low, high = fair_range(product)
+    asking = float(product.get("asking_price", 0)) or float(high)
+    seller_reserve = min(asking, high * float(np.mean(SELLER_RESERVE)))
+    buyer_open = min(asking, low * float(np.mean(BUYER_OPEN)))
+    buyer_reserve = high * float(np.mean(BUYER_RESERVE))
+
+    seller = offer_curve(asking, seller_reserve, _beta(seller_strategy), rounds)
+    buyer = offer_curve(buyer_open, buyer_reserve, _beta(buyer_strategy), rounds)
+    closed, rnd, price = _first_deal(seller, buyer)
+    last = int(rnd) if closed else rounds - 1
+    return {
+        "closed": bool(closed),
+        "final_price": int(price) if closed else None,
+        "rounds": last + 1,
+        "transcript": [
+            {"round": t + 1, "seller_offer": int(seller[t]), "buyer_offer": int(buyer[t])}
+            for t in range(last + 1)
+        ],
+        "suggested_range": f"{low} - {high}",
+    }
+
+def simulate(product: dict, simulations: int = 2000, rounds: int = DEFAULT_ROUNDS,
+             buyer_strategy="linear", seller_strategy="linear", seed=None) -> dict:
+    """
+    Monte Carlo over `simulations` random buyer/seller pairs for one listing.
+    Returns close probability, expected deal price, deal price percentiles
+    and the mean number of rounds to close.
+    """
+    if simulations < 1 or rounds < 1:
+        raise ValueError("simulations and rounds must be positive")
+    rng = np.random.default_rng(seed)
+    low, high = fair_range(product)
+    asking = float(product.get("asking_price", 0)) or float(high)
+    n = simulations
+
+    seller_reserve = np.minimum(asking, high * rng.uniform(*SELLER_RESERVE, n))
+    buyer_reserve = high * rng.uniform(*BUYER_RESERVE, n)
+    buyer_open = np.minimum(asking, low * rng.uniform(*BUYER_OPEN, n))
+    seller_beta = _beta(seller_strategy) * rng.lognormal(0.0, BETA_SPREAD, n)
+    buyer_beta = _beta(buyer_strategy) * rng.lognormal(0.0, BETA_SPREAD, n)
+
+    seller = offer_curve(asking, seller_reserve, seller_beta, rounds)
+    buyer = offer_curve(buyer_open, buyer_reserve, buyer_beta, rounds)
+    closed, rnd, price = _first_deal(seller, buyer)
+
+    deals = price[closed]
+    return {
+        "simulations": n,
+        "rounds": rounds,
+        "close_probability": round(float(closed.mean()), 4),
+        "expected_price": int(deals.mean()) if len(deals) else None,
+        "price_percentiles": {
+            f"p{p}": int(v) for p, v in zip(PERCENTILES, np.percentile(deals, PERCENTILES))
+        } if len(deals) else None,
+        "mean_rounds_to_close": round(float(rnd[closed].mean() + 1), 2) if len(deals) else None,
+        "suggested_range": f"{low} - {high}",
+    }
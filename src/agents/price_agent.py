@@ -2,10 +2,106 @@
 """
 Price Suggestor Agent (Rule-based + optional LLM explanation)
 Includes LLM provider/model info in output when USE_LLM=true.
+
+`suggest_prices_batch(df)` applies the same rules to a whole DataFrame
+using column operations and returns identical numbers and reasons.
+
+The rules are compiled once at import into `MODEL` (a `PriceModel`), so both
+paths look depreciation factors up in a table instead of raising to a power.
 """
 
 import os
-from src.llm_client import ask
+import sys
+import numpy as np
+import pandas as pd
+from src.llm_client import ask, ask_async, is_error
+from src.explanation_cache import explanation_key, get_explanation_cache
+from src.singleflight import SingleFlight, AsyncSingleFlight
+from src.llm_batcher import ExplanationBatcher
+from src.metrics import stage
+
+# monthly depreciation rate per category
+RATES = {
+    "Mobile": 0.012,
+    "Laptop": 0.009,
+    "Furniture": 0.005,
+    "Electronics": 0.008,
+    "Fashion": 0.015,
+    "Camera": 0.009,
+}
+DEFAULT_RATE = 0.01
+
+CONDITION_MULT = {"Like New": 1.05, "Good": 0.95, "Fair": 0.80}
+PREMIUM_BRANDS = {"apple", "sony", "nike", "adidas"}
+PREMIUM_MULT = 1.05
+# ages (months) covered by the depreciation table; older items fall back to pow
+MAX_TABLE_AGE = int(os.getenv("PRICE_TABLE_MAX_AGE", "600"))
+
+class PriceModel:
+    """
+    The pricing rules compiled into lookup tables.
+
+    Categories, conditions and brands get small interned ids (0 = not listed,
+    i.e. the default rate / a 1.0 multiplier). `depreciation[category_id, age]`
+    holds `(1 - rate) ** age` for ages 0..max_age, computed with Python's
+    float pow so lookups are bit-identical to the direct formula.
+    """
+
+    def __init__(self, rates: dict, default_rate: float, condition_mult: dict,
+                 premium_brands, premium_mult: float, max_age: int):
+        self.category_ids = {sys.intern(c): i for i, c in enumerate(rates, start=1)}
+        self.condition_ids = {sys.intern(c): i for i, c in enumerate(condition_mult, start=1)}
+        self.brand_ids = {sys.intern(b): 1 for b in premium_brands}
+        self.rates = [float(default_rate)] + [float(r) for r in rates.values()]
+        self.condition_mult = [1.0] + [float(m) for m in condition_mult.values()]
+        self.brand_mult = [1.0, float(premium_mult)]
+        self.max_age = max_age
+        self._rows = [[(1 - r) ** a for a in range(max_age + 1)] for r in self.rates]
+        # name-keyed views for the scalar path (one dict lookup each)
+        self._category_rows = {c: self._rows[i] for c, i in self.category_ids.items()}
+        self._condition_mult = {c: self.condition_mult[i] for c, i in self.condition_ids.items()}
+        self._brand_mult = {b: self.brand_mult[i] for b, i in self.brand_ids.items()}
+
+        # numpy views of the same numbers for the batch path
+        self.depreciation = np.array(self._rows, dtype=np.float64)
+        self.rate_array = np.array(self.rates, dtype=np.float64)
+        self.condition_array = np.array(self.condition_mult, dtype=np.float64)
+        self.brand_array = np.array(self.brand_mult, dtype=np.float64)
+
+    def rate(self, category) -> float:
+        return self.rates[self.category_ids.get(category, 0)]
+
+    def factor(self, category, age: int) -> float:
+        if 0 <= age <= self.max_age:
+            return self._category_rows.get(category, self._rows[0])[age]
+        return (1 - self.rate(category)) ** age
+
+    def adjusted(self, base: float, age: int, condition, category, brand: str) -> float:
+        if 0 <= age <= self.max_age:
+            factor = self._category_rows.get(category, self._rows[0])[age]
+        else:
+            factor = (1 - self.rate(category)) ** age
+        # multiplying by the 1.0 defaults is exact, so this matches the branching formula
+        return base * factor * self._condition_mult.get(condition, 1.0) * self._brand_mult.get(brand, 1.0)
+
+    def ids(self, values: pd.Series, table: dict) -> np.ndarray:
+        """Interned ids for a column (0 where the value is not in `table`)."""
+        return values.map(table).fillna(0).to_numpy(dtype=np.intp)
+
+    def factors(self, category_ids: np.ndarray, ages: np.ndarray) -> np.ndarray:
+        """Vectorized `factor` over id/age arrays."""
+        in_table = (ages >= 0) & (ages <= self.max_age)
+        out = np.empty(len(ages), dtype=np.float64)
+        out[in_table] = self.depreciation[category_ids[in_table], ages[in_table]]
+        for i in np.flatnonzero(~in_table):
+            out[i] = (1 - self.rates[category_ids[i]]) ** int(ages[i])
+        return out
+
+MODEL = PriceModel(RATES, DEFAULT_RATE, CONDITION_MULT, PREMIUM_BRANDS, PREMIUM_MULT, MAX_TABLE_AGE)
+
+# coalesce identical concurrent LLM explanation calls
+LLM_FLIGHT = SingleFlight()
+LLM_FLIGHT_ASYNC = AsyncSingleFlight()
 
 def _get_llm_info():
     prov = os.getenv("LLM_PROVIDER", "none")
@@ -18,61 +114,233 @@ def _get_llm_info():
         model = ""
     return prov, model
 
-def suggest_price(product: dict) -> dict:
+def llm_enabled() -> bool:
+    return os.getenv("USE_LLM", "false").lower() in ("1", "true", "yes")
+
+def explain_prompt(product: dict, low: int, high: int) -> str:
+    return f"""
+Product details: {product}
+Suggested price range: ₹{low} - ₹{high}.
+Write 2 short friendly sentences explaining why this range is fair (mention age, condition, brand).
+"""
+
+def explanation_id(product: dict, low: int, high: int) -> str:
+    """Stable fingerprint of the explanation for this product and band."""
+    prov, model = _get_llm_info()
+    return explanation_key(prov, model, product, low, high)
+
+def cached_explanation(eid: str):
+    cache = get_explanation_cache()
+    return cache.get(eid) if cache is not None else None
+
+def _fetch(cache, eid: str, prompt: str) -> str:
+    with stage("llm"):
+        llm_text = ask(prompt)
+    if llm_text and cache is not None and not is_error(llm_text.strip()):
+        cache.put(eid, llm_text.strip())
+    return llm_text
+
+async def _fetch_async(cache, eid: str, prompt: str) -> str:
+    with stage("llm"):
+        llm_text = await ask_async(prompt)
+    if llm_text and cache is not None and not is_error(llm_text.strip()):
+        cache.put(eid, llm_text.strip())
+    return llm_text
+
+def _explain(product: dict, low: int, high: int, reason: str) -> str:
+    try:
+        cache = get_explanation_cache()
+        eid = explanation_id(product, low, high)
+        cached = cache.get(eid) if cache is not None else None
+        if cached is not None:
+            return cached
+        # identical in-flight explanations share one LLM call
+        prompt = explain_prompt(product, low, high)
+        llm_text = LLM_FLIGHT.do(eid, lambda: _fetch(cache, eid, prompt))
+        # provider errors (rate limited, circuit open, ...) fall back to the rule-based reason
+        return llm_text.strip() if llm_text and not is_error(llm_text.strip()) else reason
+    except Exception:
+        # fallback to rule-based reason
+        return reason
+
+async def llm_explanation_async(product: dict, low: int, high: int):
+    """LLM reason for this band (cached, coalesced), or None when the provider failed."""
+    cache = get_explanation_cache()
+    eid = explanation_id(product, low, high)
+    cached = cache.get(eid) if cache is not None else None
+    if cached is not None:
+        return cached
+    prompt = explain_prompt(product, low, high)
+    llm_text = await LLM_FLIGHT_ASYNC.do(eid, lambda: _fetch_async(cache, eid, prompt))
+    text = llm_text.strip() if llm_text else ""
+    # provider errors (rate limited, circuit open, ...) are not explanations
+    return None if is_error(text) else text
+
+async def _explain_async(product: dict, low: int, high: int, reason: str) -> str:
+    try:
+        text = await llm_explanation_async(product, low, high)
+        return text if text is not None else reason
+    except Exception:
+        # fallback to rule-based reason
+        return reason
+
+def rule_range(base: float, age: int, condition, category, brand: str) -> tuple:
+    """Rule-based (low, high) price band; `brand` must already be lowercased."""
+    adjusted = MODEL.adjusted(base, age, condition, category, brand)
+    return int(adjusted * 0.88), int(adjusted * 1.12)
+
+def rule_suggestion(product: dict) -> dict:
     base = float(product.get("asking_price", 0))
     age = int(product.get("age_months", 0))
     condition = product.get("condition", "Good")
     category = product.get("category", "Other")
     brand = product.get("brand", "").lower()
 
-    rates = {
-        "Mobile": 0.012,
-        "Laptop": 0.009,
-        "Furniture": 0.005,
-        "Electronics": 0.008,
-        "Fashion": 0.015,
-        "Camera": 0.009,
-    }
-    rate = rates.get(category, 0.01)
-    depreciated = base * ((1 - rate) ** age)
-    condition_mult = {"Like New": 1.05, "Good": 0.95, "Fair": 0.80}
-    adjusted = depreciated * condition_mult.get(condition, 1.0)
-    if brand in ["apple", "sony", "nike", "adidas"]:
-        adjusted *= 1.05
-
-    low = int(adjusted * 0.88)
-    high = int(adjusted * 1.12)
+    rate = MODEL.rate(category)
+    low, high = rule_range(base, age, condition, category, brand)
 
     reason = (
         f"Suggested based on asking price {base}, "
         f"category {category} (rate {rate*100:.2f}%/month), "
         f"age {age} months, condition {condition}, brand {brand.title()}."
     )
-
-    llm_used = None
-    if os.getenv("USE_LLM", "false").lower() in ("1", "true", "yes"):
-        prov, model = _get_llm_info()
-        prompt = f"""
-Product details: {product}
-Suggested price range: ₹{low} - ₹{high}.
-Write 2 short friendly sentences explaining why this range is fair (mention age, condition, brand).
-"""
-        try:
-            llm_text = ask(prompt)
-            reason = llm_text.strip() if llm_text else reason
-        except Exception:
-            # fallback to rule-based reason
-            pass
-        llm_used = {"provider": prov, "model": model}
-
-    out = {
+    return {
         "suggested_price_min": low,
         "suggested_price_max": high,
         "reason": reason
     }
-    if llm_used:
-        out["llm_provider"] = llm_used["provider"]
-        out["llm_model"] = llm_used["model"]
+
+def add_llm_info(out: dict) -> dict:
+    prov, model = _get_llm_info()
+    out["llm_provider"] = prov
+    out["llm_model"] = model
+    return out
+
+def suggest_price(product: dict) -> dict:
+    with stage("pricing"):
+        out = rule_suggestion(product)
+    if llm_enabled():
+        out["reason"] = _explain(product, out["suggested_price_min"], out["suggested_price_max"], out["reason"])
+        add_llm_info(out)
+    return out
+
+async def suggest_price_async(product: dict) -> dict:
+    """`suggest_price` for async callers: rules run inline, the LLM call is awaited."""
+    with stage("pricing"):
+        out = rule_suggestion(product)
+    if llm_enabled():
+        out["reason"] = await _explain_async(product, out["suggested_price_min"], out["suggested_price_max"], out["reason"])
+        add_llm_info(out)
+    return out
+
+def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+    if name in df.columns:
+        col = df[name]
+        # columnar tables load text as categoricals; the rules work on plain values
+        return col.astype(object) if isinstance(col.dtype, pd.CategoricalDtype) else col
+    return pd.Series(default, index=df.index, dtype=object)
+
+def records_frame(records: list, defaults: dict) -> pd.DataFrame:
+    """Frame of product dicts; a key missing from a row takes its `defaults` value, as dict.get would."""
+    df = pd.DataFrame.from_records(records)
+    for name, default in defaults.items():
+        if name in df.columns:
+            missing = [name not in r for r in records]
+            if any(missing):
+                df.loc[missing, name] = default
+    return df
+
+def _to_int(values: np.ndarray, name: str) -> np.ndarray:
+    if not np.isfinite(values).all():
+        raise ValueError(f"cannot convert non-finite {name} to integer")
+    return np.trunc(values).astype(np.int64)
+
+def rule_ranges(base: np.ndarray, age: np.ndarray, condition: pd.Series, category: pd.Series,
+                brand: pd.Series, category_id: np.ndarray = None) -> tuple:
+    """Vectorized `rule_range`: (low, high) int64 arrays; `brand` must already be lowercased."""
+    if category_id is None:
+        category_id = MODEL.ids(category, MODEL.category_ids)
+    adjusted = base * MODEL.factors(category_id, age)
+    adjusted = adjusted * MODEL.condition_array[MODEL.ids(condition, MODEL.condition_ids)]
+    adjusted = adjusted * MODEL.brand_array[MODEL.ids(brand, MODEL.brand_ids)]
+    return _to_int(adjusted * 0.88, "price"), _to_int(adjusted * 1.12, "price")
+
+def suggest_prices_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized `suggest_price` over every row of `df`.
+    Returns a frame aligned to df.index with suggested_price_min,
+    suggested_price_max, reason (+ llm_provider/llm_model when USE_LLM=true).
+    """
+    base = _column(df, "asking_price", 0).astype(np.float64)
+    age = _to_int(_column(df, "age_months", 0).astype(np.float64).to_numpy(), "age_months")
+    condition = _column(df, "condition", "Good")
+    category = _column(df, "category", "Other")
+    brand = _column(df, "brand", "").fillna("").astype(str).str.lower()
+
+    category_id = MODEL.ids(category, MODEL.category_ids)
+    rate = MODEL.rate_array[category_id]
+    low, high = rule_ranges(base.to_numpy(), age, condition, category, brand, category_id)
+
+    # low-cardinality pieces are formatted once per distinct value
+    rate_text = {r: f"{r*100:.2f}" for r in np.unique(rate).tolist()}
+    brand_text = {b: b.title() for b in brand.unique().tolist()}
+    reason = [
+        f"Suggested based on asking price {b}, "
+        f"category {c} (rate {rate_text[r]}%/month), "
+        f"age {a} months, condition {cd}, brand {brand_text[br]}."
+        for b, c, r, a, cd, br in zip(
+            base.tolist(), category.tolist(), rate.tolist(), age.tolist(),
+            condition.tolist(), brand.tolist(),
+        )
+    ]
+
+    out = pd.DataFrame(
+        {"suggested_price_min": low, "suggested_price_max": high, "reason": reason},
+        index=df.index,
+    )
+    if llm_enabled():
+        prov, model = _get_llm_info()
+        out["reason"] = _explain_batch(df.to_dict("records"), low.tolist(), high.tolist(), reason)
+        out["llm_provider"] = prov
+        out["llm_model"] = model
+    return out
+
+PRODUCT_DEFAULTS = {"asking_price": 0, "age_months": 0, "condition": "Good", "category": "Other", "brand": ""}
+
+def suggest_price_many(products: list) -> list:
+    """`suggest_price` for a list of product dicts, through `suggest_prices_batch`."""
+    if not products:
+        return []
+    return suggest_prices_batch(records_frame(products, PRODUCT_DEFAULTS)).to_dict("records")
+
+def _explain_batch(records: list, lows: list, highs: list, reasons: list) -> list:
+    """
+    LLM reasons for many rows: cached ones are reused, the rest go through the
+    micro-batching dispatcher (one request per distinct explanation). Rows whose
+    answer is missing keep the rule-based reason.
+    """
+    cache = get_explanation_cache()
+    out = list(reasons)
+    pending = {}   # explanation id -> (future, [row indexes])
+    with ExplanationBatcher() as batcher:
+        for i, (product, lo, hi) in enumerate(zip(records, lows, highs)):
+            eid = explanation_id(product, lo, hi)
+            if eid in pending:
+                pending[eid][1].append(i)
+                continue
+            cached = cache.get(eid) if cache is not None else None
+            if cached is not None:
+                out[i] = cached
+            else:
+                pending[eid] = (batcher.submit(product, lo, hi), [i])
+
+    for eid, (fut, rows) in pending.items():
+        text = fut.result()
+        if text:
+            if cache is not None:
+                cache.put(eid, text)
+            for i in rows:
+                out[i] = text
     return out
 
 if __name__ == "__main__":
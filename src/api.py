@@ -2,27 +2,66 @@
 """
 FastAPI app exposing multiple agents:
 - GET /               -> health check
-- POST /negotiate     -> price suggestion
+- POST /negotiate     -> price suggestion (?defer_explanation=true returns the
+                         range at once and an explanation_id for the LLM reason)
+- GET  /explanations/{id}        -> deferred LLM explanation
+- GET  /explanations/{id}/stream -> same, as a server-sent event once ready
+- GET  /stats         -> cache and request-coalescing counters
+- GET  /metrics       -> Prometheus metrics: per-endpoint requests, in-flight and
+                         latency, per-stage timings, cache hit ratios (no API key)
 - POST /moderate      -> chat moderation
+- GET  /admin/moderation-rules        -> active rule set version and sizes
+- POST /admin/moderation-rules/reload -> recompile the rules file and swap it in
+- POST /moderate-batch -> bulk chat moderation (process pool, optional NDJSON stream)
 - POST /fraud-check   -> fraud/anomaly detection
-- POST /negotiate-deal -> buyer-seller negotiation
+- POST /negotiate-deal -> buyer-seller negotiation (?simulate=true adds a
+                          Monte Carlo deal price / close probability report)
+- POST /analyze-listing -> price, fraud, negotiation and title/description
+                          moderation in one call, with per-part latency
+- GET  /agents              -> registered agents (src/registry.py)
+- POST /agents/{name}       -> run any registered agent on one input
+- POST /agents/{name}/batch -> run it on many inputs (batched, cached, pooled)
+
+Identical concurrent /negotiate, /fraud-check and /negotiate-deal requests
+are coalesced: followers wait for the first request's result.
 
 Protected with a simple API key header:
   x-api-key: <API_KEY>
 """
 
 import os
+import json
+import time
+import asyncio
+import zlib
 import logging
-from fastapi import FastAPI, HTTPException, Depends, Header
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from fastapi.concurrency import run_in_threadpool
 
-# Agents
-from src.agents.price_agent import suggest_price
-from src.agents.moderation_agent import moderate_message
-from src.agents.fraud_agent import detect_fraud
-from src.agents.negotiation_agent import negotiate_price
+# Agents are imported on first use (or by the warmup in lifespan), see src/registry.py
+from src import registry
+from src import moderation_pool
+from src import moderation_rules
+from src import llm_client
+from src import explanations
+from src import save_report
+from src import metrics
+from src import executor
+from src import listing_analysis
+from src.singleflight import AsyncSingleFlight
+from src.explanation_cache import get_explanation_cache
+
+price_agent = registry.agent("price")
+moderation_agent = registry.agent("moderation")
+conversation_moderation = registry.agent("conversation_moderation")
+fraud_agent = registry.agent("fraud")
+negotiation_agent = registry.agent("negotiation")
+negotiation_sim = registry.agent("negotiation_sim")
+fair_range = registry.agent("fair_range")
 
 # --- API key setup ---
 API_KEY = os.getenv("API_KEY", "devkey123")
@@ -36,7 +75,34 @@ logger = logging.getLogger("marketplace-agents")
 logging.basicConfig(level=logging.INFO)
 
 # --- FastAPI app ---
-app = FastAPI(title="Marketplace Agents API", version="0.2")
+MODERATION_BATCH_MAX = int(os.getenv("MODERATION_BATCH_MAX", "10000"))
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+NEGOTIATION_SIM_MAX = int(os.getenv("NEGOTIATION_SIM_MAX", "50000"))
+AGENT_BATCH_MAX = int(os.getenv("AGENT_BATCH_MAX", "10000"))
+# append every /negotiate suggestion to reports/price_suggestions.csv (buffered)
+LOG_SUGGESTIONS = os.getenv("LOG_SUGGESTIONS", "false").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if moderation_rules.RULES_PATH:
+        await run_in_threadpool(moderation_rules.reload)
+        moderation_rules.start_watcher()
+    await run_in_threadpool(moderation_pool.warm)
+    if registry.WARMUP == "startup":
+        await run_in_threadpool(registry.warmup)
+    elif registry.WARMUP == "background":
+        # import the agents off the event loop while requests are already served
+        asyncio.get_running_loop().run_in_executor(None, registry.warmup)
+    yield
+    moderation_rules.stop_watcher()
+    await run_in_threadpool(moderation_pool.shutdown)
+    await explanations.shutdown()
+    await llm_client.aclose()
+    await run_in_threadpool(save_report.close)
+
+app = FastAPI(title="Marketplace Agents API", version="0.2", lifespan=lifespan)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
 
 # --- Pydantic Models ---
 class ProductIn(BaseModel):
@@ -50,16 +116,30 @@ class ProductIn(BaseModel):
     extra: Optional[Dict[str, Any]] = None
 
 
+class ListingIn(ProductIn):
+    description: Optional[str] = None
+
+
 class PriceOut(BaseModel):
     suggested_price_min: int
     suggested_price_max: int
     reason: str
     llm_provider: Optional[str] = None
     llm_model: Optional[str] = None
+    explanation_id: Optional[str] = None
+
+
+class ExplanationOut(BaseModel):
+    id: str
+    status: str
+    reason: str
+    llm_provider: Optional[str] = None
+    llm_model: Optional[str] = None
 
 
 class ModerateIn(BaseModel):
     message: str
+    conversation_id: Optional[str] = None
 
 
 class ModerateOut(BaseModel):
@@ -71,6 +151,61 @@ class ModerateOut(BaseModel):
     llm_reason: Optional[str] = None
     llm_labels: Optional[list] = None
 
+
+class ModerateBatchIn(BaseModel):
+    messages: List[str]
+    chunk_size: Optional[int] = Field(default=None, ge=1)
+    stream: bool = False
+
+
+class ModerateBatchOut(BaseModel):
+    count: int
+    results: List[ModerateOut]
+
+
+class AgentIn(BaseModel):
+    input: Any
+
+
+class AgentBatchIn(BaseModel):
+    inputs: List[Any]
+    chunk_size: Optional[int] = Field(default=None, ge=1)
+
+# --- Request coalescing ---
+API_FLIGHT = AsyncSingleFlight()
+
+def _flight_key(endpoint: str, product: dict) -> str:
+    return endpoint + ":" + json.dumps(product, sort_keys=True, default=str)
+
+async def _coalesced(endpoint: str, product: dict, fn):
+    """Run fn(product) once for all identical in-flight requests."""
+    return await API_FLIGHT.do(_flight_key(endpoint, product), lambda: fn(product))
+
+# --- Metrics ---
+
+def _fair_range_cache_stats():
+    # not reported until the fair-range agent has been loaded
+    return fair_range.FAIR_RANGE_CACHE.stats() if fair_range.loaded else None
+
+metrics.register_cache("fair_range", _fair_range_cache_stats)
+
+def _explanation_cache_stats():
+    cache = get_explanation_cache()
+    return cache.stats() if cache is not None else None
+
+metrics.register_cache("explanation", _explanation_cache_stats)
+
+async def _in_threadpool(stage: str, fn, *args):
+    """run_in_threadpool, timing the wait for a worker thread and `stage` itself."""
+    queued = time.perf_counter()
+
+    def run():
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - queued, "threadpool_wait")
+        with metrics.stage(stage):
+            return fn(*args)
+
+    return await run_in_threadpool(run)
+
 # --- Endpoints ---
 
 @app.get("/", summary="Health check")
@@ -79,10 +214,17 @@ async def root():
 
 
 @app.post("/negotiate", response_model=PriceOut)
-async def negotiate(product: ProductIn, _=Depends(check_api_key)):
-    """Suggest a price range for a product."""
+async def negotiate(product: ProductIn, defer_explanation: bool = False, _=Depends(check_api_key)):
+    """
+    Suggest a price range for a product.
+    With `defer_explanation=true` the rule-based range is returned immediately and the
+    LLM reason is produced in the background (fetch it via /explanations/{explanation_id}).
+    """
     try:
-        result = await run_in_threadpool(suggest_price, product.dict())
+        if defer_explanation:
+            result = explanations.suggest_price_deferred(product.dict())
+        else:
+            result = await _coalesced("negotiate", product.dict(), price_agent.suggest_price_async)
     except Exception as e:
         logger.exception("Error in negotiate")
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,14 +232,65 @@ async def negotiate(product: ProductIn, _=Depends(check_api_key)):
     if "suggested_price_min" not in result or "suggested_price_max" not in result:
         raise HTTPException(status_code=500, detail="Agent returned invalid response")
 
+    if LOG_SUGGESTIONS:
+        save_report.save_suggestion(product.dict(), result)
     return result
 
 
+@app.get("/stats", summary="Cache and coalescing counters")
+async def stats(_=Depends(check_api_key)):
+    return {
+        "fair_range_cache": fair_range.FAIR_RANGE_CACHE.stats(),
+        "explanation_cache": _explanation_cache_stats(),
+        "singleflight": {
+            "api": API_FLIGHT.stats(),
+            "llm": price_agent.LLM_FLIGHT.stats(),
+            "llm_async": price_agent.LLM_FLIGHT_ASYNC.stats(),
+        },
+    }
+
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/explanations/{explanation_id}", response_model=ExplanationOut)
+async def get_explanation(explanation_id: str, _=Depends(check_api_key)):
+    """Fetch a deferred explanation (status: pending | done | failed)."""
+    job = explanations.get_explanation(explanation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown explanation id")
+    return job
+
+
+@app.get("/explanations/{explanation_id}/stream")
+async def stream_explanation(explanation_id: str, _=Depends(check_api_key)):
+    """Server-sent events: keep-alive comments until the explanation is ready, then one `explanation` event."""
+    if explanations.get_explanation(explanation_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown explanation id")
+
+    async def events():
+        while True:
+            job = await explanations.wait_explanation(explanation_id, timeout=SSE_KEEPALIVE)
+            if job is None or job["status"] != "pending":
+                break
+            yield ": keep-alive\n\n"
+        yield f"event: explanation\ndata: {json.dumps(job)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/moderate", response_model=ModerateOut)
 async def moderate(payload: ModerateIn, _=Depends(check_api_key)):
-    """Moderate a chat message."""
+    """Moderate a chat message; with a conversation_id, also catch contact details split across messages."""
     try:
-        res = await run_in_threadpool(moderate_message, payload.message)
+        if payload.conversation_id:
+            res = await _in_threadpool("moderation", conversation_moderation.moderate_in_conversation, payload.conversation_id, payload.message)
+        else:
+            res = await _in_threadpool("moderation", moderation_agent.moderate_message, payload.message)
     except Exception as e:
         logger.exception("Error in moderate")
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,24 +301,173 @@ async def moderate(payload: ModerateIn, _=Depends(check_api_key)):
     return res
 
 
+@app.get("/admin/moderation-rules", summary="Active moderation rule set")
+async def moderation_rules_status(_=Depends(check_api_key)):
+    return moderation_rules.status()
+
+
+@app.post("/admin/moderation-rules/reload", summary="Recompile and swap in the moderation rules file")
+async def reload_moderation_rules(_=Depends(check_api_key)):
+    """
+    Compile MODERATION_RULES_PATH off the event loop and atomically swap it in.
+    On a bad file the current rules stay active and 400 is returned.
+    """
+    try:
+        return await run_in_threadpool(moderation_rules.reload)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/fraud-check")
 async def fraud_check(product: ProductIn, _=Depends(check_api_key)):
     """Check if the asking price looks suspicious compared to fair range."""
     try:
-        result = await run_in_threadpool(detect_fraud, product.dict())
+        result = await _coalesced("fraud-check", product.dict(), lambda p: _in_threadpool("fraud", fraud_agent.detect_fraud, p))
         return result
     except Exception as e:
         logger.exception("Error in fraud_check")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/negotiate-deal")
-async def negotiate_deal(product: ProductIn, _=Depends(check_api_key)):
-    """Simulate buyer-seller negotiation."""
-    try:
-        result = await run_in_threadpool(negotiate_price, product.dict())
+async def negotiate_deal(
+    product: ProductIn,
+    simulate: bool = False,
+    simulations: int = Query(2000, ge=1),
+    rounds: Optional[int] = Query(None, ge=1, le=100),
+    buyer_strategy: str = "linear",
+    seller_strategy: str = "linear",
+    _=Depends(check_api_key),
+):
+    """
+    Simulate buyer-seller negotiation.
+    With `simulate=true` the response also has a `simulation` block from `simulations`
+    `rounds`-round (default 10) negotiations (strategies: boulware | linear | conceder): close probability,
+    expected deal price and deal price percentiles. Results are reproducible per request.
+    """
+    if not simulate:
+        try:
+            return await _coalesced("negotiate-deal", product.dict(), lambda p: _in_threadpool("negotiation", negotiation_agent.negotiate_price, p))
+        except Exception as e:
+            logger.exception("Error in negotiate_deal")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if simulations > NEGOTIATION_SIM_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {NEGOTIATION_SIM_MAX} simulations per request")
+    rounds = rounds or negotiation_sim.DEFAULT_ROUNDS
+    for strategy in (buyer_strategy, seller_strategy):
+        if strategy not in negotiation_sim.STRATEGIES:
+            raise HTTPException(status_code=422, detail=f"Unknown strategy {strategy!r}; use one of {sorted(negotiation_sim.STRATEGIES)}")
+
+    endpoint = f"negotiate-deal:sim:{simulations}:{rounds}:{buyer_strategy}:{seller_strategy}"
+    seed = zlib.crc32(_flight_key(endpoint, product.dict()).encode())
+
+    def run(p: dict) -> dict:
+        result = negotiation_agent.negotiate_price(p)
+        result["simulation"] = negotiation_sim.simulate(
+            p, simulations, rounds, buyer_strategy, seller_strategy, seed=seed,
+        )
         return result
+
+    try:
+        return await _coalesced(endpoint, product.dict(), lambda p: _in_threadpool("negotiation_simulation", run, p))
     except Exception as e:
         logger.exception("Error in negotiate_deal")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/analyze-listing")
+async def analyze_listing(listing: ListingIn, _=Depends(check_api_key)):
+    """
+    Everything the listing-create flow needs in one call: the fair range is
+    computed once for fraud and negotiation, the price suggestion (with LLM
+    reason) and the title/description moderation run concurrently.
+    `latency_ms` gives the wall time of each part and the total.
+    """
+    product = listing.dict(exclude={"description"})
+    try:
+        return await listing_analysis.analyze_listing(product, listing.description)
+    except Exception as e:
+        logger.exception("Error in analyze_listing")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/moderate-batch", response_model=ModerateBatchOut)
+async def moderate_batch(payload: ModerateBatchIn, _=Depends(check_api_key)):
+    """
+    Moderate many chat messages in one call.
+    Work is sharded into `chunk_size` chunks across the moderation process pool.
+    With `stream: true` results come back as NDJSON lines ({"index": i, ...}).
+    """
+    if len(payload.messages) > MODERATION_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {MODERATION_BATCH_MAX} messages per batch")
+
+    try:
+        futures = moderation_pool.submit_chunks(payload.messages, payload.chunk_size)
+    except Exception as e:
+        logger.exception("Error in moderate_batch")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if payload.stream:
+        async def lines():
+            index = 0
+            for fut in futures:
+                for res in await fut:
+                    yield json.dumps({"index": index, **res}) + "\n"
+                    index += 1
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    try:
+        results = [res for fut in futures for res in await fut]
+    except Exception as e:
+        logger.exception("Error in moderate_batch")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"count": len(results), "results": results}
+
+
+# --- Generic agent endpoints ---
+# bad input surfaces from the agents as one of these
+AGENT_INPUT_ERRORS = (ValueError, TypeError, KeyError, AttributeError)
+
+def _agent_spec(name: str):
+    try:
+        return registry.spec(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@app.get("/agents", summary="Registered agents")
+async def list_agents(_=Depends(check_api_key)):
+    return [spec.describe() for spec in registry.SPECS.values()]
+
+
+@app.post("/agents/{name}")
+async def run_agent(name: str, payload: AgentIn, _=Depends(check_api_key)):
+    """Run a registered agent on one input (a product dict, a chat message, ...)."""
+    _agent_spec(name)
+    try:
+        result = await executor.run(name, payload.input)
+    except AGENT_INPUT_ERRORS as e:
+        raise HTTPException(status_code=422, detail=f"{type(e).__name__}: {e}")
+    except Exception as e:
+        logger.exception("Error in agent %s", name)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"agent": name, "result": result}
+
+
+@app.post("/agents/{name}/batch")
+async def run_agent_batch(name: str, payload: AgentBatchIn, _=Depends(check_api_key)):
+    """
+    Run a registered agent on many inputs. CPU agents are chunked across the
+    process pool, IO agents run concurrently; results keep the input order.
+    """
+    _agent_spec(name)
+    if len(payload.inputs) > AGENT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {AGENT_BATCH_MAX} inputs per batch")
+    try:
+        results = await executor.run_batch(name, payload.inputs, payload.chunk_size)
+    except AGENT_INPUT_ERRORS as e:
+        raise HTTPException(status_code=422, detail=f"{type(e).__name__}: {e}")
+    except Exception as e:
+        logger.exception("Error in agent batch %s", name)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"agent": name, "count": len(results), "results": results}
@@ -0,0 +1,133 @@
+# src/executor.py
+"""
+Generic executor for the agents registered in src/registry.py.
+
+    await run("fraud", product)
+    await run_batch("moderation", messages, chunk_size=500)
+
+Routing follows the spec's cost class:
+- CPU agents: a single call runs on a worker thread (cheaper than a process
+  round trip for microsecond-scale rules); batches are split into chunks and
+  fanned out across the shared process pool (src/moderation_pool.py), or
+  worker threads when MODERATION_WORKERS=0. Each chunk runs the agent's batch
+  function if it has one, else its scalar function per item.
+- IO agents: coroutine functions are awaited on the event loop, so many
+  calls share one thread; a batch function (sync) runs on a worker thread.
+
+Agents with a `cache_key` get an LRU/TTL result cache. Batches look up every
+item first and compute each distinct missing key once. Every call is timed
+as the `agent:<name>` stage and counted in agent_items_total.
+
+Config (env):
+- AGENT_CACHE_SIZE  results kept per cached agent (default 10000)
+- AGENT_CACHE_TTL   seconds a cached result stays valid (default 3600)
+"""
+
+import os
+import asyncio
+import inspect
+import threading
+
+from src import metrics
+from src import registry
+from src.cache import TTLCache
+
+CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", "3600"))
+
+AGENT_ITEMS = metrics.Counter("agent_items_total", "Items handled per agent and path.", ("agent", "path"))
+
+_MISSING = object()
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name: str):
+    """The agent's result cache, or None when its spec has no cache_key."""
+    if registry.spec(name).cache_key is None:
+        return None
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+                metrics.register_cache(f"agent:{name}", cache.stats)
+    return cache
+
+def run_chunk(scalar: str, batch: str, chunk: list, context: tuple = ()) -> list:
+    """One chunk of a CPU batch; runs in a pool worker, so functions travel by path."""
+    if batch is not None:
+        return registry.resolve(batch)(chunk, *context)
+    fn = registry.resolve(scalar)
+    return [fn(item) for item in chunk]
+
+async def _call(spec, item):
+    fn = registry.resolve(spec.scalar)
+    if inspect.iscoroutinefunction(fn):
+        return await fn(item)
+    # sync scalars (every CPU agent) run on a worker thread
+    return await asyncio.to_thread(fn, item)
+
+async def run(name: str, item):
+    """Result of agent `name` for one item."""
+    spec = registry.spec(name)
+    cache = get_cache(name)
+    key = spec.cache_key(item) if cache is not None else None
+    if key is not None:
+        hit = cache.get(key, _MISSING)
+        if hit is not _MISSING:
+            AGENT_ITEMS.inc(name, "cache")
+            return hit
+
+    with metrics.stage(f"agent:{name}"):
+        result = await _call(spec, item)
+    AGENT_ITEMS.inc(name, "scalar")
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+async def _compute_batch(spec, items: list, chunk_size: int) -> list:
+    from src import moderation_pool
+
+    chunks = _chunks(items, max(1, chunk_size or moderation_pool.CHUNK_SIZE))
+    context = spec.batch_context() if spec.batch_context is not None else ()
+    loop = asyncio.get_running_loop()
+    if spec.cost == registry.CPU:
+        pool = moderation_pool.get_pool()   # None -> default thread pool
+        futures = [loop.run_in_executor(pool, run_chunk, spec.scalar, spec.batch, c, context) for c in chunks]
+    elif spec.batch is not None:
+        futures = [asyncio.to_thread(run_chunk, spec.scalar, spec.batch, c, context) for c in chunks]
+    else:
+        return list(await asyncio.gather(*(_call(spec, item) for item in items)))
+    return [result for part in await asyncio.gather(*futures) for result in part]
+
+async def run_batch(name: str, items: list, chunk_size: int = None) -> list:
+    """Results of agent `name` for every item, in input order."""
+    spec = registry.spec(name)
+    cache = get_cache(name)
+    results = [_MISSING] * len(items)
+    todo = {}    # cache key (or position for uncached items) -> positions
+    for i, item in enumerate(items):
+        key = spec.cache_key(item) if cache is not None else None
+        if key is not None:
+            hit = cache.get(key, _MISSING)
+            if hit is not _MISSING:
+                results[i] = hit
+                continue
+        todo.setdefault(("key", key) if key is not None else ("pos", i), []).append(i)
+
+    AGENT_ITEMS.inc(name, "cache", amount=len(items) - sum(len(p) for p in todo.values()))
+    if todo:
+        firsts = [positions[0] for positions in todo.values()]
+        with metrics.stage(f"agent:{name}"):
+            computed = await _compute_batch(spec, [items[i] for i in firsts], chunk_size)
+        AGENT_ITEMS.inc(name, "batch", amount=len(firsts))
+        for (kind, key), positions, result in zip(todo, todo.values(), computed):
+            for i in positions:
+                results[i] = result
+            if kind == "key":
+                cache.put(key, result)
+    return results
@@ -0,0 +1,165 @@
+# src/explanation_cache.py
+"""
+Persistent, content-addressed cache of LLM price explanations.
+
+Entries are keyed by a SHA-256 fingerprint of (provider, model, normalized
+product fields, low, high) and stored in SQLite. WAL mode lets several
+uvicorn workers share one file: readers never block and writers wait on the
+database lock instead of failing. Entries expire after a TTL and the least
+recently used rows are evicted once the table exceeds its size bound.
+
+Config (env):
+- LLM_CACHE_PATH         database file (default reports/llm_cache.sqlite, "" disables)
+- LLM_CACHE_TTL          seconds an explanation stays valid (default 7 days)
+- LLM_CACHE_MAX_ENTRIES  max rows kept (default 100000)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger("marketplace-agents")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+_EVICT_EVERY = 64   # puts between size checks
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    return str(value)
+
+def explanation_key(provider: str, model: str, product: dict, low: int, high: int) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "product": _normalize(product),
+        "low": int(low),
+        "high": int(high),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 100_000):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        try:
+            with self._conn() as conn:
+                row = conn.execute(
+                    "SELECT text, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE explanations SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            logger.exception("Explanation cache read failed")
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, text: str):
+        now = time.time()
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO explanations (key, text, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, text, now, now),
+                )
+                self._puts += 1
+                if self._puts % _EVICT_EVERY == 0:
+                    self._evict(conn, now)
+        except sqlite3.Error:
+            logger.exception("Explanation cache write failed")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM explanations WHERE key IN "
+                "(SELECT key FROM explanations ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def prune(self):
+        """Drop expired rows and trim to `max_entries` right away."""
+        with self._conn() as conn:
+            self._evict(conn, time.time())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_explanation_cache():
+    """Process-wide cache built from env on first use (None when disabled)."""
+    global _cache
+    if _cache is None:
+        path = os.getenv("LLM_CACHE_PATH", "reports/llm_cache.sqlite")
+        if not path:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExplanationCache(
+                    path,
+                    ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+                )
+    return _cache
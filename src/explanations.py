@@ -0,0 +1,153 @@
+# src/explanations.py
+"""
+Deferred LLM explanations for price suggestions.
+
+`suggest_price_deferred(product)` returns the rule-based range right away
+together with an `explanation_id`; the LLM reason is produced by a small
+pool of background consumers reading an asyncio queue. Clients fetch it
+from GET /explanations/{id} or wait on the SSE stream.
+
+Job ids are the explanation cache fingerprint, so identical products share
+one job, and finished explanations can be served by any worker that shares
+the explanation cache file.
+
+Config (env):
+- EXPLANATION_WORKERS    background consumers per process (default 4)
+- EXPLANATION_QUEUE_MAX  pending jobs before new ones fall back to the rule reason (default 1000)
+- EXPLANATION_JOBS_MAX   job records kept in memory (default 10000)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+from src.metrics import stage
+from src.registry import agent
+
+logger = logging.getLogger("marketplace-agents")
+
+WORKERS = int(os.getenv("EXPLANATION_WORKERS", "4"))
+QUEUE_MAX = int(os.getenv("EXPLANATION_QUEUE_MAX", "1000"))
+JOBS_MAX = int(os.getenv("EXPLANATION_JOBS_MAX", "10000"))
+
+price_agent = agent("price")
+
+_jobs = OrderedDict()   # id -> job dict
+_state = {}             # loop -> (queue, [consumer tasks])
+
+def _public(job: dict) -> dict:
+    return {k: job[k] for k in ("id", "status", "reason", "llm_provider", "llm_model")}
+
+def _remember(job: dict):
+    _jobs[job["id"]] = job
+    _jobs.move_to_end(job["id"])
+    while len(_jobs) > JOBS_MAX:
+        _jobs.popitem(last=False)
+
+async def _consume(queue: asyncio.Queue):
+    while True:
+        job, product, low, high = await queue.get()
+        try:
+            text = await price_agent.llm_explanation_async(product, low, high)
+            if text is None:
+                # keep the rule-based reason; the next request for this id retries
+                logger.warning("Explanation job %s: LLM provider failed", job["id"])
+                job["status"] = "failed"
+            else:
+                job["reason"] = text
+                job["status"] = "done"
+        except Exception:
+            logger.exception("Explanation job %s failed", job["id"])
+            job["status"] = "failed"
+        finally:
+            job["done"].set()
+            queue.task_done()
+
+def _queue() -> asyncio.Queue:
+    loop = asyncio.get_running_loop()
+    state = _state.get(loop)
+    if state is None:
+        for old in [l for l in _state if l.is_closed()]:
+            del _state[old]
+        queue = asyncio.Queue(maxsize=QUEUE_MAX)
+        tasks = [loop.create_task(_consume(queue)) for _ in range(max(1, WORKERS))]
+        state = _state[loop] = (queue, tasks)
+    return state[0]
+
+def _new_job(eid: str, out: dict, status: str) -> dict:
+    job = {
+        "id": eid,
+        "status": status,
+        "reason": out["reason"],
+        "llm_provider": out.get("llm_provider"),
+        "llm_model": out.get("llm_model"),
+        "created_at": time.time(),
+        "done": asyncio.Event(),
+    }
+    if status != "pending":
+        job["done"].set()
+    _remember(job)
+    return job
+
+def suggest_price_deferred(product: dict) -> dict:
+    """
+    Rule-based suggestion now, LLM reason later.
+    Must be called from a running event loop. Without USE_LLM this is just
+    the rule-based suggestion (no explanation_id).
+    """
+    with stage("pricing"):
+        out = price_agent.rule_suggestion(product)
+    if not price_agent.llm_enabled():
+        return out
+    price_agent.add_llm_info(out)
+    eid = price_agent.explanation_id(product, out["suggested_price_min"], out["suggested_price_max"])
+
+    job = _jobs.get(eid)
+    if job is None or job["status"] == "failed":
+        cached = price_agent.cached_explanation(eid)
+        if cached is not None:
+            out["reason"] = cached
+            job = _new_job(eid, out, "done")
+        else:
+            job = _new_job(eid, out, "pending")
+            try:
+                _queue().put_nowait((job, product, out["suggested_price_min"], out["suggested_price_max"]))
+            except asyncio.QueueFull:
+                # overloaded: answer with the rule-based reason only
+                _jobs.pop(eid, None)
+                return out
+    elif job["status"] == "done":
+        out["reason"] = job["reason"]
+
+    out["explanation_id"] = eid
+    return out
+
+def get_explanation(eid: str):
+    """Current job state, or None when the id is unknown."""
+    job = _jobs.get(eid)
+    if job is not None:
+        return _public(job)
+    cached = price_agent.cached_explanation(eid)
+    if cached is not None:
+        return {"id": eid, "status": "done", "reason": cached, "llm_provider": None, "llm_model": None}
+    return None
+
+async def wait_explanation(eid: str, timeout: float):
+    """Wait up to `timeout` seconds for a job to finish; returns its state."""
+    job = _jobs.get(eid)
+    if job is not None and not job["done"].is_set():
+        try:
+            await asyncio.wait_for(job["done"].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return get_explanation(eid)
+
+async def shutdown():
+    """Cancel the consumers bound to the running loop."""
+    state = _state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        for task in state[1]:
+            task.cancel()
+        await asyncio.gather(*state[1], return_exceptions=True)
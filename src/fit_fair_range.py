@@ -0,0 +1,68 @@
+# src/fit_fair_range.py
+"""
+Offline fit of the fair price range model used by src/agents/fair_range.py.
+
+Groups the cleaned catalog by each level of `fair_range.LEVELS` and keeps
+the low/high asking-price quantiles of every group with at least
+`min_count` listings. The result is a compressed .npz (no pickles) that the
+agents load once when FAIR_RANGE_MODEL points at it.
+
+    python -m src.fit_fair_range [--in data/cleaned_products.csv] [--out reports/fair_range_model.npz]
+                                 [--min-count 5] [--age-bucket 12] [--quantiles 0.25,0.75]
+"""
+
+import sys
+import pandas as pd
+
+from src.tables import read_table
+from src.agents.fair_range import FairRangeModel, LEVELS
+
+COLUMNS = ["category", "brand", "condition", "age_months", "asking_price"]
+
+def group_parts(df: pd.DataFrame, age_bucket: int, max_bucket: int) -> pd.DataFrame:
+    """Group key columns, normalized the way `fair_range_key` reads a product."""
+    return pd.DataFrame({
+        "category": df["category"].astype(object).fillna("").astype(str),
+        "brand": df["brand"].astype(object).fillna("").astype(str).str.lower(),
+        "condition": df["condition"].astype(object).fillna("").astype(str),
+        "age_bucket": (df["age_months"].clip(lower=0) // age_bucket).clip(upper=max_bucket).astype(int),
+    }, index=df.index)
+
+def fit(df: pd.DataFrame, min_count: int = 5, age_bucket: int = 12, max_bucket: int = 20,
+        quantiles=(0.25, 0.75)) -> FairRangeModel:
+    df = df.dropna(subset=["age_months", "asking_price"])
+    parts = group_parts(df, age_bucket, max_bucket)
+    price = df["asking_price"].astype(float)
+    low_q, high_q = quantiles
+
+    ranges = {}
+    for level, fields in enumerate(LEVELS):
+        grouped = price.groupby([parts[f] for f in fields], sort=False)
+        counts = grouped.size()
+        bands = grouped.quantile([low_q, high_q]).unstack()
+        for group, count in counts.items():
+            if count < min_count:
+                continue
+            values = group if isinstance(group, tuple) else (group,)
+            low, high = bands.loc[group]
+            ranges[FairRangeModel.key(level, dict(zip(fields, values)))] = (int(low), int(high))
+    return FairRangeModel(ranges, age_bucket, max_bucket)
+
+def main(in_path: str, out_path: str, **kwargs) -> FairRangeModel:
+    df = read_table(in_path, columns=COLUMNS)
+    model = fit(df, **kwargs)
+    model.save(out_path)
+    per_level = [sum(k.startswith(f"{lvl}\x1f") for k in model.ranges) for lvl in range(len(LEVELS))]
+    print(f"Fitted {len(model.ranges)} groups from {len(df)} rows (per level: {per_level}) → {out_path}")
+    return model
+
+if __name__ == "__main__":
+    def _opt(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+    main(
+        _opt("--in", "data/cleaned_products.csv"),
+        _opt("--out", "reports/fair_range_model.npz"),
+        min_count=int(_opt("--min-count", 5)),
+        age_bucket=int(_opt("--age-bucket", 12)),
+        quantiles=tuple(float(q) for q in _opt("--quantiles", "0.25,0.75").split(",")),
+    )
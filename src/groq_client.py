@@ -1,32 +1,233 @@
 # src/groq_client.py
+"""
+Groq chat-completions client.
+
+- ask(...)        blocking call over a pooled requests.Session (created, and
+                  `requests` imported, on the first blocking call)
+- ask_async(...)  httpx.AsyncClient with a persistent keep-alive pool
+                  (HTTP/2 when the `h2` package is installed), a semaphore
+                  capping in-flight calls and a per-call deadline.
+
+Both go through the same provider protection (src/rate_limit.py):
+- token buckets pace calls to GROQ_RPM requests and GROQ_TPM tokens per
+  minute (prompt length / 4 + max_tokens); a call that would have to queue
+  longer than GROQ_MAX_QUEUE_WAIT fails at once instead
+- 429, 5xx and connection errors are retried with jittered exponential
+  backoff; a 429's Retry-After pauses every caller, and one longer than
+  GROQ_MAX_QUEUE_WAIT is not waited out
+- after GROQ_BREAKER_FAILURES failed calls in a row the circuit opens and
+  calls fail instantly for GROQ_BREAKER_RESET seconds, then one probe is let
+  through
+
+Failures come back as "Groq ..." error text (see llm_client.is_error), so
+callers fall back to the rule-based reason. Limits are per process.
+
+Config (env): GROQ_API_KEY, GROQ_MODEL, GROQ_BASE_URL, GROQ_TIMEOUT,
+GROQ_MAX_CONCURRENCY, GROQ_HTTP2, GROQ_RPM (default 30), GROQ_TPM (default
+6000), GROQ_MAX_QUEUE_WAIT (default 10), GROQ_MAX_RETRIES (default 3),
+GROQ_BACKOFF_BASE (default 0.5), GROQ_BACKOFF_MAX (default 8),
+GROQ_BREAKER_FAILURES (default 5), GROQ_BREAKER_RESET (default 30).
+"""
+
 import os
-import requests
+import time
+import asyncio
+import importlib.util
+import threading
+import httpx
 from dotenv import load_dotenv
 
+from src import metrics
+from src.rate_limit import RateLimiter, CircuitBreaker, backoff_delay, parse_retry_after
+
 load_dotenv()
 
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-BASE_URL = "https://api.groq.com/openai/v1"
+BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+HTTP2 = os.getenv("GROQ_HTTP2", "true").lower() in ("1", "true", "yes") and importlib.util.find_spec("h2") is not None
 
-def ask(prompt: str, model: str = None, max_tokens: int = 200) -> str:
-    if not GROQ_KEY:
-        return "No GROQ_API_KEY found in .env"
+MAX_QUEUE_WAIT = float(os.getenv("GROQ_MAX_QUEUE_WAIT", "10"))
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "8"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-    url = f"{BASE_URL}/chat/completions"
-    headers = {"Authorization": f"Bearer {GROQ_KEY}"}
-    payload = {
+LIMITER = RateLimiter(rpm=float(os.getenv("GROQ_RPM", "30")), tpm=float(os.getenv("GROQ_TPM", "6000")))
+BREAKER = CircuitBreaker(
+    failures=int(os.getenv("GROQ_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("GROQ_BREAKER_RESET", "30")),
+)
+
+CALLS = metrics.Counter("groq_calls_total", "Groq calls by outcome.", ("outcome",))
+RETRIES = metrics.Counter("groq_retries_total", "Retried Groq attempts by cause.", ("cause",))
+
+CIRCUIT_OPEN = "Groq request failed: circuit open, provider degraded"
+
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+def _payload(prompt: str, model: str, max_tokens: int) -> dict:
+    return {
         "model": model or DEFAULT_MODEL,
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": max_tokens,
         "temperature": 0.7,
     }
 
+def estimate_tokens(payload: dict) -> int:
+    # ~4 characters per token; completion tokens count against TPM too
+    return len(payload["messages"][0]["content"]) // 4 + payload["max_tokens"]
+
+def _rate_limited(wait_limit: float) -> str:
+    CALLS.inc("rate_limited")
+    return f"Groq request failed: rate limited (queue wait over {wait_limit:.1f}s)"
+
+def _result(resp) -> tuple:
+    """(text, ok, retry_after) for one response; retry_after is None when not retryable."""
+    if resp.status_code == 200:
+        return resp.json()["choices"][0]["message"]["content"], True, None
+    text = f"Groq API error {resp.status_code}: {resp.text}"
+    if resp.status_code not in RETRY_STATUSES:
+        return text, False, None
+    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+    if resp.status_code == 429:
+        # the quota is shared: hold back every caller, not just this one
+        LIMITER.pause(retry_after if retry_after is not None else BACKOFF_BASE)
+    return text, False, retry_after if retry_after is not None else 0.0
+
+def _next_delay(attempt: int, retry_after: float, cause: str, wait_limit: float):
+    """Sleep before the next attempt, or None to give up."""
+    if retry_after is None or attempt >= MAX_RETRIES or retry_after > wait_limit:
+        return None
+    RETRIES.inc(cause)
+    return backoff_delay(attempt, BACKOFF_BASE, BACKOFF_MAX, retry_after or None)
+
+def _finish(text: str, ok: bool) -> str:
+    if ok:
+        BREAKER.record_success()
+    else:
+        BREAKER.record_failure()
+    CALLS.inc("ok" if ok else "error")
+    return text
+
+def ask(prompt: str, model: str = None, max_tokens: int = 200) -> str:
+    if not GROQ_KEY:
+        return "No GROQ_API_KEY found in .env"
+    if not BREAKER.allow():
+        CALLS.inc("circuit_open")
+        return CIRCUIT_OPEN
+
+    url = f"{BASE_URL}/chat/completions"
+    headers = {"Authorization": f"Bearer {GROQ_KEY}"}
+    payload = _payload(prompt, model, max_tokens)
+    tokens = estimate_tokens(payload)
+
+    for attempt in range(MAX_RETRIES + 1):
+        wait = LIMITER.reserve(tokens, MAX_QUEUE_WAIT)
+        if wait is None:
+            return _rate_limited(MAX_QUEUE_WAIT)
+        time.sleep(wait)
+        try:
+            resp = _get_session().post(url, headers=headers, json=payload, timeout=TIMEOUT)
+            text, ok, retry_after = _result(resp)
+            cause = str(resp.status_code)
+        except Exception as e:
+            text, ok, retry_after, cause = f"Groq request failed: {e}", False, 0.0, "connection"
+        if ok:
+            break
+        delay = _next_delay(attempt, retry_after, cause, MAX_QUEUE_WAIT)
+        if delay is None:
+            break
+        time.sleep(delay)
+    return _finish(text, ok)
+
+# --- async client ---
+# httpx clients and asyncio semaphores are bound to the event loop that first
+# uses them, so one pair is kept per running loop.
+_async_state = {}   # loop -> (client, semaphore)
+
+def _async_client():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        for old in [l for l in _async_state if l.is_closed()]:
+            del _async_state[old]
+        client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONCURRENCY,
+                max_keepalive_connections=MAX_CONCURRENCY,
+                keepalive_expiry=60,
+            ),
+        )
+        state = _async_state[loop] = (client, asyncio.Semaphore(MAX_CONCURRENCY))
+    return state
+
+async def _post(client, semaphore, payload: dict):
+    async with semaphore:
+        return await client.post(
+            f"{BASE_URL}/chat/completions",
+            headers={"Authorization": f"Bearer {GROQ_KEY}"},
+            json=payload,
+        )
+
+async def _ask_with_retries(client, semaphore, payload: dict, deadline: float) -> str:
+    tokens = estimate_tokens(payload)
+    for attempt in range(MAX_RETRIES + 1):
+        # never queue past the caller's deadline
+        wait_limit = min(MAX_QUEUE_WAIT, deadline - time.monotonic())
+        wait = LIMITER.reserve(tokens, wait_limit)
+        if wait is None:
+            return _rate_limited(wait_limit)
+        await asyncio.sleep(wait)
+        try:
+            resp = await _post(client, semaphore, payload)
+            text, ok, retry_after = _result(resp)
+            cause = str(resp.status_code)
+        except Exception as e:
+            text, ok, retry_after, cause = f"Groq request failed: {e}", False, 0.0, "connection"
+        if ok:
+            break
+        delay = _next_delay(attempt, retry_after, cause, deadline - time.monotonic())
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    return _finish(text, ok)
+
+async def ask_async(prompt: str, model: str = None, max_tokens: int = 200, timeout: float = None) -> str:
+    """Non-blocking `ask`; `timeout` is a deadline covering queueing, retries and the request."""
+    if not GROQ_KEY:
+        return "No GROQ_API_KEY found in .env"
+    if not BREAKER.allow():
+        CALLS.inc("circuit_open")
+        return CIRCUIT_OPEN
+
+    client, semaphore = _async_client()
+    payload = _payload(prompt, model, max_tokens)
+    timeout = timeout or TIMEOUT
+
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
-        if resp.status_code != 200:
-            return f"Groq API error {resp.status_code}: {resp.text}"
-        data = resp.json()
-        return data["choices"][0]["message"]["content"]
-    except Exception as e:
-        return f"Groq request failed: {e}"
+        return await asyncio.wait_for(
+            _ask_with_retries(client, semaphore, payload, time.monotonic() + timeout), timeout,
+        )
+    except asyncio.TimeoutError:
+        return _finish(f"Groq request failed: deadline of {timeout}s exceeded", False)
+
+async def aclose():
+    """Close the async client bound to the running loop."""
+    state = _async_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].aclose()
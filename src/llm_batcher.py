@@ -0,0 +1,166 @@
+# src/llm_batcher.py
+"""
+Micro-batching dispatcher for LLM price explanations.
+
+Callers `submit()` explanation requests and get a Future back. A background
+thread collects pending requests until `max_items` are waiting or `window`
+seconds have passed since the first one, then dispatches the batch:
+
+- "packed":     one chat completion with a numbered multi-item prompt that
+                asks for a JSON array of {"id", "reason"}; answers are
+                demultiplexed back to their callers.
+- "concurrent": one completion per item.
+
+Either way at most `max_concurrency` requests are in flight at once (the
+provider rate-limit budget).
+
+A Future resolves to the explanation text, or None when the item's answer
+was missing, unparseable or a provider error; callers then fall back to the
+rule-based reason.
+
+Config (env): LLM_BATCH_MODE, LLM_BATCH_SIZE, LLM_BATCH_WINDOW_MS,
+LLM_BATCH_CONCURRENCY.
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.llm_client import ask, is_error
+
+logger = logging.getLogger("marketplace-agents")
+
+MODE = os.getenv("LLM_BATCH_MODE", "packed")
+BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "20"))
+WINDOW = float(os.getenv("LLM_BATCH_WINDOW_MS", "50")) / 1000
+CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "4"))
+TOKENS_PER_ITEM = 90
+
+_STOP = object()
+
+def packed_prompt(items: list) -> str:
+    lines = [
+        f'{i}. Product details: {product}. Suggested price range: ₹{low} - ₹{high}.'
+        for i, (product, low, high) in enumerate(items)
+    ]
+    return (
+        "For each numbered product below, write 2 short friendly sentences explaining why its "
+        "suggested price range is fair (mention age, condition, brand).\n"
+        'Answer with only a JSON array of objects like {"id": <number>, "reason": "<text>"}, '
+        "one per product.\n\n" + "\n".join(lines)
+    )
+
+def parse_packed(text: str, n: int) -> list:
+    """Map a packed answer back to n slots (None where an item is missing)."""
+    out = [None] * n
+    if not text or is_error(text):
+        return out
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return out
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return out
+    if not isinstance(answers, list):
+        return out
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        try:
+            idx = int(answer.get("id"))
+        except (TypeError, ValueError):
+            continue
+        reason = answer.get("reason")
+        if 0 <= idx < n and isinstance(reason, str) and reason.strip():
+            out[idx] = reason.strip()
+    return out
+
+
+class ExplanationBatcher:
+    def __init__(self, ask_fn=None, mode: str = None, max_items: int = None,
+                 window: float = None, max_concurrency: int = None):
+        self.ask = ask_fn or ask
+        self.mode = mode or MODE
+        self.max_items = max(1, max_items or BATCH_SIZE)
+        self.window = WINDOW if window is None else window
+        self.max_concurrency = max(1, max_concurrency or CONCURRENCY)
+        self.batches = 0
+        self.items = 0
+        self.failed_items = 0
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self._thread = threading.Thread(target=self._collect, name="llm-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, product: dict, low: int, high: int) -> Future:
+        fut = Future()
+        self._queue.put((product, low, high, fut))
+        return fut
+
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            try:
+                while len(batch) < self.max_items:
+                    item = self._queue.get(timeout=self.window)
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if self.mode == "packed":
+                self._executor.submit(self._dispatch, batch)
+            else:
+                for item in batch:
+                    self._executor.submit(self._dispatch, [item])
+            if stop:
+                return
+
+    def _dispatch(self, batch: list):
+        items = [(product, low, high) for product, low, high, _ in batch]
+        try:
+            if self.mode == "packed" and len(items) > 1:
+                text = self.ask(packed_prompt(items), max_tokens=TOKENS_PER_ITEM * len(items))
+                answers = parse_packed(text, len(items))
+            else:
+                answers = [self._single(item) for item in items]
+        except Exception:
+            logger.exception("LLM batch of %d failed", len(items))
+            answers = [None] * len(items)
+
+        self.batches += 1
+        self.items += len(items)
+        self.failed_items += sum(a is None for a in answers)
+        for (_, _, _, fut), answer in zip(batch, answers):
+            fut.set_result(answer)
+
+    def _single(self, item) -> str:
+        from src.agents.price_agent import explain_prompt   # price_agent imports this module
+        product, low, high = item
+        text = self.ask(explain_prompt(product, low, high))
+        text = text.strip() if text else ""
+        return None if is_error(text) else text
+
+    def close(self):
+        """Flush pending items and wait for in-flight batches."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items, "failed_items": self.failed_items}
@@ -1,19 +1,75 @@
 # src/llm_client.py
 """
 Unified LLM client for Hugging Face and Groq.
+Exposes blocking `ask` and awaitable `ask_async` for the configured provider.
+
+The provider (LLM_PROVIDER) is chosen and its client imported on the first
+call, or by `backend()` during warmup, so importing this module is cheap.
 """
 
 import os
+import asyncio
+import threading
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
 load_dotenv()
 
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "none").lower()
+# Providers report failures as text; these must never be cached as answers.
+ERROR_PREFIXES = ("LLM disabled", "No GROQ_API_KEY", "Groq API error", "Groq request failed")
 
-if LLM_PROVIDER == "groq":
-    from src.groq_client import ask
-elif LLM_PROVIDER == "huggingface":
-    from src.hf_client import ask   # <- we'll rename your old HF code into hf_client.py
-else:
+def is_error(text: str) -> bool:
+    return not text or text.startswith(ERROR_PREFIXES)
+
+def _disabled():
     def ask(prompt: str, model: str = None, max_tokens: int = 120) -> str:
         return "LLM disabled. Set LLM_PROVIDER in .env"
+
+    async def ask_async(prompt: str, model: str = None, max_tokens: int = 120) -> str:
+        return ask(prompt, model, max_tokens)
+
+    async def aclose():
+        pass
+
+    return SimpleNamespace(ask=ask, ask_async=ask_async, aclose=aclose)
+
+def _huggingface():
+    from src.hf_client import ask   # <- we'll rename your old HF code into hf_client.py
+
+    async def ask_async(prompt: str, model: str = None, max_tokens: int = 120) -> str:
+        return await asyncio.to_thread(ask, prompt, model, max_tokens)
+
+    async def aclose():
+        pass
+
+    return SimpleNamespace(ask=ask, ask_async=ask_async, aclose=aclose)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def backend():
+    """The configured provider's client, imported on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                provider = os.getenv("LLM_PROVIDER", "none").lower()
+                if provider == "groq":
+                    from src import groq_client as client
+                elif provider == "huggingface":
+                    client = _huggingface()
+                else:
+                    client = _disabled()
+                _backend = client
+    return _backend
+
+def ask(prompt: str, *args, **kwargs) -> str:
+    return backend().ask(prompt, *args, **kwargs)
+
+async def ask_async(prompt: str, *args, **kwargs) -> str:
+    return await backend().ask_async(prompt, *args, **kwargs)
+
+async def aclose():
+    # nothing to close if no LLM call was ever made
+    if _backend is not None:
+        await _backend.aclose()
@@ -0,0 +1,249 @@
+# src/metrics.py
+"""
+In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms are sharded per thread: every thread writes
+only to its own dict (found through a threading.local), so recording a
+sample takes no lock and threads never contend on a shared counter. A scrape
+sums the shards of all threads; it may miss a sample recorded while it runs,
+which the next scrape picks up.
+
+    REQUESTS.inc("/negotiate", "POST", "200")
+    with stage("pricing"):
+        ...
+
+`MetricsMiddleware` records per-endpoint request counts, in-flight requests
+and latency; `stage(name)` times agent stages (pricing, llm, moderation,
+threadpool_wait, ...); caches registered with `register_cache` are reported
+with their hit ratios. `render()` returns everything for GET /metrics.
+
+Samples recorded in other processes (moderation pool workers, other uvicorn
+workers) are not included; each process reports its own.
+
+Config (env):
+- METRICS_ENABLED  record per-request metrics and serve GET /metrics (default true)
+"""
+
+import os
+import time
+import bisect
+import threading
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# seconds; fine enough for sub-millisecond rule stages, wide enough for LLM calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_local = threading.local()
+_shards = []               # one dict per thread that ever recorded a sample
+_shards_lock = threading.Lock()
+REGISTRY = []              # metrics in registration order
+CACHES = {}                # name -> callable returning a stats dict (or None)
+
+def _shard() -> dict:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+        return shard
+
+def _samples(metric) -> dict:
+    """labels -> this metric's shard values, from every thread."""
+    with _shards_lock:
+        shards = list(_shards)
+    out = {}
+    for shard in shards:
+        for (m, labels), value in list(shard.items()):
+            if m is metric:
+                out.setdefault(labels, []).append(value)
+    return out
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra="") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        shard = _shard()
+        key = (self, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return sum(_samples(self).get(labels, ()))
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, values in sorted(_samples(self).items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(sum(values))}")
+        return lines
+
+
+class Gauge(Counter):
+    """A counter that can go down; each thread keeps its own running delta."""
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = _shard()
+        key = (self, labels)
+        cell = shard.get(key)
+        if cell is None:
+            # one count per bucket, one for +Inf, then the sum
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, *labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels) -> dict:
+        cells = _samples(self).get(labels, ())
+        counts = [sum(c[i] for c in cells) for i in range(len(self.buckets) + 1)]
+        return {"count": sum(counts), "sum": sum(c[-1] for c in cells), "counts": counts}
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels in sorted(_samples(self)):
+            snap = self.snapshot(*labels)
+            running = 0
+            for le, n in zip(self.buckets + (float("inf"),), snap["counts"]):
+                running += n
+                bound = 'le="' + _number(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bound)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(snap['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {snap['count']}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status.", ("endpoint", "method", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.", ("endpoint",))
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("endpoint",))
+STAGE_SECONDS = Histogram("agent_stage_duration_seconds", "Time spent in each agent stage.", ("stage",))
+
+def stage(name: str) -> _Timer:
+    """Context manager timing one agent stage into agent_stage_duration_seconds."""
+    return _Timer(STAGE_SECONDS, (name,))
+
+def register_cache(name: str, stats):
+    """Report `stats()` (a dict with hits and misses, or None) as cache_* metrics."""
+    CACHES[name] = stats
+
+def _cache_lines() -> list:
+    rows = []
+    for name, stats in CACHES.items():
+        s = stats()
+        if s is not None:
+            rows.append((name, s))
+    lines = []
+    for metric, kind, help, value in (
+        ("cache_hits_total", "counter", "Cache lookups that found an entry.", lambda s: s["hits"]),
+        ("cache_misses_total", "counter", "Cache lookups that missed.", lambda s: s["misses"]),
+        ("cache_hit_ratio", "gauge", "Hits / lookups since start.", lambda s: s["hit_ratio"]),
+    ):
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{cache="{_escape(name)}"}} {_number(value(s))}' for name, s in rows]
+    return lines
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _cache_lines()
+    return "\n".join(lines) + "\n"
+
+def reset():
+    """Drop every recorded sample (tests)."""
+    with _shards_lock:
+        for shard in _shards:
+            shard.clear()
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request count, in-flight gauge and latency per route template."""
+
+    def __init__(self, app, routes=()):
+        self.app = app
+        self.routes = routes
+
+    def _endpoint(self, scope) -> str:
+        # same matching the router does next; keeps labels to route templates
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match.name == "FULL":
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        endpoint = self._endpoint(scope)
+        IN_FLIGHT.inc(endpoint)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            LATENCY.observe(time.perf_counter() - start, endpoint)
+            IN_FLIGHT.dec(endpoint)
+            REQUESTS.inc(endpoint, scope["method"], status)
@@ -0,0 +1,79 @@
+# src/moderation_pool.py
+"""
+Warm process pool for bulk chat moderation.
+
+Regex moderation is CPU-bound, so large batches are sharded into chunks and
+fanned out across worker processes (sidestepping the GIL). Each worker
+imports the moderation agent once in its initializer. Every chunk carries
+the active rules version and contents, so workers pick up hot-reloaded rules
+(src/moderation_rules.py) without restarting the pool.
+
+The same pool runs the CPU batches of every agent for src/executor.py.
+
+Config (env):
+- MODERATION_WORKERS     number of worker processes (0 = run in-process)
+- MODERATION_CHUNK_SIZE  default messages per chunk
+"""
+
+import os
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from src.agents.moderation_agent import moderate_message
+from src import moderation_rules
+
+WORKERS = int(os.getenv("MODERATION_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_SIZE = int(os.getenv("MODERATION_CHUNK_SIZE", "500"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _init_worker():
+    # preload the agent (and its compiled scanner) once per process
+    import src.agents.moderation_agent  # noqa: F401
+
+def _ping() -> int:
+    return os.getpid()
+
+def moderate_chunk(messages: list, rules: tuple = None) -> list:
+    if rules is not None:
+        moderation_rules.ensure(rules)
+    return [moderate_message(m) for m in messages]
+
+def get_pool():
+    """Return the shared pool, creating it on first use (None when WORKERS=0)."""
+    global _pool
+    if WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=WORKERS, initializer=_init_worker)
+    return _pool
+
+def warm():
+    """Start every worker up front so the first batch doesn't pay for spawning."""
+    pool = get_pool()
+    if pool is not None:
+        for f in [pool.submit(_ping) for _ in range(WORKERS)]:
+            f.result()
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+def chunked(messages: list, chunk_size: int = None) -> list:
+    size = max(1, chunk_size or CHUNK_SIZE)
+    return [messages[i:i + size] for i in range(0, len(messages), size)]
+
+def submit_chunks(messages: list, chunk_size: int = None) -> list:
+    """Schedule every chunk on the pool; returns asyncio futures in input order."""
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    # in-process chunks already use the active scanner
+    rules = moderation_rules.current_rules() if pool is not None else None
+    return [loop.run_in_executor(pool, moderate_chunk, chunk, rules) for chunk in chunked(messages, chunk_size)]
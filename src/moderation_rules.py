@@ -0,0 +1,197 @@
+# src/moderation_rules.py
+"""
+Hot-reloadable moderation rules.
+
+Rules live in a JSON file; any key left out keeps the built-in value from
+src/agents/moderation_agent.py:
+
+    {
+      "blacklist": ["idiot", "scam", ...],
+      "spam_keyphrases": ["click here", "buy now", ...],
+      "phone_regex": "...",
+      "url_regex": "..."
+    }
+
+`reload()` compiles the file into a new immutable ModerationScanner and
+swaps it in with a single reference assignment, so requests see either the
+old or the new rules, never a mix. Compilation happens on the watcher
+thread or a threadpool thread, never on the request path. Bulk moderation
+chunks carry the active version and the file contents it was compiled from;
+pool workers compile those bytes (cached per version) and never re-read the
+file, so they always apply exactly the rules the parent activated.
+
+Config (env):
+- MODERATION_RULES_PATH  rules file (default: unset, built-in rules)
+- MODERATION_RULES_POLL  seconds between file checks by the watcher (default 5; 0 disables it)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from src.agents import moderation_agent
+from src.agents.moderation_agent import ModerationScanner
+
+logger = logging.getLogger("marketplace-agents")
+
+RULES_PATH = os.getenv("MODERATION_RULES_PATH", "")
+POLL_INTERVAL = float(os.getenv("MODERATION_RULES_POLL", "5"))
+BUILTIN = "builtin"
+
+_lock = threading.Lock()
+_status = {"path": None, "version": BUILTIN, "loaded_at": None, "compile_ms": None, "error": None}
+_watcher = None
+_raw = None            # contents of the active rules file (None: built-in rules)
+_compiled = OrderedDict()   # version -> scanner, in pool workers
+COMPILED_MAX = 4
+
+def _string_list(rules: dict, key: str, default) -> list:
+    value = rules.get(key, default)
+    if not isinstance(value, (list, tuple, set, frozenset)) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"'{key}' must be a list of strings")
+    return [v.lower() for v in value]
+
+def _regex(rules: dict, key: str, default):
+    if key not in rules:
+        return default
+    try:
+        return re.compile(rules[key])
+    except (re.error, TypeError) as e:
+        raise ValueError(f"'{key}' is not a valid regex: {e}") from e
+
+def compile_rules(rules: dict, version: str) -> ModerationScanner:
+    """Validate a rules dict and compile it into a scanner."""
+    if not isinstance(rules, dict):
+        raise ValueError("rules file must contain a JSON object")
+    unknown = set(rules) - {"blacklist", "spam_keyphrases", "phone_regex", "url_regex"}
+    if unknown:
+        raise ValueError(f"unknown rule keys: {sorted(unknown)}")
+    return ModerationScanner(
+        blacklist=_string_list(rules, "blacklist", moderation_agent.BLACKLIST),
+        spam_keyphrases=_string_list(rules, "spam_keyphrases", moderation_agent.SPAM_KEYPHRASES),
+        phone_re=_regex(rules, "phone_regex", moderation_agent.PHONE_RE),
+        url_re=_regex(rules, "url_regex", moderation_agent.URL_HINT_RE),
+        version=version,
+    )
+
+def compile_raw(raw: bytes, source: str = "rules") -> ModerationScanner:
+    """Compile rules file contents; the version is a hash of the contents."""
+    try:
+        rules = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"{source}: invalid JSON: {e}") from e
+    return compile_rules(rules, hashlib.sha256(raw).hexdigest()[:12])
+
+def load_rules(path: str) -> ModerationScanner:
+    """Compile the rules file at `path`."""
+    with open(path, "rb") as f:
+        return compile_raw(f.read(), path)
+
+def reload(path: str = None) -> dict:
+    """Compile `path` (default MODERATION_RULES_PATH) and swap it in; returns status()."""
+    path = path or RULES_PATH
+    if not path:
+        raise ValueError("no moderation rules file configured (MODERATION_RULES_PATH)")
+    global _raw
+    with _lock:
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            scanner = compile_raw(raw, path)
+        except (OSError, ValueError) as e:
+            _status["error"] = str(e)
+            raise
+        moderation_agent.set_scanner(scanner)
+        _raw = raw
+        _status.update(
+            path=path,
+            version=scanner.version,
+            loaded_at=time.time(),
+            compile_ms=round((time.perf_counter() - start) * 1000, 2),
+            error=None,
+        )
+    logger.info("Loaded moderation rules %s (version %s)", path, scanner.version)
+    return status()
+
+def status() -> dict:
+    scanner = moderation_agent.get_scanner()
+    with _lock:
+        out = dict(_status)
+    out.update(
+        active_version=scanner.version,
+        blacklist_terms=len(scanner.blacklist),
+        spam_keyphrases=scanner.keyphrases.size,
+        watching=_watcher is not None,
+    )
+    return out
+
+def current_rules() -> tuple:
+    """(version, file contents) of the active rules, sent along with bulk moderation chunks."""
+    with _lock:
+        return _status["version"], _raw
+
+def ensure(rules: tuple):
+    """In a bulk moderation worker: make the active rules match `rules`."""
+    version, raw = rules
+    if moderation_agent.get_scanner().version == version:
+        return
+    scanner = _compiled.get(version)
+    if scanner is None:
+        scanner = ModerationScanner() if raw is None else compile_raw(raw)
+        _compiled[version] = scanner
+        while len(_compiled) > COMPILED_MAX:
+            _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(version)
+    moderation_agent.set_scanner(scanner)
+
+class _Watcher(threading.Thread):
+    def __init__(self, path: str, interval: float):
+        super().__init__(name="moderation-rules-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.last = self._stamp()
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            stamp = self._stamp()
+            if stamp is None or stamp == self.last:
+                continue
+            self.last = stamp
+            try:
+                reload(self.path)
+            except Exception:
+                # keep serving the previous rules
+                logger.exception("Could not reload moderation rules from %s", self.path)
+
+def start_watcher(path: str = None, interval: float = None):
+    """Poll the rules file and reload it whenever it changes."""
+    global _watcher
+    path = path or RULES_PATH
+    interval = POLL_INTERVAL if interval is None else interval
+    if not path or interval <= 0:
+        return
+    stop_watcher()
+    _watcher = _Watcher(path, interval)
+    _watcher.start()
+
+def stop_watcher():
+    global _watcher
+    watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher.stopped.set()
+        watcher.join()
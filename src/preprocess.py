@@ -5,8 +5,12 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
+from src.sketch import QuantileSketch
+from src.tables import read_table, iter_table, write_table, TableWriter
+
 def load_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+    # any format src.tables reads (CSV, Parquet, Feather), despite the name
+    df = read_table(path)
     print(f"Loaded {len(df)} rows from {path}")
     return df
 
@@ -54,6 +58,142 @@ def category_normalize(cat):
     }
     return mapping.get(c, cat.title())
 
+# --- Vectorized column versions (identical results, including NaN handling) ---
+
+_PLAIN_PRICE_RE = r"\d+\.?\d*|\.\d+"
+_ASCII_WS = "[ \t\n\r\f\v]*"
+_PLAIN_NUMBER_RE = _ASCII_WS + r"[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)" + _ASCII_WS
+# loose superset of what float() accepts beyond plain decimals; these go to the scalar parser
+_FLOAT_LIKE_RE = r"(?i)\s*[+-]?(?:(?:[\d_]+\.?[\d_]*|\.[\d_]+)(?:e[+-]?[\d_]+)?|inf|infinity|nan)\s*"
+_NON_ASCII_RE = r"[^\x00-\x7f]"
+
+def _is_plain_numeric(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+def _is_all_str(s: pd.Series) -> bool:
+    return pd.api.types.infer_dtype(s, skipna=True) == "string"
+
+def _apply_unique(s: pd.Series, fn):
+    """`s.apply(fn)` running `fn` once per distinct value, or None when values barely repeat."""
+    codes, uniques = pd.factorize(s)
+    if len(s) == 0 or len(uniques) > len(s) // 4:
+        return None
+    results = [fn(v) for v in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(results), codes)
+        results.append(fn(np.nan))
+    # same inference apply() applies to the per-row results
+    table = pd.Series(results, dtype=object).infer_objects()
+    out = pd.Series(table.to_numpy().take(codes), index=s.index, name=s.name)
+    return out.infer_objects() if table.dtype == object else out.astype(table.dtype)
+
+def parse_price_series(s: pd.Series) -> pd.Series:
+    """`s.apply(parse_price)` without a Python call per cell."""
+    repeated = _apply_unique(s, parse_price)
+    if repeated is not None:
+        return repeated
+    mask = s.notna().to_numpy()
+    vals = s[mask]
+    if len(vals) == 0 or not (_is_plain_numeric(vals) or _is_all_str(vals)):
+        return s.apply(parse_price)
+
+    out = np.full(len(s), np.nan)
+    idx = np.flatnonzero(mask)
+    if _is_plain_numeric(vals):
+        # str() drops only the sign as long as repr() has no exponent
+        f = np.abs(vals.to_numpy(dtype=np.float64))
+        safe = (f < 1e16) & ((f >= 1e-4) | (f == 0))
+        if pd.api.types.is_integer_dtype(vals):
+            safe[:] = True
+        out[idx[safe]] = f[safe]
+        if not safe.all():
+            out[idx[~safe]] = vals[~safe].map(parse_price).to_numpy(dtype=np.float64)
+    else:
+        cleaned = vals.str.replace(r"[^\d\.]", "", regex=True)
+        valid = cleaned.str.fullmatch(_PLAIN_PRICE_RE).to_numpy(dtype=bool)
+        out[idx[valid]] = cleaned[valid].astype(np.float64).to_numpy()
+    return pd.Series(out, index=s.index, name=s.name)
+
+def _ages_to_series(out: np.ndarray, s: pd.Series) -> pd.Series:
+    # apply() yields int64 unless a NaN forces float64
+    if not np.isnan(out).any():
+        return pd.Series(out.astype(np.int64), index=s.index, name=s.name)
+    return pd.Series(out, index=s.index, name=s.name)
+
+def parse_age_series(s: pd.Series) -> pd.Series:
+    """`s.apply(parse_age)` without a Python call per cell."""
+    repeated = _apply_unique(s, parse_age)
+    if repeated is not None:
+        return repeated
+    mask = s.notna().to_numpy()
+    vals = s[mask]
+    if len(vals) == 0 or not (_is_plain_numeric(vals) or _is_all_str(vals)):
+        return s.apply(parse_age)
+
+    out = np.full(len(s), np.nan)
+    idx = np.flatnonzero(mask)
+    if _is_plain_numeric(vals):
+        f = vals.to_numpy(dtype=np.float64)
+        # int(inf) raises and "inf" has no digits, so infinities become NaN
+        finite = np.isfinite(f)
+        out[idx[finite]] = np.trunc(f[finite])
+    else:
+        plain = vals.str.fullmatch(_PLAIN_NUMBER_RE).to_numpy(dtype=bool)
+        tricky = ~plain & (
+            vals.str.contains(_NON_ASCII_RE).to_numpy(dtype=bool)
+            | vals.str.fullmatch(_FLOAT_LIKE_RE).to_numpy(dtype=bool)
+        )
+        rest = ~plain & ~tricky
+
+        f = vals[plain].astype(np.float64).to_numpy()
+        finite = np.isfinite(f)
+        out[idx[plain][finite]] = np.trunc(f[finite])
+        # overflowing plain numbers fall through to the scalar parser too
+        tricky[np.flatnonzero(plain)[~finite]] = True
+
+        digits = vals[rest].str.extract(r"(\d+)", expand=False)
+        long_digits = digits.str.len().to_numpy(dtype=np.float64) > 15
+        tricky[np.flatnonzero(rest)[long_digits]] = True
+        keep = ~long_digits
+        out[idx[rest][keep]] = digits[keep].astype(np.float64).to_numpy()
+
+        if tricky.any():
+            try:
+                parsed = vals[tricky].map(parse_age)
+            except OverflowError:
+                parsed = None
+            if parsed is None or parsed.dtype == object:
+                # Python ints too big for float64, keep apply()'s behaviour
+                return s.apply(parse_age)
+            out[idx[tricky]] = parsed.to_numpy(dtype=np.float64)
+
+    if np.abs(out[~np.isnan(out)]).max(initial=0) >= 2**53:
+        # beyond exact float range apply() would keep Python ints
+        return s.apply(parse_age)
+    return _ages_to_series(out, s)
+
+def _map_unique(s: pd.Series, fn) -> pd.Series:
+    # low-cardinality column: run `fn` once per distinct value
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # columnar tables load text as categoricals; map plain values so new ones
+        # (e.g. "Other" for nulls) can be set
+        s = s.astype(object)
+    lookup = {v: fn(v) for v in pd.unique(s.dropna())}
+    return s.map(lookup)
+
+def normalize_condition_series(s: pd.Series) -> pd.Series:
+    """`s.apply(normalize_condition)` via a lookup of distinct values."""
+    if s.isna().all():
+        return s.apply(normalize_condition)
+    return _map_unique(s, normalize_condition)
+
+def category_normalize_series(s: pd.Series) -> pd.Series:
+    """`s.apply(category_normalize)` via a lookup of distinct values."""
+    if s.isna().all():
+        return s.apply(category_normalize)
+    out = _map_unique(s, category_normalize)
+    return out.where(s.notna(), "Other")
+
 def remove_price_outliers(df, col="asking_price"):
     q1 = df[col].quantile(0.25)
     q3 = df[col].quantile(0.75)
@@ -61,12 +201,16 @@ def remove_price_outliers(df, col="asking_price"):
     low, high = q1 - 1.5*iqr, q3 + 1.5*iqr
     return df[(df[col] >= low) & (df[col] <= high)].reset_index(drop=True)
 
+def clean_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df["asking_price"] = parse_price_series(df["asking_price"])
+    df["age_months"] = parse_age_series(df["age_months"])
+    df["condition"] = normalize_condition_series(df["condition"])
+    df["category"] = category_normalize_series(df["category"])
+    return df
+
 def main(in_path, out_path):
     df = load_csv(in_path)
-    df["asking_price"] = df["asking_price"].apply(parse_price)
-    df["age_months"] = df["age_months"].apply(parse_age)
-    df["condition"] = df["condition"].apply(normalize_condition)
-    df["category"] = df["category"].apply(category_normalize)
+    df = clean_columns(df)
 
     # Handle missing values
     df["asking_price"] = df["asking_price"].fillna(df["asking_price"].median())
@@ -76,109 +220,79 @@ def main(in_path, out_path):
     df = remove_price_outliers(df, "asking_price")
 
     # Save outputs
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_path, index=False)
+    write_table(df, out_path)
     print(f"Saved cleaned dataset → {out_path}")
 
     profile = {
         "rows": len(df),
-        "median_price_by_category": df.groupby("category")["asking_price"].median().to_dict(),
+        "median_price_by_category": df.groupby("category", observed=True)["asking_price"].median().to_dict(),
     }
     with open("reports/data_profile.json", "w") as f:
         json.dump(profile, f, indent=2)
     print("Saved profile → reports/data_profile.json")
 
-if __name__ == "__main__":
-    main("data/products.csv", "data/cleaned_products.csv")
-import sys
-import re
-import json
-from pathlib import Path
-import pandas as pd
-import numpy as np
-
-def load_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    print(f"Loaded {len(df)} rows from {path}")
-    return df
-
-def normalize_condition(val):
-    if pd.isna(val):
-        return np.nan
-    v = str(val).strip().lower()
-    if "like" in v:
-        return "Like New"
-    if v.startswith("good"):
-        return "Good"
-    if "fair" in v:
-        return "Fair"
-    return val.title()
-
-def parse_price(val):
-    if pd.isna(val):
-        return np.nan
-    s = re.sub(r"[^\d\.]", "", str(val))
-    try:
-        return float(s) if s != "" else np.nan
-    except:
-        return np.nan
-
-def parse_age(val):
-    if pd.isna(val):
-        return np.nan
-    try:
-        return int(float(val))
-    except:
-        m = re.search(r"(\d+)", str(val))
-        return int(m.group(1)) if m else np.nan
+def main_streaming(in_path, out_path, chunksize=100_000):
+    """
+    Same output as `main`, in two passes over `chunksize`-row blocks so memory
+    stays flat regardless of input size. Pass 1 sketches the price and age
+    distributions (medians for filling, IQR bounds for outliers); pass 2
+    cleans, fills, filters and appends each block to `out_path`.
+    Results are exact while a column has fewer than ~20k distinct values and
+    t-digest approximations beyond that.
+    """
+    price_sketch, age_sketch = QuantileSketch(), QuantileSketch()
+    price_missing = age_missing = rows_in = 0
+    for chunk in iter_table(in_path, chunksize, columns=["asking_price", "age_months"]):
+        chunk["asking_price"] = parse_price_series(chunk["asking_price"])
+        chunk["age_months"] = parse_age_series(chunk["age_months"])
+        rows_in += len(chunk)
+        price_missing += int(chunk["asking_price"].isna().sum())
+        age_missing += int(chunk["age_months"].isna().sum())
+        price_sketch.update(chunk["asking_price"].to_numpy(dtype=np.float64))
+        age_sketch.update(chunk["age_months"].to_numpy(dtype=np.float64))
+    print(f"Loaded {rows_in} rows from {in_path}")
 
-def category_normalize(cat):
-    if pd.isna(cat):
-        return "Other"
-    c = str(cat).strip().lower()
-    mapping = {
-        "mobile": "Mobile",
-        "laptop": "Laptop",
-        "furniture": "Furniture",
-        "electronics": "Electronics",
-        "camera": "Camera",
-        "fashion": "Fashion",
-    }
-    return mapping.get(c, cat.title())
-
-def remove_price_outliers(df, col="asking_price"):
-    q1 = df[col].quantile(0.25)
-    q3 = df[col].quantile(0.75)
+    price_median = price_sketch.median()
+    age_median = age_sketch.median()
+    # the IQR is taken after filling, so count the filled prices too
+    price_sketch.update([price_median], weight=price_missing)
+    q1, q3 = price_sketch.quantile(0.25), price_sketch.quantile(0.75)
     iqr = q3 - q1
     low, high = q1 - 1.5*iqr, q3 + 1.5*iqr
-    return df[(df[col] >= low) & (df[col] <= high)].reset_index(drop=True)
 
-def main(in_path, out_path):
-    df = load_csv(in_path)
-    df["asking_price"] = df["asking_price"].apply(parse_price)
-    df["age_months"] = df["age_months"].apply(parse_age)
-    df["condition"] = df["condition"].apply(normalize_condition)
-    df["category"] = df["category"].apply(category_normalize)
-
-    # Handle missing values
-    df["asking_price"] = df["asking_price"].fillna(df["asking_price"].median())
-    df["age_months"] = df["age_months"].fillna(df["age_months"].median())
+    by_category = {}
+    writer = TableWriter(out_path)
+    for chunk in iter_table(in_path, chunksize):
+        chunk = clean_columns(chunk)
+        chunk["asking_price"] = chunk["asking_price"].fillna(price_median)
+        chunk["age_months"] = chunk["age_months"].fillna(age_median)
+        if age_missing:
+            # a whole-file fillna would have made the column float everywhere
+            chunk["age_months"] = chunk["age_months"].astype(np.float64)
+        chunk = chunk[(chunk["asking_price"] >= low) & (chunk["asking_price"] <= high)]
 
-    # Remove outliers
-    df = remove_price_outliers(df, "asking_price")
-
-    # Save outputs
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_path, index=False)
+        writer.write(chunk)
+        for category, prices in chunk.groupby("category", observed=True)["asking_price"]:
+            by_category.setdefault(category, QuantileSketch()).update(prices.to_numpy(dtype=np.float64))
+    writer.close()
     print(f"Saved cleaned dataset → {out_path}")
 
     profile = {
-        "rows": len(df),
-        "median_price_by_category": df.groupby("category")["asking_price"].median().to_dict(),
+        "rows": writer.rows,
+        "median_price_by_category": {c: by_category[c].median() for c in sorted(by_category)},
     }
     with open("reports/data_profile.json", "w") as f:
         json.dump(profile, f, indent=2)
     print("Saved profile → reports/data_profile.json")
 
 if __name__ == "__main__":
-    main("data/products.csv", "data/cleaned_products.csv")
+    # python -m src.preprocess [--stream] [--chunksize N] [--in PATH] [--out PATH]
+    # paths ending in .parquet or .feather use the columnar formats (needs pyarrow)
+    def _opt(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+    in_path = _opt("--in", "data/products.csv")
+    out_path = _opt("--out", "data/cleaned_products.csv")
+    if "--stream" in sys.argv:
+        main_streaming(in_path, out_path, int(_opt("--chunksize", 100_000)))
+    else:
+        main(in_path, out_path)
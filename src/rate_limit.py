@@ -0,0 +1,157 @@
+# src/rate_limit.py
+"""
+Client-side pacing for rate-limited providers.
+
+- RateLimiter      token buckets for requests/min and tokens/min. `reserve()`
+                   takes capacity and returns how long the caller must wait,
+                   so blocking and async callers share one limiter and only
+                   sleep outside the lock.
+- backoff_delay    jittered exponential backoff that honors Retry-After
+- CircuitBreaker   fails fast after repeated failures, then lets one probe
+                   through per reset period until the provider recovers
+
+All of them are thread-safe and per process: with N worker processes, give
+each 1/N of the provider quota.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """`rate` tokens per minute, bursting up to `capacity` (default: one minute's worth)."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate / 60.0
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        # more than a full bucket can never be available at once; wait for a full one
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        # may go negative: later callers queue behind this reservation
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min buckets (0 disables either). A call reserves
+    one request plus its estimated tokens; `pause()` stops everyone until a
+    provider-given time, e.g. after a 429 with Retry-After.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.buckets = [(TokenBucket(rpm), False)] if rpm > 0 else []
+        if tpm > 0:
+            self.buckets.append((TokenBucket(tpm), True))
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0
+        self.rejected = 0
+
+    def reserve(self, tokens: float = 0, max_wait: float = None):
+        """
+        Seconds to wait before sending, with the capacity already taken; or
+        None (nothing taken) when that would exceed `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            for bucket, is_tokens in self.buckets:
+                bucket._refill(now)
+                wait = max(wait, bucket.wait_for(tokens if is_tokens else 1))
+            if max_wait is not None and wait > max_wait:
+                self.rejected += 1
+                return None
+            for bucket, is_tokens in self.buckets:
+                bucket.take(tokens if is_tokens else 1)
+            self.waited += wait
+            return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        return {"waited_s": round(self.waited, 3), "rejected": self.rejected}
+
+
+def parse_retry_after(value) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: float = None) -> float:
+    """
+    Sleep before retry number `attempt` (0-based): full jitter over
+    base * 2**attempt, capped at `cap`. A Retry-After from the provider is a
+    floor, with a little jitter on top so waiting clients do not return at once.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through; `failures` failures in a row open the circuit.
+    open: calls are refused until `reset_timeout` seconds have passed.
+    half-open: one probe goes through; success closes, failure reopens.
+    """
+
+    def __init__(self, failures: int = 5, reset_timeout: float = 30.0):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                # one probe per reset period, so a probe that never reports back
+                # (cancelled, rate limited) cannot wedge the breaker half-open
+                self.state = "half-open"
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.state == "half-open" or self.consecutive >= self.failures:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive, "opened": self.opened}
@@ -0,0 +1,180 @@
+# src/registry.py
+"""
+Lazy agent registry and agent specs.
+
+Agents pull in pandas and NumPy (and, through the LLM client, HTTP
+libraries), which dominates cold start. The API holds `agent(name)` proxies
+instead of importing the modules: each proxy imports its module on first
+attribute access, so a pod that only moderates chat never loads pandas.
+`warmup()` imports everything up front (the API lifespan runs it in the
+background by default, see AGENT_WARMUP).
+
+    price_agent = agent("price")          # nothing imported yet
+    price_agent.suggest_price(product)    # imports src.agents.price_agent
+
+Each agent also has an `AgentSpec` telling src/executor.py how to run it:
+its scalar and batch functions, its cost class (CPU or IO) and an optional
+cache key. `register(AgentSpec(...))` adds an agent; it then gets the
+generic /agents/{name} endpoints, batching, caching and metrics.
+
+Config (env):
+- AGENT_WARMUP  background (default): warm up after startup without delaying it;
+                startup: warm up before serving; off: load on first use only
+"""
+
+import os
+import time
+import logging
+import importlib
+
+logger = logging.getLogger("marketplace-agents")
+
+WARMUP = os.getenv("AGENT_WARMUP", "background").lower()
+
+AGENTS = {
+    "price": "src.agents.price_agent",
+    "fair_range": "src.agents.fair_range",
+    "fraud": "src.agents.fraud_agent",
+    "negotiation": "src.agents.negotiation_agent",
+    "negotiation_sim": "src.agents.negotiation_sim",
+    "moderation": "src.agents.moderation_agent",
+    "conversation_moderation": "src.agents.conversation_moderation",
+}
+
+
+class LazyAgent:
+    """Stands in for an agent module and imports it on first attribute access."""
+
+    def __init__(self, name: str, module: str):
+        self.name = name
+        self.module = module
+        self._loaded = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded is not None
+
+    def load(self):
+        # importlib's per-module locks make concurrent first uses safe
+        if self._loaded is None:
+            self._loaded = importlib.import_module(self.module)
+        return self._loaded
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<agent {self.name!r} ({self.module}, {state})>"
+
+
+_agents = {name: LazyAgent(name, module) for name, module in AGENTS.items()}
+
+def agent(name: str) -> LazyAgent:
+    try:
+        return _agents[name]
+    except KeyError:
+        raise KeyError(f"Unknown agent {name!r}; registered: {sorted(_agents)}") from None
+
+def loaded() -> list:
+    return sorted(name for name, a in _agents.items() if a.loaded)
+
+# --- specs ---
+CPU = "cpu"
+IO = "io"
+
+
+class AgentSpec:
+    """
+    How to run one agent. Functions are "module:function" paths, imported on
+    first use (and by name in pool workers):
+    - scalar(item) -> result; for IO agents usually a coroutine function
+    - batch(items, *batch_context()) -> results in the same order; optional,
+      without it a batch maps `scalar` over its items
+    - cache_key(item) -> hashable key, or None to skip the cache for that item
+    - cost: CPU batches are chunked across the process pool, IO work is
+      awaited on the event loop
+    """
+
+    def __init__(self, name: str, scalar: str, batch: str = None, cost: str = CPU,
+                 cache_key=None, batch_context=None, description: str = ""):
+        if cost not in (CPU, IO):
+            raise ValueError(f"cost must be {CPU!r} or {IO!r}")
+        self.name = name
+        self.scalar = scalar
+        self.batch = batch
+        self.cost = cost
+        self.cache_key = cache_key
+        self.batch_context = batch_context
+        self.description = description
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "cost": self.cost,
+            "batch": self.batch is not None,
+            "cached": self.cache_key is not None,
+            "description": self.description,
+        }
+
+
+def resolve(path: str):
+    """The function behind a "module:function" path (looked up on every call, so patches apply)."""
+    module, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+SPECS = {}
+
+def register(spec: AgentSpec) -> AgentSpec:
+    SPECS[spec.name] = spec
+    return spec
+
+def spec(name: str) -> AgentSpec:
+    try:
+        return SPECS[name]
+    except KeyError:
+        raise KeyError(f"Unknown agent {name!r}; registered: {sorted(SPECS)}") from None
+
+def _moderation_key(text):
+    # verdicts depend on the active rules as well as the text
+    if not isinstance(text, str):
+        return None
+    return agent("moderation").get_scanner().version, text
+
+def _moderation_context() -> tuple:
+    from src import moderation_pool, moderation_rules
+    # only pool workers need the rules shipped; in-process chunks use the active scanner
+    return (moderation_rules.current_rules() if moderation_pool.WORKERS > 0 else None,)
+
+register(AgentSpec(
+    "price", "src.agents.price_agent:suggest_price_async", batch="src.agents.price_agent:suggest_price_many",
+    cost=IO, description="Suggested price range for a product (LLM reason when USE_LLM=true).",
+))
+register(AgentSpec(
+    "moderation", "src.agents.moderation_agent:moderate_message", batch="src.moderation_pool:moderate_chunk",
+    cost=CPU, cache_key=_moderation_key, batch_context=_moderation_context,
+    description="Chat message moderation verdict.",
+))
+register(AgentSpec(
+    "fraud", "src.agents.fraud_agent:detect_fraud", batch="src.agents.fraud_agent:detect_fraud_many",
+    cost=CPU, description="Flags asking prices far outside the fair range.",
+))
+register(AgentSpec(
+    "negotiation", "src.agents.negotiation_agent:negotiate_price",
+    cost=CPU, description="Buyer/seller offers and agreed price.",
+))
+
+def warmup(names=None) -> dict:
+    """Import the given agents (default: all) and the LLM backend; returns ms per step."""
+    from src import llm_client
+
+    timings = {}
+    for name in names or _agents:
+        start = time.perf_counter()
+        agent(name).load()
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    start = time.perf_counter()
+    llm_client.backend()
+    timings["llm_backend"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Agents warmed up: %s", timings)
+    return timings
@@ -0,0 +1,71 @@
+# src/run_fraud_check.py
+"""
+Nightly fraud screen over a whole catalog.
+
+Streams the listings in `chunksize`-row blocks through `detect_fraud_batch`,
+so memory stays flat however large the catalog is. Only flagged rows are
+written out, plus per-category counts.
+
+    python -m src.run_fraud_check [--in data/cleaned_products.csv] [--out reports/fraud_flagged.csv]
+                                  [--summary reports/fraud_summary.csv] [--chunksize 1000000]
+
+Paths ending in .parquet or .feather use the columnar formats (needs pyarrow).
+"""
+
+import sys
+import pandas as pd
+
+from src.tables import iter_table, write_table, TableWriter
+from src.agents.fraud_agent import detect_fraud_batch, UNDER_FACTOR
+
+SUMMARY_COLUMNS = ["listings", "suspicious", "underpriced", "overpriced"]
+
+def screen_chunk(chunk: pd.DataFrame) -> tuple:
+    """(flagged rows with fraud columns, per-category counts) for one block."""
+    result = detect_fraud_batch(chunk)
+    flagged = (result["status"] == "Suspicious").to_numpy()
+    under = flagged & (result["asking_price"] < UNDER_FACTOR * result["suggested_min"]).to_numpy()
+
+    category = chunk["category"].astype(object).fillna("Other") if "category" in chunk else "Other"
+    counts = pd.DataFrame({
+        "category": category,
+        "listings": 1,
+        "suspicious": flagged.astype(int),
+        "underpriced": under.astype(int),
+        "overpriced": (flagged & ~under).astype(int),
+    }, index=chunk.index).groupby("category").sum()
+
+    rows = chunk[flagged].copy()
+    rows["fraud_type"] = pd.Series(under[flagged], index=rows.index).map({True: "underpriced", False: "overpriced"})
+    rows["reason"] = result["reason"][flagged]
+    rows["suggested_min"] = result["suggested_min"][flagged]
+    rows["suggested_max"] = result["suggested_max"][flagged]
+    return rows, counts
+
+def main(in_path, out_path, summary_path, chunksize=1_000_000) -> pd.DataFrame:
+    summary = pd.DataFrame(columns=SUMMARY_COLUMNS, dtype="int64")
+    with TableWriter(out_path) as writer:
+        for chunk in iter_table(in_path, chunksize):
+            rows, counts = screen_chunk(chunk)
+            writer.write(rows)
+            summary = summary.add(counts, fill_value=0)
+    summary = summary.astype("int64").sort_index()
+    summary.index.name = "category"
+    write_table(summary.reset_index(), summary_path)
+
+    totals = summary.sum()
+    print(f"Screened {totals['listings']} listings from {in_path}: {totals['suspicious']} flagged "
+          f"({totals['underpriced']} underpriced, {totals['overpriced']} overpriced)")
+    print(f"Saved flagged listings → {out_path}")
+    print(f"Saved per-category summary → {summary_path}")
+    return summary
+
+if __name__ == "__main__":
+    def _opt(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+    main(
+        _opt("--in", "data/cleaned_products.csv"),
+        _opt("--out", "reports/fraud_flagged.csv"),
+        _opt("--summary", "reports/fraud_summary.csv"),
+        int(_opt("--chunksize", 1_000_000)),
+    )
@@ -1,20 +1,23 @@
+import sys
 import pandas as pd
-from agents.price_agent import suggest_price
+from agents.price_agent import suggest_prices_batch
+from src.tables import read_table, write_table
+
+# python src/run_price_agent.py [in_path] [out_path]
+# .parquet / .feather paths skip CSV parsing (needs pyarrow)
+in_path = sys.argv[1] if len(sys.argv) > 1 else "data/cleaned_products.csv"
+out_path = sys.argv[2] if len(sys.argv) > 2 else "reports/price_suggestions.csv"
 
 # Load cleaned dataset
-df = pd.read_csv("data/cleaned_products.csv")
+df = read_table(in_path)
 
-results = []
-for _, row in df.iterrows():
-    product = row.to_dict()
-    suggestion = suggest_price(product)
-    result = {**product, **suggestion}
-    results.append(result)
+# Price every row in one vectorized pass
+suggestions = suggest_prices_batch(df)
+out_df = pd.concat([df, suggestions], axis=1)
 
 # Save results
-out_df = pd.DataFrame(results)
-out_df.to_csv("reports/price_suggestions.csv", index=False)
-print("✅ Saved price suggestions to reports/price_suggestions.csv")
+write_table(out_df, out_path)
+print(f"✅ Saved price suggestions to {out_path}")
 
 # Print first 5 rows as preview
 print(out_df.head())
@@ -1,13 +1,48 @@
 # src/save_report.py
+"""
+Price suggestion log (reports/price_suggestions.csv).
+
+`save_suggestion(product, result)` only appends the row to an in-memory
+ring buffer. A background thread writes buffered rows in batches once
+REPORT_FLUSH_ROWS are pending or REPORT_FLUSH_INTERVAL seconds have passed.
+Each batch is appended under an exclusive file lock, so several uvicorn
+workers can share the file, and the header is written only while the locked
+file is still empty. Pending rows are flushed at interpreter exit and on
+API shutdown.
+
+Config (env):
+- REPORT_FLUSH_ROWS      pending rows that trigger a flush (default 256)
+- REPORT_FLUSH_INTERVAL  max seconds a row waits in the buffer (default 1.0)
+- REPORT_BUFFER_MAX      ring buffer size; oldest rows are dropped past it (default 100000)
+- REPORT_BACKOFF_MAX     max seconds between retries while flushes keep failing (default 60)
+"""
+
 import csv, os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 OUT = "reports/price_suggestions.csv"
-os.makedirs("reports", exist_ok=True)
+HEADER = ["time","title","brand","age_months","asking_price","min","max","reason","llm_provider","llm_model"]
 
-def save_suggestion(product, result):
-    header = ["time","title","brand","age_months","asking_price","min","max","reason","llm_provider","llm_model"]
-    row = [
+FLUSH_ROWS = int(os.getenv("REPORT_FLUSH_ROWS", "256"))
+FLUSH_INTERVAL = float(os.getenv("REPORT_FLUSH_INTERVAL", "1.0"))
+BUFFER_MAX = int(os.getenv("REPORT_BUFFER_MAX", "100000"))
+BACKOFF_MAX = float(os.getenv("REPORT_BACKOFF_MAX", "60"))
+
+logger = logging.getLogger("marketplace-agents")
+
+def suggestion_row(product, result) -> list:
+    return [
         datetime.utcnow().isoformat(),
         product.get("title",""),
         product.get("brand",""),
@@ -15,13 +50,156 @@ def save_suggestion(product, result):
         product.get("asking_price",""),
         result.get("suggested_price_min",""),
         result.get("suggested_price_max",""),
-        result.get("reason","").replace("\n"," "),
+        (result.get("reason") or "").replace("\n"," "),
         result.get("llm_provider",""),
         result.get("llm_model",""),
     ]
-    write_header = not os.path.exists(OUT)
-    with open(OUT,"a",newline="",encoding="utf-8") as f:
-        w = csv.writer(f)
-        if write_header:
-            w.writerow(header)
-        w.writerow(row)
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class ReportSink:
+    """Buffered CSV appender with a background flush thread."""
+
+    def __init__(self, path=OUT, header=HEADER, flush_rows=FLUSH_ROWS,
+                 flush_interval=FLUSH_INTERVAL, buffer_max=BUFFER_MAX):
+        self.path = path
+        self.header = header
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+        self._rows = deque(maxlen=buffer_max)
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()   # one flush at a time per process
+        self._closed = False
+        self._written = self._dropped = self._flushes = self._failures = 0
+        self._thread = threading.Thread(target=self._run, name="report-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, row: list):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ReportSink is closed")
+            if len(self._rows) == self._rows.maxlen:
+                self._dropped += 1
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_rows:
+                self._cond.notify()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                if backoff:
+                    # after a failed flush, wait it out even if rows keep arriving
+                    deadline = time.monotonic() + backoff
+                    while not self._closed and deadline > time.monotonic():
+                        self._cond.wait(deadline - time.monotonic())
+                elif not self._closed and len(self._rows) < self.flush_rows:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception:
+                # rows stay buffered; retry later, less often while the error persists
+                backoff = min(max(2 * backoff, self.flush_interval), BACKOFF_MAX)
+                logger.exception("Could not write %s; retrying in %.1fs", self.path, backoff)
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """Write all buffered rows now; returns how many were written."""
+        with self._write_lock:
+            with self._cond:
+                rows = list(self._rows)
+                self._rows.clear()
+            if not rows:
+                return 0
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    _lock(f)
+                    try:
+                        f.seek(0, os.SEEK_END)
+                        w = csv.writer(f)
+                        if f.tell() == 0:
+                            w.writerow(self.header)
+                        w.writerows(rows)
+                        f.flush()
+                    finally:
+                        _unlock(f)
+            except Exception:
+                with self._cond:
+                    # put the rows back ahead of newer ones; past capacity the oldest go
+                    pending = rows + list(self._rows)
+                    overflow = max(0, len(pending) - self._rows.maxlen)
+                    self._dropped += overflow
+                    self._failures += 1
+                    self._rows.clear()
+                    self._rows.extend(pending[overflow:])
+                raise
+            with self._cond:
+                self._written += len(rows)
+                self._flushes += 1
+            return len(rows)
+
+    def close(self):
+        """Stop the background thread after a final flush."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._rows),
+                "written": self._written,
+                "dropped": self._dropped,
+                "flushes": self._flushes,
+                "failed_flushes": self._failures,
+            }
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_sink() -> ReportSink:
+    """Process-wide sink for OUT (a fresh one after fork)."""
+    global _sink
+    with _sink_lock:
+        if _sink is None or _sink.pid != os.getpid():
+            _sink = ReportSink(OUT)
+        return _sink
+
+def flush():
+    if _sink is not None and _sink.pid == os.getpid():
+        _sink.flush()
+
+def close():
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None and sink.pid == os.getpid():
+        sink.close()
+
+atexit.register(close)
+
+def save_suggestion(product, result):
+    get_sink().write(suggestion_row(product, result))
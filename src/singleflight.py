@@ -0,0 +1,104 @@
+# src/singleflight.py
+"""
+Request coalescing ("single-flight").
+
+Concurrent calls that share a key wait on the one call already in flight
+instead of repeating the work; its result (or exception) is handed to every
+waiter. Nothing is cached after the call finishes, see src/cache.py for that.
+"""
+
+import asyncio
+import threading
+
+class _Stats:
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+class SingleFlight(_Stats):
+    """Thread-based group for blocking callers."""
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}   # key -> [event, result, error]
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call[0].wait()
+        else:
+            try:
+                call[1] = fn()
+            except BaseException as e:
+                call[2] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call[0].set()
+
+        if call[2] is not None:
+            raise call[2]
+        return call[1]
+
+
+class AsyncSingleFlight(_Stats):
+    """
+    asyncio group; `fn` is a zero-argument callable returning an awaitable.
+    The shared call runs as its own task, so a cancelled caller (the first
+    one included) only stops waiting; the call is cancelled once nobody waits.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}   # key -> [task, waiters]
+
+    async def do(self, key, fn):
+        self.calls += 1
+        call = self._calls.get(key)
+        if call is not None and call[0].get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            call = self._calls[key] = [asyncio.ensure_future(fn()), 0]
+            call[0].add_done_callback(lambda task: self._finished(key, call))
+
+        call[1] += 1
+        try:
+            # shield so one cancelled waiter doesn't cancel the shared call
+            return await asyncio.shield(call[0])
+        except asyncio.CancelledError:
+            if call[1] == 1 and not call[0].done():
+                # forget it first, so a caller arriving while it winds down starts afresh
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call[0].cancel()
+            raise
+        finally:
+            call[1] -= 1
+
+    def _finished(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call[0].cancelled():
+            # mark retrieved so an unawaited failure doesn't warn
+            call[0].exception()
@@ -0,0 +1,117 @@
+# src/sketch.py
+"""
+Mergeable quantile sketch for streaming statistics.
+
+Values are kept as (value, weight) points. While the number of distinct
+values stays under `max_exact` the sketch is exact and `quantile`/`median`
+reproduce pandas' linear interpolation bit for bit. Past that it compresses
+into t-digest style centroids (k1 scale function), so memory stays bounded
+by roughly `compression` centroids no matter how many values were seen.
+Sketches built on different chunks can be merged.
+"""
+
+import numpy as np
+
+def _lerp(a: float, b: float, t: float) -> float:
+    # same formula numpy's quantile uses, for identical rounding
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+
+class QuantileSketch:
+    def __init__(self, compression: int = 200, max_exact: int = 20_000):
+        self.compression = compression
+        self.max_exact = max_exact
+        self.exact = True
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values, weight: float = 1.0):
+        """Add values (NaNs are skipped), each counted `weight` times."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0 or weight <= 0:
+            return self
+        self._absorb(values, np.full(len(values), float(weight)), exact=True)
+        return self
+
+    def merge(self, other: "QuantileSketch"):
+        if len(other.means):
+            self._absorb(other.means, other.weights, exact=other.exact)
+        return self
+
+    def _absorb(self, means, weights, exact: bool):
+        self.min = min(self.min, float(means.min()))
+        self.max = max(self.max, float(means.max()))
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        self.exact = self.exact and exact
+        if self.exact:
+            uniq, inverse = np.unique(means, return_inverse=True)
+            weights = np.bincount(inverse, weights=weights, minlength=len(uniq))
+            means = uniq
+            if len(means) > self.max_exact:
+                self.exact = False
+        if not self.exact:
+            means, weights = self._compress(means, weights)
+        self.means, self.weights = means, weights
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # bucket points by the k1 scale of their cumulative quantile: buckets
+        # are narrow in the tails and wide around the median
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)).astype(np.int64)
+        _, bucket = np.unique(k, return_inverse=True)
+        w = np.bincount(bucket, weights=weights)
+        m = np.bincount(bucket, weights=means * weights) / w
+        return m, w
+
+    def quantile(self, q: float) -> float:
+        if len(self.means) == 0:
+            return np.nan
+        if self.exact:
+            return self._exact_quantile(q)
+        return self._approx_quantile(q)
+
+    def median(self) -> float:
+        if len(self.means) == 0:
+            return np.nan
+        if not self.exact:
+            return self._approx_quantile(0.5)
+        n = self.count
+        if n % 2:
+            return self._at((n - 1) / 2)
+        return (self._at(n / 2 - 1) + self._at(n / 2)) / 2
+
+    def _at(self, rank: float) -> float:
+        # value of the rank-th (0-based) element of the expanded sorted data
+        cum = np.cumsum(self.weights)
+        return float(self.means[np.searchsorted(cum, rank, side="right")])
+
+    def _exact_quantile(self, q: float) -> float:
+        n = self.count
+        h = (n - 1) * q
+        if h >= n - 1:
+            return float(self.means[-1])
+        lo = np.floor(h)
+        return float(_lerp(self._at(lo), self._at(lo + 1), h - lo))
+
+    def _approx_quantile(self, q: float) -> float:
+        total = self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        target = q * total
+        xs = np.concatenate([[0.0], centers, [total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(target, xs, ys))
+
+    def __len__(self):
+        return len(self.means)
@@ -0,0 +1,206 @@
+# src/tables.py
+"""
+Read/write tables as CSV, Parquet or Arrow IPC (Feather), chosen by file
+extension, so the preprocess -> price agent -> report pipeline can skip CSV
+parsing.
+
+Columnar files keep typed columns, store the low-cardinality text columns as
+dictionary-encoded categoricals, and support column projection (`columns=`)
+and memory-mapped reads. They need `pyarrow`, which is optional: CSV paths
+work without it.
+"""
+
+from pathlib import Path
+import pandas as pd
+
+CSV, PARQUET, FEATHER = "csv", "parquet", "feather"
+SUFFIXES = {
+    ".csv": CSV,
+    ".parquet": PARQUET, ".pq": PARQUET,
+    ".feather": FEATHER, ".arrow": FEATHER, ".ipc": FEATHER,
+}
+# stored as categoricals in columnar files
+CATEGORICAL_COLUMNS = ("category", "brand", "condition", "location", "status", "model_provider")
+
+def table_format(path) -> str:
+    fmt = SUFFIXES.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported table format for {path!r}; use one of {sorted(SUFFIXES)}")
+    return fmt
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet/Feather tables need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def to_categoricals(df: pd.DataFrame, columns=CATEGORICAL_COLUMNS) -> pd.DataFrame:
+    """Convert the listed text columns that are present to `category` dtype."""
+    conv = {c: "category" for c in columns if c in df.columns and df[c].dtype == object}
+    return df.astype(conv) if conv else df
+
+def _from_arrow(table) -> pd.DataFrame:
+    # string dictionaries come back as pandas categoricals
+    return table.to_pandas()
+
+def read_table(path, columns=None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Load `path`, optionally only `columns`. Parquet and Feather files are
+    memory-mapped unless `memory_map=False`.
+    """
+    fmt = table_format(path)
+    if fmt == CSV:
+        return pd.read_csv(path, usecols=list(columns) if columns is not None else None)
+    _pyarrow()
+    if fmt == PARQUET:
+        import pyarrow.parquet as pq
+        return _from_arrow(pq.read_table(path, columns=columns, memory_map=memory_map))
+    import pyarrow.feather as feather
+    return _from_arrow(feather.read_table(path, columns=columns, memory_map=memory_map))
+
+def iter_table(path, chunksize: int, columns=None):
+    """Yield DataFrames of at most `chunksize` rows."""
+    fmt = table_format(path)
+    if fmt == CSV:
+        usecols = list(columns) if columns is not None else None
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+        return
+    _pyarrow()
+    if fmt == PARQUET:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield _from_arrow(batch)
+        return
+    import pyarrow.feather as feather
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    for start in range(0, table.num_rows, chunksize):
+        yield _from_arrow(table.slice(start, chunksize))
+
+def write_table(df: pd.DataFrame, path) -> None:
+    """Write `df` to `path` in the format its extension names."""
+    fmt = table_format(path)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if fmt == CSV:
+        df.to_csv(path, index=False)
+        return
+    _pyarrow()
+    df = to_categoricals(df)
+    if fmt == PARQUET:
+        df.to_parquet(path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(path)
+
+# rows TableWriter buffers while waiting for every column to show a non-null value
+SCHEMA_SAMPLE_ROWS = 65536
+
+class TableWriter:
+    """
+    Append DataFrames chunk by chunk to one CSV, Parquet or Feather file.
+
+    A columnar file needs one schema up front, so chunks are buffered until
+    every column has shown a non-null value (or SCHEMA_SAMPLE_ROWS rows have
+    arrived; columns still all null are then written as strings). A column
+    that is empty in the first chunks therefore does not pin the wrong type.
+    CATEGORICAL_COLUMNS are dictionary-encoded against one growing dictionary
+    per column, so each batch only adds new values (an IPC dictionary delta,
+    which Feather files accept).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = table_format(path)
+        self.rows = 0
+        self._started = False
+        self._writer = None
+        self._schema = None
+        self._pending = []
+        self._pending_rows = 0
+        self._dicts = {}   # column -> {value: code}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _types_known(self) -> bool:
+        columns = self._pending[0].columns
+        return all(any(df[c].notna().any() for df in self._pending if c in df.columns) for c in columns)
+
+    def _field(self, pa, name: str):
+        sample = next((df[name] for df in self._pending if name in df.columns and df[name].notna().any()), None)
+        if sample is None:
+            # no values yet: plain strings (an empty IPC dictionary could not grow later)
+            return pa.field(name, pa.string())
+        if name in CATEGORICAL_COLUMNS and (sample.dtype == object or isinstance(sample.dtype, pd.CategoricalDtype)):
+            return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+        return pa.field(name, pa.array(sample, from_pandas=True).type)
+
+    def _open(self):
+        pa = _pyarrow()
+        self._schema = pa.schema([self._field(pa, name) for name in self._pending[0].columns])
+        if self.format == PARQUET:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+
+    def _add_values(self, name: str, values: pd.Series) -> pd.Series:
+        # new values are appended to the column's cumulative dictionary
+        index = self._dicts.setdefault(name, {})
+        present = values.astype(object)[values.notna()].astype(str)
+        for value in pd.unique(present):
+            index.setdefault(value, len(index))
+        return present
+
+    def _encode(self, pa, name: str, values: pd.Series):
+        present = self._add_values(name, values)
+        index = self._dicts[name]
+        codes = pd.Series(pd.NA, index=values.index, dtype="Int32")
+        codes[present.index] = present.map(index).astype("Int32")
+        return pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(list(index), pa.string()))
+
+    def _to_arrow(self, df: pd.DataFrame):
+        pa = _pyarrow()
+        arrays = []
+        for field in self._schema:
+            if pa.types.is_dictionary(field.type):
+                arrays.append(self._encode(pa, field.name, df[field.name]))
+            else:
+                arrays.append(pa.array(df[field.name], from_pandas=True).cast(field.type))
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def _write_pending(self):
+        if self._writer is None:
+            self._open()
+            # seed the dictionaries from every buffered chunk, so no batch starts
+            # with an empty one (which the IPC writer treats as replaced later)
+            for field in self._schema:
+                if _pyarrow().types.is_dictionary(field.type):
+                    for df in self._pending:
+                        self._add_values(field.name, df[field.name])
+        for df in self._pending:
+            self._writer.write_table(self._to_arrow(df))
+        self._pending, self._pending_rows = [], 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.format == CSV:
+            df.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            _pyarrow()
+            self._pending.append(df.reset_index(drop=True))
+            self._pending_rows += len(df)
+            if self._writer is not None or self._pending_rows >= SCHEMA_SAMPLE_ROWS or self._types_known():
+                self._write_pending()
+        self._started = True
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._pending:
+            self._write_pending()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -7,3 +7,6 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SRC = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
+# agents import their siblings as `src.<module>`, so the project root is needed too
+if ROOT not in sys.path:
+    sys.path.insert(1, ROOT)
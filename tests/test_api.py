@@ -0,0 +1,66 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, moderation_pool
+from src.agents.moderation_agent import moderate_message
+
+HEADERS = {"x-api-key": api.API_KEY}
+MESSAGES = [
+    "Call me at 9876543210",
+    "You are an idiot",
+    "Click here http://spam.com for free money",
+    "Is this still available?",
+] * 5
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+@pytest.fixture(params=[0, 2], ids=["inline", "process-pool"])
+def workers(request, monkeypatch):
+    moderation_pool.shutdown()
+    monkeypatch.setattr(moderation_pool, "WORKERS", request.param)
+    yield request.param
+    moderation_pool.shutdown()
+
+def test_moderate_batch_requires_key(client):
+    r = client.post("/moderate-batch", json={"messages": ["hi"]})
+    assert r.status_code == 401
+
+def test_moderate_batch(client, workers):
+    r = client.post("/moderate-batch", json={"messages": MESSAGES, "chunk_size": 3}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == len(MESSAGES)
+    assert [res["status"] for res in body["results"]] == [moderate_message(m)["status"] for m in MESSAGES]
+
+def test_moderate_batch_stream(client, workers):
+    r = client.post("/moderate-batch", json={"messages": MESSAGES, "chunk_size": 7, "stream": True}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(MESSAGES)))
+    assert lines[1] == {"index": 1, **moderate_message(MESSAGES[1])}
+
+def test_moderate_batch_limit(client, monkeypatch):
+    monkeypatch.setattr(api, "MODERATION_BATCH_MAX", 2)
+    r = client.post("/moderate-batch", json={"messages": ["a", "b", "c"]}, headers=HEADERS)
+    assert r.status_code == 413
+
+def test_negotiate_awaits_llm(client, monkeypatch):
+    from src.agents import price_agent
+
+    async def fake_ask_async(prompt, *args, **kwargs):
+        return "  Fair for a 2 year old phone.  "
+
+    monkeypatch.setenv("USE_LLM", "true")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    monkeypatch.setattr("src.explanation_cache._cache", None)
+    monkeypatch.setattr(price_agent, "ask_async", fake_ask_async)
+    product = {"title": "iPhone 12", "category": "Mobile", "brand": "Apple",
+               "condition": "Good", "age_months": 24, "asking_price": 35000}
+    r = client.post("/negotiate", json=product, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["suggested_price_min"] == 22994
+    assert r.json()["reason"] == "Fair for a 2 year old phone."
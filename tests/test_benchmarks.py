@@ -0,0 +1,47 @@
+import importlib
+import pytest
+
+@pytest.fixture
+def suite(monkeypatch):
+    # the suite pins these at import; keep them from leaking into other tests
+    for name, value in (("LLM_PROVIDER", "stub"), ("LLM_CACHE_PATH", ""), ("MODERATION_WORKERS", "0")):
+        monkeypatch.setenv(name, value)
+    return importlib.import_module("benchmarks.suite")
+
+def _report(**results):
+    return {"meta": {}, "results": results}
+
+def test_compare_flags_slower_results(suite):
+    baseline = _report(**{
+        "micro/suggest_price": {"us_per_op": 5.0},
+        "load/POST /negotiate": {"rps": 1000.0, "p50_ms": 10.0, "p99_ms": 40.0, "errors": 0, "requests": 100},
+    })
+    same = _report(**{
+        "micro/suggest_price": {"us_per_op": 5.5},
+        "load/POST /negotiate": {"rps": 950.0, "p50_ms": 11.0, "p99_ms": 60.0, "errors": 0, "requests": 100},
+    })
+    assert suite.compare(same, baseline, tolerance=0.3) == []
+
+    worse = _report(**{
+        "micro/suggest_price": {"us_per_op": 7.0},
+        "load/POST /negotiate": {"rps": 600.0, "p50_ms": 10.0, "p99_ms": 40.0, "errors": 2, "requests": 100},
+        "micro/new_benchmark": {"us_per_op": 1.0},
+    })
+    regressions = suite.compare(worse, baseline, tolerance=0.3)
+    assert len(regressions) == 3
+    assert any("us_per_op 5.0 -> 7.0" in r for r in regressions)
+    assert any("rps 1000.0 -> 600.0" in r for r in regressions)
+    assert any("2 of 100 requests failed" in r for r in regressions)
+
+def test_message_corpus_has_a_realistic_label_mix(suite):
+    messages = suite.make_messages(2000)
+    statuses = [suite.moderate_message(m)["status"] for m in messages]
+    assert 0.6 < statuses.count("Safe") / len(statuses) < 0.85
+    assert {"PhoneDetected", "Spam", "Abusive", "Mixed"} <= set(statuses)
+
+def test_load_test_runs_every_endpoint_offline(suite):
+    results = suite.run_load(requests=20, concurrency=4)
+    assert len(results) == 6
+    for name, r in results.items():
+        assert r["errors"] == 0, name
+        assert r["rps"] > 0 and r["p99_ms"] >= r["p50_ms"]
@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api
+from src.cache import TTLCache
+from src.agents import conversation_moderation
+from src.agents.conversation_moderation import moderate_in_conversation
+
+HEADERS = {"x-api-key": api.API_KEY}
+
+@pytest.fixture(autouse=True)
+def fresh_tails(monkeypatch):
+    monkeypatch.setattr(conversation_moderation, "TAILS", TTLCache(maxsize=100, ttl=3600))
+
+def test_phone_split_across_messages_is_flagged():
+    assert moderate_in_conversation("c1", "call me on 98765")["status"] == "Safe"
+    res = moderate_in_conversation("c1", "43210")
+    assert res["status"] == "PhoneDetected"
+    assert "split across messages" in res["reason"]
+
+def test_url_split_across_messages_is_flagged():
+    moderate_in_conversation("c1", "visit cheapdeals")
+    res = moderate_in_conversation("c1", ".com for more")
+    assert "spam_link" in res["labels"]
+
+def test_conversations_are_independent():
+    moderate_in_conversation("c1", "98765")
+    assert moderate_in_conversation("c2", "43210")["status"] == "Safe"
+
+def test_match_inside_one_message_is_not_reported_twice():
+    first = moderate_in_conversation("c1", "call 9876543210")
+    assert first["labels"] == ["phone"]
+    second = moderate_in_conversation("c1", "thanks, see you")
+    assert second["status"] == "Safe"
+
+def test_tail_and_store_stay_bounded(monkeypatch):
+    monkeypatch.setattr(conversation_moderation, "TAILS", TTLCache(maxsize=2, ttl=3600))
+    for i in range(50):
+        moderate_in_conversation("c1", "hello there " * 20)
+    assert len(conversation_moderation.TAILS.get("c1")) == conversation_moderation.TAIL_CHARS
+    moderate_in_conversation("c2", "98765")
+    moderate_in_conversation("c3", "hi")
+    moderate_in_conversation("c4", "hi")
+    # c2 was evicted, so its half of the number is forgotten
+    assert moderate_in_conversation("c2", "43210")["status"] == "Safe"
+
+def test_moderate_endpoint_with_conversation_id():
+    client = TestClient(api.app)
+    client.post("/moderate", json={"message": "ring 98765", "conversation_id": "abc"}, headers=HEADERS)
+    r = client.post("/moderate", json={"message": "43210", "conversation_id": "abc"}, headers=HEADERS)
+    assert r.status_code == 200
+    assert r.json()["status"] == "PhoneDetected"
+    # without a conversation id the same message stays a single-message check
+    r = client.post("/moderate", json={"message": "43210"}, headers=HEADERS)
+    assert r.json()["status"] == "Safe"
+
+def test_sentence_end_and_start_are_not_a_split_link():
+    assert moderate_in_conversation("c1", "Sure, I can meet.")["status"] == "Safe"
+    assert moderate_in_conversation("c1", "In the evening works?")["status"] == "Safe"
+
+def test_numbers_in_two_sentences_are_not_a_split_phone():
+    assert moderate_in_conversation("c1", "Bought it in 2019 for 98000")["status"] == "Safe"
+    assert moderate_in_conversation("c1", "65432 was the MRP")["status"] == "Safe"
+
+def test_bare_number_before_a_sentence_is_still_a_split_phone():
+    moderate_in_conversation("c1", "98765")
+    assert moderate_in_conversation("c1", "43210 call after 6")["status"] == "PhoneDetected"
+
+def test_tails_keep_a_boundary_between_messages():
+    moderate_in_conversation("c1", "hello")
+    moderate_in_conversation("c1", "there")
+    assert conversation_moderation.TAILS.get("c1") == "\nhello\nthere"
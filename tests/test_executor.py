@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, executor, registry, moderation_pool
+from src.agents.fraud_agent import detect_fraud
+from src.agents.moderation_agent import moderate_message
+from src.agents.price_agent import suggest_price
+
+HEADERS = {"x-api-key": api.API_KEY}
+PRODUCTS = [
+    {"category": "Mobile", "brand": "Apple", "condition": "Good", "age_months": 6, "asking_price": 40000},
+    {"category": "Laptop", "brand": "Dell", "condition": "Like New", "age_months": 12, "asking_price": 500},
+    {"category": "Other", "asking_price": 1200.5},
+]
+MESSAGES = ["is this available?", "call me at 9876543210", "you idiot", "is this available?"]
+
+@pytest.fixture(autouse=True)
+def no_pool(monkeypatch):
+    monkeypatch.setattr(moderation_pool, "WORKERS", 0)
+    monkeypatch.setattr(executor, "_caches", {})
+
+def test_batches_match_scalar_calls():
+    assert asyncio.run(executor.run_batch("fraud", PRODUCTS, chunk_size=2)) == [detect_fraud(p) for p in PRODUCTS]
+    assert asyncio.run(executor.run_batch("moderation", MESSAGES)) == [moderate_message(m) for m in MESSAGES]
+    assert asyncio.run(executor.run_batch("price", PRODUCTS)) == [suggest_price(p) for p in PRODUCTS]
+
+def test_cached_agents_compute_each_text_once():
+    computed = executor.AGENT_ITEMS.value("moderation", "batch")
+    asyncio.run(executor.run_batch("moderation", MESSAGES))
+    assert executor.AGENT_ITEMS.value("moderation", "batch") == computed + 3   # the duplicate is computed once
+    before = executor.AGENT_ITEMS.value("moderation", "cache")
+    assert asyncio.run(executor.run("moderation", "you idiot")) == moderate_message("you idiot")
+    assert executor.AGENT_ITEMS.value("moderation", "cache") == before + 1
+    assert executor.get_cache("fraud") is None
+
+def test_cpu_batches_use_the_process_pool(monkeypatch):
+    monkeypatch.setattr(moderation_pool, "WORKERS", 2)
+    try:
+        results = asyncio.run(executor.run_batch("fraud", PRODUCTS * 4, chunk_size=3))
+        assert moderation_pool._pool is not None
+    finally:
+        moderation_pool.shutdown()
+    assert results == [detect_fraud(p) for p in PRODUCTS * 4]
+
+def double(x):
+    return 2 * x
+
+async def slow_echo(x):
+    await asyncio.sleep(0.05)
+    return x
+
+def test_registered_agents_get_batching_for_free():
+    registry.register(registry.AgentSpec("double", f"{__name__}:double", cache_key=lambda x: x))
+    registry.register(registry.AgentSpec("echo", f"{__name__}:slow_echo", cost=registry.IO))
+    try:
+        assert asyncio.run(executor.run_batch("double", [1, 2, 1])) == [2, 4, 2]
+        assert asyncio.run(executor.run("double", 5)) == 10
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await executor.run_batch("echo", list(range(20)))
+            return results, loop.time() - start
+        results, elapsed = asyncio.run(timed())
+        assert results == list(range(20))
+        assert elapsed < 0.5    # IO calls overlap instead of running one after another
+    finally:
+        registry.SPECS.pop("double")
+        registry.SPECS.pop("echo")
+
+def test_agent_endpoints():
+    with TestClient(api.app) as client:
+        names = [a["name"] for a in client.get("/agents", headers=HEADERS).json()]
+        assert {"price", "moderation", "fraud", "negotiation"} <= set(names)
+
+        res = client.post("/agents/fraud", json={"input": PRODUCTS[0]}, headers=HEADERS)
+        assert res.status_code == 200
+        assert res.json() == {"agent": "fraud", "result": detect_fraud(PRODUCTS[0])}
+
+        res = client.post("/agents/moderation/batch", json={"inputs": MESSAGES, "chunk_size": 2}, headers=HEADERS)
+        assert res.json()["count"] == 4
+        assert res.json()["results"] == [moderate_message(m) for m in MESSAGES]
+
+        assert client.post("/agents/nope", json={"input": 1}, headers=HEADERS).status_code == 404
+        assert client.post("/agents/fraud", json={"input": "not a product"}, headers=HEADERS).status_code == 422
+        assert client.post("/agents/fraud/batch", json={"inputs": []}).status_code == 401
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(api, "AGENT_BATCH_MAX", 2)
+    with TestClient(api.app) as client:
+        res = client.post("/agents/moderation/batch", json={"inputs": MESSAGES}, headers=HEADERS)
+        assert res.status_code == 413
@@ -0,0 +1,61 @@
+import pytest
+
+from src import explanation_cache as ec
+from src.agents import price_agent
+
+PRODUCT = {"title": "iPhone 12", "category": "Mobile", "brand": "Apple",
+           "condition": "Good", "age_months": 24, "asking_price": 35000}
+
+def test_key_normalizes_product_fields():
+    a = ec.explanation_key("groq", "m", PRODUCT, 1, 2)
+    b = ec.explanation_key("groq", "m", {**PRODUCT, "title": " IPHONE 12 ", "asking_price": 35000.0, "location": None}, 1, 2)
+    assert a == b
+    assert a != ec.explanation_key("groq", "other-model", PRODUCT, 1, 2)
+    assert a != ec.explanation_key("groq", "m", PRODUCT, 1, 3)
+
+def test_survives_restart(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    ec.ExplanationCache(path).put("k", "cached reason")
+    reopened = ec.ExplanationCache(path)
+    assert reopened.get("k") == "cached reason"
+    assert reopened.hits == 1
+
+def test_ttl_and_size_bound(tmp_path, monkeypatch):
+    cache = ec.ExplanationCache(tmp_path / "cache.sqlite", ttl=60, max_entries=3)
+    clock = [1000.0]
+    monkeypatch.setattr(ec.time, "time", lambda: clock[0])
+    for i in range(5):
+        clock[0] += 1
+        cache.put(f"k{i}", str(i))
+    cache.get("k0")          # k0 becomes most recently used
+    cache.prune()
+    assert cache.get("k1") is None and cache.get("k0") == "0" and cache.get("k4") == "4"
+    clock[0] += 120
+    assert cache.get("k4") is None
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    state = {"reply": "A fair range.", "calls": []}
+
+    def fake_ask(prompt, *args, **kwargs):
+        state["calls"].append(prompt)
+        return state["reply"]
+
+    monkeypatch.setenv("USE_LLM", "true")
+    monkeypatch.setattr(price_agent, "ask", fake_ask)
+    monkeypatch.setattr(ec, "_cache", ec.ExplanationCache(tmp_path / "cache.sqlite"))
+    return state
+
+def test_price_agent_reuses_explanations(llm):
+    first = price_agent.suggest_price(PRODUCT)
+    second = price_agent.suggest_price(dict(PRODUCT))
+    assert first["reason"] == second["reason"] == "A fair range."
+    assert len(llm["calls"]) == 1
+
+def test_provider_errors_are_not_cached(llm):
+    llm["reply"] = "Groq API error 429: slow down"
+    first = price_agent.suggest_price(PRODUCT)
+    price_agent.suggest_price(PRODUCT)
+    assert len(llm["calls"]) == 2
+    # users get the rule-based reason, never the provider error
+    assert first["reason"] == price_agent.rule_suggestion(PRODUCT)["reason"]
@@ -0,0 +1,82 @@
+import json
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, explanations, moderation_pool
+from src.agents import price_agent
+
+HEADERS = {"x-api-key": api.API_KEY}
+PRODUCT = {"title": "iPhone 12", "category": "Mobile", "brand": "Apple",
+           "condition": "Good", "age_months": 24, "asking_price": 35000}
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(moderation_pool, "WORKERS", 0)
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    monkeypatch.setattr("src.explanation_cache._cache", None)
+    monkeypatch.setattr(explanations, "_jobs", type(explanations._jobs)())
+    with TestClient(api.app) as c:
+        yield c
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    async def fake_ask_async(prompt, *args, **kwargs):
+        await asyncio.sleep(0.1)
+        return "Fair for its age."
+
+    monkeypatch.setenv("USE_LLM", "true")
+    monkeypatch.setattr(price_agent, "ask_async", fake_ask_async)
+
+def test_deferred_returns_rule_range_then_streams_reason(client, slow_llm):
+    r = client.post("/negotiate?defer_explanation=true", json=PRODUCT, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["suggested_price_min"] == 22994
+    assert body["reason"].startswith("Suggested based on asking price")
+    eid = body["explanation_id"]
+
+    assert client.get(f"/explanations/{eid}", headers=HEADERS).json()["status"] == "pending"
+
+    stream = client.get(f"/explanations/{eid}/stream", headers=HEADERS)
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    event = stream.text.strip().splitlines()
+    assert event[-2] == "event: explanation"
+    assert json.loads(event[-1][len("data: "):])["reason"] == "Fair for its age."
+
+    done = client.get(f"/explanations/{eid}", headers=HEADERS).json()
+    assert done == {"id": eid, "status": "done", "reason": "Fair for its age.",
+                    "llm_provider": done["llm_provider"], "llm_model": done["llm_model"]}
+
+    # a repeat request is answered from the finished job
+    again = client.post("/negotiate?defer_explanation=true", json=PRODUCT, headers=HEADERS).json()
+    assert again["explanation_id"] == eid and again["reason"] == "Fair for its age."
+
+def test_provider_failures_mark_the_job_failed_and_retry(client, monkeypatch):
+    replies = ["Groq request failed: circuit open, provider degraded", "Fair for its age."]
+
+    async def flaky_ask_async(prompt, *args, **kwargs):
+        return replies.pop(0)
+
+    monkeypatch.setenv("USE_LLM", "true")
+    monkeypatch.setattr(price_agent, "ask_async", flaky_ask_async)
+    first = client.post("/negotiate?defer_explanation=true", json=PRODUCT, headers=HEADERS).json()
+    eid = first["explanation_id"]
+    stream = client.get(f"/explanations/{eid}/stream", headers=HEADERS).text.strip().splitlines()
+    failed = json.loads(stream[-1][len("data: "):])
+    assert failed["status"] == "failed" and failed["reason"] == first["reason"]
+
+    # the next request queues a new attempt instead of reusing the fallback
+    again = client.post("/negotiate?defer_explanation=true", json=PRODUCT, headers=HEADERS).json()
+    assert again["explanation_id"] == eid
+    client.get(f"/explanations/{eid}/stream", headers=HEADERS)
+    assert client.get(f"/explanations/{eid}", headers=HEADERS).json()["reason"] == "Fair for its age."
+    assert replies == []
+
+def test_deferred_without_llm_has_no_job(client, monkeypatch):
+    monkeypatch.setenv("USE_LLM", "false")
+    body = client.post("/negotiate?defer_explanation=true", json=PRODUCT, headers=HEADERS).json()
+    assert body["explanation_id"] is None
+
+def test_unknown_explanation(client):
+    assert client.get("/explanations/nope", headers=HEADERS).status_code == 404
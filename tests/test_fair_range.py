@@ -0,0 +1,69 @@
+from src.cache import TTLCache
+from src.agents import fair_range as fr
+from src.agents.fraud_agent import detect_fraud
+from src.agents.negotiation_agent import negotiate_price
+from src.agents.price_agent import suggest_price
+
+IPHONE = {"category": "Mobile", "brand": "Apple", "condition": "Good", "age_months": 24}
+
+def test_matches_suggest_price_on_baseline():
+    expected = suggest_price({**IPHONE, "asking_price": fr.BASELINES["Mobile"]})
+    assert fr.fair_range(IPHONE) == (expected["suggested_price_min"], expected["suggested_price_max"])
+
+def test_shared_between_agents_and_ignores_asking_price(monkeypatch):
+    cache = TTLCache(maxsize=8)
+    monkeypatch.setattr(fr, "FAIR_RANGE_CACHE", cache)
+    detect_fraud({**IPHONE, "asking_price": 2000})
+    negotiate_price({**IPHONE, "asking_price": 40000})
+    detect_fraud({**IPHONE, "brand": "APPLE", "asking_price": 100})
+    assert (cache.misses, cache.hits) == (1, 2)
+
+def test_cache_eviction_and_ttl(monkeypatch):
+    cache = TTLCache(maxsize=2, ttl=10)
+    for k in "abc":
+        cache.put(k, k)
+    assert cache.get("a") is None and cache.evictions == 1
+    clock = [100.0]
+    monkeypatch.setattr("src.cache.time.monotonic", lambda: clock[0])
+    cache.put("d", 1)
+    clock[0] += 11
+    assert cache.get("d") is None and cache.expirations == 1
+
+def _catalog():
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    n = 4000
+    return pd.DataFrame({
+        "category": rng.choice(["Mobile", "Laptop"], n),
+        "brand": rng.choice(["Apple", "APPLE", "Dell", "Rare"], n, p=[0.4, 0.1, 0.498, 0.002]),
+        "condition": rng.choice(["Good", "Fair"], n),
+        "age_months": rng.integers(0, 60, n).astype(float),
+        "asking_price": rng.uniform(1000, 90000, n).round(),
+    })
+
+def test_fitted_model_lookup_and_fallback(tmp_path, monkeypatch):
+    import numpy as np
+    from src.fit_fair_range import fit
+
+    df = _catalog()
+    model = fit(df, min_count=20)
+    model.save(str(tmp_path / "m.npz"))
+    loaded = fr.FairRangeModel.load(str(tmp_path / "m.npz"))
+    assert loaded.ranges == model.ranges
+
+    group = df[(df.category == "Mobile") & (df.brand.str.lower() == "apple")
+               & (df.condition == "Good") & (df.age_months // 12 == 2)]["asking_price"]
+    expected = (int(np.quantile(group, 0.25)), int(np.quantile(group, 0.75)))
+    assert loaded.lookup("Mobile", "apple", "Good", 30) == expected
+    # too few "Rare" listings: falls back to (category, condition, age bucket)
+    rest = df[(df.category == "Mobile") & (df.condition == "Good") & (df.age_months // 12 == 2)]["asking_price"]
+    assert loaded.lookup("Mobile", "rare", "Good", 30) == (int(np.quantile(rest, 0.25)), int(np.quantile(rest, 0.75)))
+    assert loaded.lookup("Toys", "lego", "Good", 30) is None
+
+    monkeypatch.setenv("FAIR_RANGE_MODEL", str(tmp_path / "m.npz"))
+    monkeypatch.setattr(fr, "FAIR_RANGE_CACHE", TTLCache(maxsize=8))
+    assert fr.fair_range({**IPHONE, "age_months": 30}) == expected
+    # no fitted group: the baseline rule still answers
+    toys = {"category": "Toys", "brand": "Lego", "condition": "Good", "age_months": 3}
+    assert fr.fair_range(toys) == fr.rule_range(float(fr.DEFAULT_BASELINE), 3, "Good", "Toys", "lego")
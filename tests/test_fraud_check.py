@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from src.cache import TTLCache
+from src.agents import fair_range as fr
+from src.agents.fraud_agent import detect_fraud, detect_fraud_batch
+from src import run_fraud_check
+
+def _catalog(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": range(n),
+        "category": rng.choice(np.array(["Mobile", "Laptop", "Toys", None], dtype=object), n),
+        "brand": rng.choice(["Apple", "Dell", "Ikea"], n),
+        "condition": rng.choice(np.array(["Good", "Fair", "Like New", None], dtype=object), n),
+        "age_months": rng.integers(0, 120, n),
+        "asking_price": rng.choice([500.0, 9000.0, 25000.0, 150000.0], n),
+    })
+    df.loc[::17, "asking_price"] = np.nan
+    return df
+
+def test_batch_matches_scalar(monkeypatch):
+    monkeypatch.setattr(fr, "FAIR_RANGE_CACHE", TTLCache(maxsize=100_000))
+    df = _catalog()
+    expected = pd.DataFrame([detect_fraud(r) for r in df.to_dict("records")], index=df.index)
+    got = detect_fraud_batch(df)
+    assert got.equals(expected)
+    assert {"Safe", "Suspicious"} == set(got["status"])
+
+def test_runner_writes_flagged_rows_and_summary(tmp_path):
+    df = _catalog()
+    df.to_csv(tmp_path / "catalog.csv", index=False)
+    out, summary_path = tmp_path / "flagged.csv", tmp_path / "summary.csv"
+    summary = run_fraud_check.main(str(tmp_path / "catalog.csv"), str(out), str(summary_path), chunksize=700)
+
+    flagged = pd.read_csv(out)
+    expected = detect_fraud_batch(pd.read_csv(tmp_path / "catalog.csv"))
+    assert flagged["id"].tolist() == df["id"][expected["status"] == "Suspicious"].tolist()
+    assert set(flagged["fraud_type"]) == {"underpriced", "overpriced"}
+
+    assert summary["listings"].sum() == len(df)
+    assert summary["suspicious"].sum() == len(flagged)
+    assert (summary["underpriced"] + summary["overpriced"]).equals(summary["suspicious"])
+    assert pd.read_csv(summary_path).set_index("category")["suspicious"].to_dict() == summary["suspicious"].to_dict()
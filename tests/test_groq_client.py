@@ -0,0 +1,200 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src import groq_client
+from src.rate_limit import RateLimiter, CircuitBreaker
+
+
+class StubLLM(BaseHTTPRequestHandler):
+    """Minimal OpenAI-style /chat/completions stub."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.calls += 1
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            status, extra_headers, payload = server.respond(body)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            for k, v in extra_headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def _echo(body):
+    prompt = body["messages"][0]["content"]
+    return 200, {}, {"choices": [{"message": {"content": f"echo: {prompt}"}}]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_protection(monkeypatch):
+    monkeypatch.setattr(groq_client, "LIMITER", RateLimiter())
+    monkeypatch.setattr(groq_client, "BREAKER", CircuitBreaker(failures=3, reset_timeout=0.2))
+    monkeypatch.setattr(groq_client, "BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(groq_client, "MAX_RETRIES", 2)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLM)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.calls = server.in_flight = server.max_in_flight = 0
+    server.connections = set()
+    server.delay = 0.0
+    server.respond = _echo
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(groq_client, "GROQ_KEY", "test-key")
+    monkeypatch.setattr(groq_client, "BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_ask(stub_llm):
+    assert groq_client.ask("hi") == "echo: hi"
+
+
+def test_async_ask_reuses_connections(stub_llm):
+    async def run():
+        out = [await groq_client.ask_async(f"q{i}") for i in range(5)]
+        await groq_client.aclose()
+        return out
+    assert asyncio.run(run()) == [f"echo: q{i}" for i in range(5)]
+    assert stub_llm.calls == 5
+    assert len(stub_llm.connections) == 1
+
+
+def test_async_concurrency_cap(stub_llm, monkeypatch):
+    monkeypatch.setattr(groq_client, "MAX_CONCURRENCY", 3)
+    stub_llm.delay = 0.05
+
+    async def run():
+        out = await asyncio.gather(*(groq_client.ask_async("x") for _ in range(10)))
+        await groq_client.aclose()
+        return out
+    assert asyncio.run(run()) == ["echo: x"] * 10
+    assert stub_llm.max_in_flight <= 3
+
+
+def test_async_deadline(stub_llm):
+    stub_llm.delay = 0.5
+
+    async def run():
+        out = await groq_client.ask_async("slow", timeout=0.05)
+        await groq_client.aclose()
+        return out
+    assert "deadline" in asyncio.run(run())
+
+
+def test_async_error_status(stub_llm):
+    stub_llm.respond = lambda body: (500, {}, {"error": "boom"})
+
+    async def run():
+        out = await groq_client.ask_async("x")
+        await groq_client.aclose()
+        return out
+    assert asyncio.run(run()).startswith("Groq API error 500")
+    assert stub_llm.calls == 3   # first try plus MAX_RETRIES
+
+
+def _throttle_first(n, retry_after="0.2"):
+    """Answer 429 with Retry-After to the first n calls, then echo."""
+    seen = []
+
+    def respond(body):
+        seen.append(time.monotonic())
+        if len(seen) <= n:
+            return 429, {"Retry-After": retry_after}, {"error": "rate limited"}
+        return _echo(body)
+    return respond, seen
+
+
+def test_429_is_retried_after_retry_after(stub_llm):
+    stub_llm.respond, seen = _throttle_first(1)
+    assert groq_client.ask("hi") == "echo: hi"
+    assert len(seen) == 2 and seen[1] - seen[0] >= 0.2
+
+
+def test_429_pauses_concurrent_async_callers(stub_llm):
+    stub_llm.respond, seen = _throttle_first(1)
+
+    async def run():
+        first = asyncio.ensure_future(groq_client.ask_async("a"))
+        await asyncio.sleep(0.05)   # the 429 has arrived; this one must wait it out
+        out = [await first, await groq_client.ask_async("b")]
+        await groq_client.aclose()
+        return out
+    assert asyncio.run(run()) == ["echo: a", "echo: b"]
+    assert seen[-1] - seen[0] >= 0.2
+
+
+def test_long_retry_after_is_not_waited_out(stub_llm, monkeypatch):
+    monkeypatch.setattr(groq_client, "MAX_QUEUE_WAIT", 1.0)
+    stub_llm.respond, _ = _throttle_first(10, retry_after="60")
+    start = time.monotonic()
+    assert groq_client.ask("hi").startswith("Groq API error 429")
+    assert time.monotonic() - start < 1 and stub_llm.calls == 1
+
+
+def test_requests_are_paced_by_the_bucket(stub_llm, monkeypatch):
+    monkeypatch.setattr(groq_client, "LIMITER", RateLimiter(rpm=1200))   # 20/s after a burst of 1200
+    groq_client.LIMITER.buckets[0][0].capacity = groq_client.LIMITER.buckets[0][0].tokens = 2
+    start = time.monotonic()
+    assert [groq_client.ask(f"q{i}") for i in range(6)] == [f"echo: q{i}" for i in range(6)]
+    assert time.monotonic() - start >= 0.18   # 4 calls over the burst at 50 ms each
+
+    monkeypatch.setattr(groq_client, "LIMITER", RateLimiter(rpm=1))
+    monkeypatch.setattr(groq_client, "MAX_QUEUE_WAIT", 1.0)
+    assert groq_client.ask("first") == "echo: first"
+    assert groq_client.ask("one too many").startswith("Groq request failed: rate limited")
+    assert stub_llm.calls == 7
+
+
+def test_circuit_opens_on_a_degraded_provider(stub_llm):
+    stub_llm.respond = lambda body: (503, {}, {"error": "overloaded"})
+    for _ in range(3):
+        assert groq_client.ask("x").startswith("Groq API error 503")
+    calls = stub_llm.calls
+    start = time.monotonic()
+    assert groq_client.ask("x") == groq_client.CIRCUIT_OPEN
+    assert time.monotonic() - start < 0.01 and stub_llm.calls == calls
+
+    # after the reset timeout one probe goes through and closes the circuit
+    stub_llm.respond = _echo
+    time.sleep(0.25)
+    assert groq_client.ask("back") == "echo: back"
+    assert groq_client.BREAKER.state == "closed"
+
+
+def test_slow_provider_trips_the_circuit_async(stub_llm):
+    stub_llm.delay = 0.3
+
+    async def run():
+        out = [await groq_client.ask_async("slow", timeout=0.05) for _ in range(4)]
+        await groq_client.aclose()
+        return out
+    out = asyncio.run(run())
+    assert all("deadline" in text for text in out[:3])
+    assert out[3] == groq_client.CIRCUIT_OPEN
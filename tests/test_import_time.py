@@ -0,0 +1,40 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# must stay out of `import src.api`; agents and LLM backends load on first use
+HEAVY = ("pandas", "numpy", "requests", "src.groq_client", "src.preprocess", "src.agents.price_agent")
+# our own modules' share of `import src.api` (self time, excluding fastapi etc.)
+OWN_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_OWN_MS", "100"))
+TOTAL_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_TOTAL_MS", "1000"))
+
+def importtime(module: str) -> dict:
+    """name -> (self us, cumulative us) from `python -X importtime`."""
+    env = {**os.environ, "PYTHONPATH": ROOT, "AGENT_WARMUP": "off"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            out[name.strip()] = (int(own), int(cumulative))
+    return out
+
+def test_api_import_skips_heavy_modules():
+    loaded = importtime("src.api")
+    assert "src.api" in loaded
+    assert [name for name in HEAVY if name in loaded] == []
+
+def test_api_import_time_budget():
+    # best of three runs to ride out machine noise
+    runs = [importtime("src.api") for _ in range(3)]
+    own = min(sum(t[0] for name, t in r.items() if name.split(".")[0] == "src") for r in runs) / 1000
+    total = min(r["src.api"][1] for r in runs) / 1000
+    assert own < OWN_BUDGET_MS, f"src.* modules take {own:.0f} ms to import (budget {OWN_BUDGET_MS:.0f} ms)"
+    assert total < TOTAL_BUDGET_MS, f"import src.api takes {total:.0f} ms (budget {TOTAL_BUDGET_MS:.0f} ms)"
@@ -0,0 +1,84 @@
+import time
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, listing_analysis
+from src.listing_analysis import Node, run_graph
+from src.agents import fair_range
+from src.agents.fraud_agent import detect_fraud
+from src.agents.moderation_agent import moderate_message
+from src.agents.negotiation_agent import negotiate_price
+from src.agents.price_agent import suggest_price
+
+HEADERS = {"x-api-key": api.API_KEY}
+PRODUCT = {"title": "iPhone 12, call 9876543210", "category": "Mobile", "brand": "Apple",
+           "condition": "Good", "age_months": 6, "asking_price": 40000}
+
+def test_matches_the_separate_agents():
+    out = asyncio.run(listing_analysis.analyze_listing(PRODUCT, "Mint condition, no scratches"))
+    assert out["price"] == suggest_price(PRODUCT)
+    assert out["fraud"] == detect_fraud(PRODUCT)
+    assert out["negotiation"] == negotiate_price(PRODUCT)
+    assert out["moderation"] == {
+        "title": moderate_message(PRODUCT["title"]),
+        "description": moderate_message("Mint condition, no scratches"),
+    }
+    assert set(out["latency_ms"]) == {"fair_range", "fraud", "negotiation", "price",
+                                      "moderation.title", "moderation.description", "total"}
+
+def test_fair_range_is_computed_once(monkeypatch):
+    calls = []
+    real = fair_range.fair_range
+    monkeypatch.setattr(fair_range, "fair_range", lambda p: calls.append(p) or real(p))
+    out = asyncio.run(listing_analysis.analyze_listing({**PRODUCT, "title": None}))
+    assert len(calls) == 1
+    assert out["moderation"] == {}
+    assert (out["fair_range"]["min"], out["fair_range"]["max"]) == real(PRODUCT)
+
+def test_independent_nodes_overlap():
+    async def sleep(value):
+        await asyncio.sleep(0.1)
+        return value
+
+    nodes = {
+        "a": Node(lambda: sleep(1)),
+        "b": Node(lambda: time.sleep(0.1) or 2, thread=True),
+        "sum": Node(lambda a, b: a + b, deps=("a", "b")),
+    }
+    start = time.perf_counter()
+    results, timings = asyncio.run(run_graph(nodes))
+    assert results == {"a": 1, "b": 2, "sum": 3}
+    assert time.perf_counter() - start < 0.19
+    assert timings["a"] >= 100 and timings["sum"] < 50
+
+def test_failures_cancel_the_rest():
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.5)
+        finished.append("slow")
+
+    def fail():
+        raise ValueError("boom")
+
+    async def main():
+        with pytest.raises(ValueError, match="boom"):
+            await run_graph({"slow": Node(slow), "fail": Node(fail)})
+        await asyncio.sleep(0.6)
+
+    asyncio.run(main())
+    assert finished == []
+    with pytest.raises(ValueError, match="unknown nodes"):
+        asyncio.run(run_graph({"a": Node(lambda x: x, deps=("missing",))}))
+
+def test_analyze_listing_endpoint():
+    with TestClient(api.app) as client:
+        res = client.post("/analyze-listing", json={**PRODUCT, "description": "you idiot"}, headers=HEADERS)
+        assert res.status_code == 200
+        body = res.json()
+        assert body["moderation"]["title"]["status"] == "PhoneDetected"
+        assert body["moderation"]["description"]["status"] == "Abusive"
+        assert body["fraud"]["status"] == "Safe"
+        assert body["latency_ms"]["total"] > 0
+        assert client.post("/analyze-listing", json=PRODUCT).status_code == 401
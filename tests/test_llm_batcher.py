@@ -0,0 +1,53 @@
+import re
+import json
+import pandas as pd
+
+from src import llm_batcher
+from src.llm_batcher import ExplanationBatcher, parse_packed
+from src.agents import price_agent
+
+def packed_ask(prompt, model=None, max_tokens=200):
+    ids = [int(i) for i in re.findall(r"^(\d+)\. Product details", prompt, flags=re.M)]
+    answers = [{"id": i, "reason": f"reason {i}"} for i in reversed(ids) if i != 1]
+    return "Sure! " + json.dumps(answers)
+
+def test_packed_demultiplexes_and_falls_back():
+    prompts = []
+    with ExplanationBatcher(ask_fn=lambda p, **kw: prompts.append(p) or packed_ask(p),
+                            mode="packed", max_items=3, window=0.5) as batcher:
+        futures = [batcher.submit({"title": f"p{i}"}, 1, 2) for i in range(6)]
+    assert [f.result() for f in futures] == ["reason 0", None, "reason 2"] * 2
+    assert len(prompts) == 2
+    assert batcher.stats() == {"batches": 2, "items": 6, "failed_items": 2}
+
+def test_concurrent_mode_skips_provider_errors():
+    replies = iter(["Looks fair.", "Groq API error 429: rate limited", "Also fair."])
+
+    def ask(prompt, **kw):
+        return next(replies)   # max_concurrency=1 keeps calls in order
+
+    with ExplanationBatcher(ask_fn=ask, mode="concurrent", max_concurrency=1, window=0.01) as batcher:
+        futures = [batcher.submit({"title": "x"}, 1, 2) for _ in range(3)]
+    assert [f.result() for f in futures] == ["Looks fair.", None, "Also fair."]
+
+def test_parse_packed_rejects_garbage():
+    assert parse_packed("no json here", 2) == [None, None]
+    assert parse_packed('[{"id": "1", "reason": " ok "}, {"id": 9, "reason": "x"}]', 2) == [None, "ok"]
+
+def test_batch_pricing_uses_packed_calls(monkeypatch):
+    calls = []
+    monkeypatch.setenv("USE_LLM", "true")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    monkeypatch.setattr("src.explanation_cache._cache", None)
+    monkeypatch.setattr(llm_batcher, "ask", lambda p, **kw: calls.append(p) or packed_ask(p))
+    monkeypatch.setattr(llm_batcher, "BATCH_SIZE", 50)
+    df = pd.DataFrame({
+        "title": [f"Phone {i}" for i in range(4)] + ["Phone 0"],
+        "category": "Mobile", "brand": "Apple", "condition": "Good",
+        "age_months": 12, "asking_price": [1000.0, 2000.0, 3000.0, 4000.0, 1000.0],
+    })
+    out = price_agent.suggest_prices_batch(df)
+    assert len(calls) == 1
+    assert out["reason"].tolist()[0] == out["reason"].tolist()[4] == "reason 0"
+    # item 1 got no answer and keeps the rule-based reason
+    assert out["reason"].tolist()[1].startswith("Suggested based on asking price 2000.0")
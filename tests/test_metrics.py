@@ -0,0 +1,65 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, metrics
+
+HEADERS = {"x-api-key": api.API_KEY}
+PRODUCT = {"category": "Mobile", "brand": "Apple", "condition": "Good", "age_months": 6, "asking_price": 40000}
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_counters_sum_across_threads():
+    counter = metrics.Counter("test_events_total", "Test events.", ("kind",))
+    try:
+        def work():
+            for _ in range(1000):
+                counter.inc("a")
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.value("a") == 8000
+        assert 'test_events_total{kind="a"} 8000' in metrics.render()
+    finally:
+        metrics.REGISTRY.remove(counter)
+
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.Histogram("test_seconds", "Test latency.", buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.5, 0.5, 5.0):
+            hist.observe(value)
+        text = "\n".join(hist.render())
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="1"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_seconds_count 4" in text
+        assert "test_seconds_sum 6.05" in text
+    finally:
+        metrics.REGISTRY.remove(hist)
+
+def test_metrics_endpoint_reports_requests_stages_and_caches():
+    client = TestClient(api.app)
+    for _ in range(3):
+        assert client.post("/negotiate", json=PRODUCT, headers=HEADERS).status_code == 200
+    client.post("/fraud-check", json=PRODUCT, headers=HEADERS)
+    client.get("/explanations/does-not-exist", headers=HEADERS)
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'http_requests_total{endpoint="/negotiate",method="POST",status="200"} 3' in text
+    # labelled by route template, not by the raw path
+    assert 'http_requests_total{endpoint="/explanations/{explanation_id}",method="GET",status="404"} 1' in text
+    assert 'http_request_duration_seconds_count{endpoint="/negotiate"} 3' in text
+    assert 'http_requests_in_flight{endpoint="/negotiate"} 0' in text
+    assert 'agent_stage_duration_seconds_count{stage="pricing"} 3' in text
+    assert 'agent_stage_duration_seconds_count{stage="fraud"} 1' in text
+    assert 'agent_stage_duration_seconds_count{stage="threadpool_wait"} 1' in text
+    assert 'cache_hit_ratio{cache="fair_range"}' in text
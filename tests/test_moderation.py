@@ -19,3 +19,24 @@ def test_safe_message():
     r = moderate_message("Is this still available?")
     assert r["status"] == "Safe"
     assert r["labels"] == []
+
+def test_scanner_matches_helpers():
+    from agents.moderation_agent import (
+        SCANNER, contains_phone, contains_url, find_blacklisted_words,
+        spam_score_from_text, excessive_punctuation, repeated_chars,
+    )
+    corpus = [
+        "Call me at +91 98765 43210", "ring 98.765.43210 now", "id 12345",
+        "Visit www.shoedeals.com!!!!", "see x.in or http://a", "FREE promo, buy now",
+        "stupid upi transfer", "LOOOOOOOL", "İİİİİİİ!!!!", "SSSSßßßß", "",
+        "price ٩٨٧٦٥٤٣٢١٠ only", "click here", "You are an IDIOT", "free.org deal",
+    ]
+    for text in corpus:
+        assert SCANNER.scan(text) == {
+            "phone": contains_phone(text),
+            "url": contains_url(text),
+            "abusive": find_blacklisted_words(text),
+            "spam_score": spam_score_from_text(text),
+            "excessive_punct": excessive_punctuation(text),
+            "repeated_chars": repeated_chars(text),
+        }, text
@@ -0,0 +1,125 @@
+import json
+import time
+import random
+import string
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api, moderation_pool, moderation_rules
+from src.agents import moderation_agent
+from src.agents.moderation_agent import PhraseMatcher, ModerationScanner, moderate_message
+
+HEADERS = {"x-api-key": api.API_KEY}
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    previous = moderation_agent.get_scanner()
+    status = dict(moderation_rules._status)
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"blacklist": ["banana"], "spam_keyphrases": ["cheap deal"]}))
+    monkeypatch.setattr(moderation_rules, "RULES_PATH", str(path))
+    monkeypatch.setattr(moderation_rules, "_raw", moderation_rules._raw)
+    yield path
+    moderation_rules.stop_watcher()
+    moderation_agent.set_scanner(previous)
+    moderation_rules._status.update(status)
+
+def _words(rng, n):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 10))) for _ in range(n)]
+
+def test_phrase_matcher_matches_substring_semantics():
+    rng = random.Random(0)
+    for size in (0, 5, PhraseMatcher.REGEX_MAX + 50):
+        phrases = _words(rng, size) + ([" up"] if size else [])
+        matcher = PhraseMatcher(phrases)
+        for _ in range(300):
+            text = " ".join(_words(rng, rng.randint(0, 8)))
+            if phrases and rng.random() < 0.3:
+                text += rng.choice(phrases)
+            assert matcher.search(text) == any(p in text for p in phrases), (size, text)
+    assert PhraseMatcher(["", "x"]).search("anything")
+
+def test_large_rule_sets_compile_fast_and_are_immutable():
+    rng = random.Random(1)
+    start = time.perf_counter()
+    scanner = ModerationScanner(blacklist=_words(rng, 100_000), spam_keyphrases=_words(rng, 100_000))
+    assert time.perf_counter() - start < 2.0
+    assert scanner.scan("nothing to see here")["spam_score"] in (0.0, 0.3)
+    with pytest.raises(AttributeError):
+        scanner.blacklist = frozenset()
+
+def test_reload_endpoint_swaps_rules(rules_file):
+    client = TestClient(api.app)
+    assert moderate_message("banana")["status"] == "Safe"
+    r = client.post("/admin/moderation-rules/reload", headers=HEADERS)
+    assert r.status_code == 200 and r.json()["blacklist_terms"] == 1
+    assert moderate_message("you banana")["status"] == "Abusive"
+    assert moderate_message("you idiot")["status"] == "Safe"
+
+    version = r.json()["version"]
+    rules_file.write_text("{not json")
+    bad = client.post("/admin/moderation-rules/reload", headers=HEADERS)
+    assert bad.status_code == 400
+    status = client.get("/admin/moderation-rules", headers=HEADERS).json()
+    assert status["active_version"] == version and status["error"]
+    assert moderate_message("you banana")["status"] == "Abusive"
+
+def test_watcher_reloads_on_change(rules_file):
+    moderation_rules.reload()
+    first = moderation_agent.get_scanner().version
+    moderation_rules.start_watcher(interval=0.02)
+    rules_file.write_text(json.dumps({"blacklist": ["cherry"]}))
+    deadline = time.monotonic() + 5
+    while moderation_agent.get_scanner().version == first:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert moderate_message("cherry")["status"] == "Abusive"
+
+def test_pool_workers_follow_reloads(rules_file, monkeypatch):
+    moderation_pool.shutdown()
+    monkeypatch.setattr(moderation_pool, "WORKERS", 2)
+    try:
+        client = TestClient(api.app)
+        body = {"messages": ["banana"] * 6, "chunk_size": 1}
+        before = client.post("/moderate-batch", json=body, headers=HEADERS).json()
+        assert {r["status"] for r in before["results"]} == {"Safe"}
+        moderation_rules.reload()
+        after = client.post("/moderate-batch", json=body, headers=HEADERS).json()
+        assert {r["status"] for r in after["results"]} == {"Abusive"}
+    finally:
+        moderation_pool.shutdown()
+
+
+def test_workers_apply_the_shipped_rules_not_the_file(rules_file):
+    moderation_rules.reload()
+    rules = moderation_rules.current_rules()
+    # a worker still on the built-in rules, while the file has changed since the reload
+    moderation_agent.set_scanner(ModerationScanner())
+    rules_file.write_text(json.dumps({"blacklist": ["cherry"]}))
+    moderation_rules.ensure(rules)
+    assert moderation_agent.get_scanner().version == rules[0]
+    assert moderate_message("you banana")["status"] == "Abusive"
+    assert moderate_message("cherry")["status"] == "Safe"
+
+    rules_file.write_text("{not json")
+    moderation_agent.set_scanner(ModerationScanner())
+    moderation_rules.ensure(rules)   # cached per version, nothing read or recompiled
+    assert moderation_agent.get_scanner().version == rules[0]
+
+def test_pool_workers_ignore_unreloaded_file_edits(rules_file, monkeypatch):
+    moderation_pool.shutdown()
+    monkeypatch.setattr(moderation_pool, "WORKERS", 2)
+    try:
+        client = TestClient(api.app)
+        moderation_rules.reload()
+        body = {"messages": ["banana", "cherry"] * 3, "chunk_size": 1}
+        for edit in (json.dumps({"blacklist": ["cherry"]}), "{not json"):
+            rules_file.write_text(edit)
+            res = client.post("/moderate-batch", json=body, headers=HEADERS)
+            assert res.status_code == 200
+            assert [r["status"] for r in res.json()["results"]] == ["Abusive", "Safe"] * 3
+            agent = client.post("/agents/moderation/batch", json={"inputs": ["banana"] * 4, "chunk_size": 1}, headers=HEADERS)
+            assert agent.status_code == 200
+            assert {r["status"] for r in agent.json()["results"]} == {"Abusive"}
+    finally:
+        moderation_pool.shutdown()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src import api
+from src.agents import negotiation_sim as sim
+from src.agents.fair_range import fair_range
+
+LAPTOP = {"category": "Laptop", "brand": "Dell", "condition": "Good", "age_months": 36, "asking_price": 80000}
+
+def test_offer_curves_reach_reservation_at_deadline():
+    for beta in sim.STRATEGIES.values():
+        curve = sim.offer_curve(100.0, 40.0, beta, 8)
+        assert curve[-1] == 40.0 and np.all(np.diff(curve) < 0)
+    early, late = sim.offer_curve(100.0, 40.0, 3.0, 8), sim.offer_curve(100.0, 40.0, 0.3, 8)
+    assert early[0] < late[0]
+
+def test_alternating_offers_acceptance():
+    seller = np.array([[100.0, 90.0, 80.0], [100.0, 90.0, 80.0], [100.0, 95.0, 90.0]])
+    buyer = np.array([[50.0, 95.0, 99.0], [50.0, 85.0, 86.0], [50.0, 60.0, 70.0]])
+    closed, rnd, price = sim._first_deal(seller, buyer)
+    # buyer takes s_2; seller takes b_2 because it beats s_3; never crosses
+    assert closed.tolist() == [True, True, False]
+    assert rnd[:2].tolist() == [1, 1] and price[:2].tolist() == [90.0, 85.0]
+
+def test_negotiate_transcript_and_simulation():
+    one = sim.negotiate(LAPTOP)
+    assert one["closed"] and one["rounds"] == len(one["transcript"])
+    assert one["transcript"][0]["seller_offer"] < LAPTOP["asking_price"]
+
+    a = sim.simulate(LAPTOP, 5000, seed=7)
+    assert a == sim.simulate(LAPTOP, 5000, seed=7)
+    assert 0 < a["close_probability"] < 1
+    pct = list(a["price_percentiles"].values())
+    assert pct == sorted(pct)
+    low, high = fair_range(LAPTOP)
+    assert low * 0.5 < a["expected_price"] < high * 1.15
+
+    tough_seller = sim.simulate(LAPTOP, 5000, buyer_strategy="conceder", seller_strategy="boulware", seed=7)
+    tough_buyer = sim.simulate(LAPTOP, 5000, buyer_strategy="boulware", seller_strategy="conceder", seed=7)
+    assert tough_seller["expected_price"] > tough_buyer["expected_price"]
+
+    with pytest.raises(ValueError):
+        sim.simulate(LAPTOP, 10, buyer_strategy="stubborn")
+
+def test_negotiate_deal_simulate_endpoint():
+    client = TestClient(api.app)
+    headers = {"x-api-key": api.API_KEY}
+    plain = client.post("/negotiate-deal", json=LAPTOP, headers=headers).json()
+    assert "simulation" not in plain
+
+    r = client.post("/negotiate-deal?simulate=true&simulations=3000&seller_strategy=boulware", json=LAPTOP, headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["final_agreed_price"] == plain["final_agreed_price"]
+    assert body["simulation"]["simulations"] == 3000
+    again = client.post("/negotiate-deal?simulate=true&simulations=3000&seller_strategy=boulware", json=LAPTOP, headers=headers)
+    assert again.json() == body
+
+    assert client.post("/negotiate-deal?simulate=true&buyer_strategy=nope", json=LAPTOP, headers=headers).status_code == 422
+    too_many = f"/negotiate-deal?simulate=true&simulations={api.NEGOTIATION_SIM_MAX + 1}"
+    assert client.post(too_many, json=LAPTOP, headers=headers).status_code == 413
@@ -0,0 +1,81 @@
+import json
+import numpy as np
+import pandas as pd
+
+from src import preprocess
+from src.sketch import QuantileSketch
+
+def _messy_csv(path, n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    price = rng.integers(500, 90000, n).astype(object)
+    price[rng.random(n) < 0.1] = None
+    price[rng.random(n) < 0.1] = "₹12,500"
+    price[:3] = [10_000_000, 1, "n/a"]
+    age = rng.integers(0, 100, n).astype(object)
+    age[rng.random(n) < 0.1] = None
+    age[rng.random(n) < 0.1] = "about 7 months"
+    pd.DataFrame({
+        "id": range(n),
+        "title": "Item",
+        "category": rng.choice(["mobile", "Laptop", "toys", None], n),
+        "brand": "Brand",
+        "condition": rng.choice(["like new", "Good ", "fair", "used", None], n),
+        "age_months": age,
+        "asking_price": price,
+    }).to_csv(path, index=False)
+
+def _run(fn, tmp_path, *args):
+    out = tmp_path / f"{fn.__name__}.csv"
+    fn(str(tmp_path / "raw.csv"), str(out), *args)
+    profile = json.loads((tmp_path / "reports" / "data_profile.json").read_text())
+    return out.read_text(), profile
+
+def test_streaming_matches_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    _messy_csv(tmp_path / "raw.csv")
+    assert _run(preprocess.main_streaming, tmp_path, 37) == _run(preprocess.main, tmp_path)
+
+def test_sketch_merges_and_stays_bounded():
+    rng = np.random.default_rng(1)
+    x = rng.lognormal(10, 1, 400_000)
+    merged = QuantileSketch()
+    for part in np.array_split(x, 8):
+        merged.merge(QuantileSketch().update(part))
+    assert not merged.exact and len(merged) <= 2 * merged.compression
+    for q in (0.25, 0.5, 0.75):
+        assert abs(merged.quantile(q) / np.quantile(x, q) - 1) < 0.005
+
+MESSY = pd.Series([
+    None, np.nan, "", "  ", "12,500", "₹ 9,999.50", "Rs.700", "abc", "7", "7.", ".5", "1e3",
+    "about 7 months", "2 years", "-4", "٣", " Like New ", "GOOD", "fair", "used", "Mobile",
+    "laptops", "toy", "Other", "nan", "inf",
+], dtype=object)
+
+def _assert_same(vectorized, scalar, s):
+    got, want = vectorized(s), s.apply(scalar)
+    assert got.dtype == want.dtype and got.equals(want), (scalar.__name__, list(s))
+
+def test_series_parsers_match_scalar_apply():
+    numbers = pd.Series([12, 7.5, None, 40000, "1,200", 3], dtype=object)
+    # float() accepts these (trailing dot, underscores, exponent) but they are not plain decimals
+    float_like = pd.Series(["99.e4", "10_007.", "1.e3", "1_0", ".5e1", "5.E-1", "+7.e0", "7.e"], dtype=object)
+    for s in (MESSY, numbers, float_like, pd.Series([1, 2, 3]), MESSY.iloc[:0]):
+        _assert_same(preprocess.parse_price_series, preprocess.parse_price, s)
+        _assert_same(preprocess.parse_age_series, preprocess.parse_age, s)
+    for s in (MESSY, MESSY.dropna(), MESSY.iloc[:0]):
+        _assert_same(preprocess.normalize_condition_series, preprocess.normalize_condition, s)
+        _assert_same(preprocess.category_normalize_series, preprocess.category_normalize, s)
+
+def test_clean_columns_accepts_categorical_columns():
+    # what read_table/iter_table return for a Parquet/Feather file with nulls
+    df = pd.DataFrame({
+        "asking_price": ["1,200", None],
+        "age_months": ["6 months", "2"],
+        "condition": pd.Categorical(["like new", None]),
+        "category": pd.Categorical(["mobile", None]),
+    })
+    got = preprocess.clean_columns(df.copy())
+    want = preprocess.clean_columns(df.astype({"condition": object, "category": object}))
+    pd.testing.assert_frame_equal(got, want)
+    assert list(got["category"]) == ["Mobile", "Other"]
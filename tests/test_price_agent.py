@@ -0,0 +1,46 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from agents.price_agent import suggest_price, suggest_prices_batch, MODEL, RATES, DEFAULT_RATE
+
+DATA = Path(__file__).resolve().parents[1] / "data"
+
+def _catalog(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "title": "Item",
+        "category": rng.choice(["Mobile", "Laptop", "Fashion", "Camera", "Toys", None], n),
+        "brand": rng.choice(["Apple", "sony", "Xiaomi", "NIKE"], n),
+        "condition": rng.choice(["Like New", "Good", "Fair", "Broken"], n),
+        "age_months": rng.integers(0, 240, n),
+        "asking_price": rng.uniform(100, 200000, n).round(2),
+    })
+
+def test_batch_matches_scalar():
+    df = _catalog()
+    expected = [suggest_price(row.to_dict()) for _, row in df.iterrows()]
+    assert suggest_prices_batch(df).to_dict("records") == expected
+
+def test_batch_on_cleaned_dataset():
+    df = pd.read_csv(DATA / "cleaned_products.csv")
+    out = suggest_prices_batch(df)
+    assert list(out.index) == list(df.index)
+    assert out.loc[0, "suggested_price_min"] == 22994
+    assert out.loc[0, "suggested_price_max"] == 29266
+
+def test_batch_defaults_for_missing_columns():
+    df = pd.DataFrame({"asking_price": [1000.0], "age_months": [0]})
+    out = suggest_prices_batch(df).iloc[0].to_dict()
+    assert out == suggest_price({"asking_price": 1000.0, "age_months": 0})
+
+def test_model_tables_match_pow():
+    for category in list(RATES) + ["Other", None]:
+        rate = RATES.get(category, DEFAULT_RATE)
+        for age in (0, 1, 37, MODEL.max_age, MODEL.max_age + 1, 2000, -3):
+            assert MODEL.factor(category, age) == (1 - rate) ** age
+
+def test_batch_matches_scalar_beyond_table():
+    df = _catalog(300)
+    df["age_months"] = np.r_[np.arange(-5, 0), np.full(295, MODEL.max_age + 7)]
+    expected = [suggest_price(row.to_dict()) for _, row in df.iterrows()]
+    assert suggest_prices_batch(df).to_dict("records") == expected
@@ -0,0 +1,50 @@
+import time
+from email.utils import formatdate
+
+from src.rate_limit import RateLimiter, CircuitBreaker, backoff_delay, parse_retry_after
+
+def test_request_bucket_paces_after_the_burst():
+    limiter = RateLimiter(rpm=60)          # one request per second after 60 at once
+    assert [limiter.reserve() for _ in range(60)] == [0.0] * 60
+    assert 0.9 < limiter.reserve() < 1.1
+    assert 1.9 < limiter.reserve() < 2.1   # queued behind the previous reservation
+    assert limiter.reserve(max_wait=1.0) is None
+    assert limiter.stats()["rejected"] == 1
+
+def test_token_bucket_counts_tokens():
+    limiter = RateLimiter(tpm=600)         # 10 tokens per second
+    assert limiter.reserve(tokens=550) == 0.0
+    assert 9.9 < limiter.reserve(tokens=150) < 10.1
+    # a call bigger than the bucket waits for a full bucket instead of forever
+    assert RateLimiter(tpm=600).reserve(tokens=5000) == 0.0
+
+def test_pause_holds_everyone():
+    limiter = RateLimiter()
+    assert limiter.reserve() == 0.0
+    limiter.pause(0.5)
+    assert 0.4 < limiter.reserve() <= 0.5
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None and parse_retry_after("soon") is None
+    assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    delays = [backoff_delay(3, 0.5, 8) for _ in range(200)]
+    assert all(0 <= d <= 4 for d in delays) and max(delays) > 2
+    assert all(backoff_delay(10, 0.5, 8) <= 8 for _ in range(50))
+    assert 3 <= backoff_delay(0, 0.5, 8, retry_after=3) <= 3.5
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(failures=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half-open"
+    assert not breaker.allow()             # only one probe
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
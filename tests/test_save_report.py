@@ -0,0 +1,105 @@
+import csv
+import time
+import multiprocessing as mp
+from fastapi.testclient import TestClient
+
+from src import api, save_report
+from src.save_report import ReportSink, HEADER
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_flushes_on_size_and_time(tmp_path):
+    path = tmp_path / "r.csv"
+    sink = ReportSink(str(path), flush_rows=3, flush_interval=60)
+    sink.write(["a"]); sink.write(["b"])
+    time.sleep(0.1)
+    assert not path.exists()
+    sink.write(["c"])
+    _wait_for(lambda: path.exists() and len(_rows(path)) == 4)
+    sink.close()
+
+    timed = ReportSink(str(tmp_path / "t.csv"), flush_rows=1000, flush_interval=0.05)
+    timed.write(["x"])
+    _wait_for(lambda: (tmp_path / "t.csv").exists())
+    timed.close()
+    assert _rows(tmp_path / "t.csv") == [HEADER, ["x"]]
+
+def test_close_flushes_and_ring_buffer_drops_oldest(tmp_path):
+    path = tmp_path / "r.csv"
+    sink = ReportSink(str(path), flush_rows=1000, flush_interval=60, buffer_max=5)
+    for i in range(8):
+        sink.write([str(i)])
+    sink.close()
+    assert _rows(path) == [HEADER] + [[str(i)] for i in range(3, 8)]
+    assert sink.stats() == {"pending": 0, "written": 5, "dropped": 3, "flushes": 1, "failed_flushes": 0}
+
+def test_failed_flush_backs_off_and_keeps_newest_rows(tmp_path, monkeypatch):
+    path = tmp_path / "r.csv"
+    path.mkdir()   # every write fails until it is removed
+    sink = ReportSink(str(path), flush_rows=1, flush_interval=0.01, buffer_max=100)
+    sink.write(["a"])
+    time.sleep(0.5)
+    # 0.01, 0.02, 0.04, ... between attempts instead of a busy loop
+    assert 3 <= sink.stats()["failed_flushes"] <= 8
+    assert sink.stats()["pending"] == 1
+    path.rmdir()
+    _wait_for(lambda: path.exists() and _rows(path) == [HEADER, ["a"]], timeout=10)
+    sink.close()
+
+    def lock_and_fail(f):
+        # rows arriving while a failing flush is in progress
+        full.write(["3"]); full.write(["4"])
+        raise OSError("disk full")
+
+    full = ReportSink(str(tmp_path / "f.csv"), flush_rows=1000, flush_interval=60, buffer_max=3)
+    for i in range(3):
+        full.write([str(i)])
+    monkeypatch.setattr(save_report, "_lock", lock_and_fail)
+    try:
+        full.flush()
+    except OSError:
+        pass
+    monkeypatch.undo()
+    full.close()
+    assert _rows(tmp_path / "f.csv") == [HEADER, ["2"], ["3"], ["4"]]
+    assert full.stats()["dropped"] == 2
+
+def _worker(path, n):
+    sink = ReportSink(path, flush_rows=7, flush_interval=0.01)
+    for i in range(n):
+        sink.write([str(i), "x" * 200])
+    sink.close()
+
+def test_processes_share_one_file(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    procs = [mp.get_context("spawn").Process(target=_worker, args=(path, 300)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    rows = _rows(path)
+    assert rows[0] == HEADER and rows.count(HEADER) == 1
+    assert len(rows) == 1 + 4 * 300 and all(len(r) == 2 for r in rows[1:])
+
+def test_api_logs_suggestions(tmp_path, monkeypatch):
+    out = tmp_path / "reports" / "price_suggestions.csv"
+    save_report.close()
+    monkeypatch.setattr(save_report, "OUT", str(out))
+    monkeypatch.setattr(api, "LOG_SUGGESTIONS", True)
+    product = {"title": "iPhone 12", "brand": "Apple", "category": "Mobile", "age_months": 24, "asking_price": 35000}
+    with TestClient(api.app) as client:
+        r = client.post("/negotiate", json=product, headers={"x-api-key": api.API_KEY})
+        assert r.status_code == 200
+    # lifespan shutdown flushed the sink
+    rows = _rows(out)
+    assert rows[0] == HEADER and len(rows) == 2
+    assert rows[1][1:7] == ["iPhone 12", "Apple", "24", "35000.0",
+                            str(r.json()["suggested_price_min"]), str(r.json()["suggested_price_max"])]
@@ -0,0 +1,135 @@
+import time
+import asyncio
+import threading
+import httpx
+import pytest
+
+from src import api
+from src.singleflight import SingleFlight, AsyncSingleFlight
+
+def test_threads_share_one_call():
+    group = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(1)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["result"] * 8
+    assert len(calls) == 1
+    assert group.stats()["coalesced"] == 7
+
+def test_async_errors_reach_every_waiter():
+    group = AsyncSingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    async def run():
+        return await asyncio.gather(*(group.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert (group.executions, group.coalesced) == (1, 2)
+    # nothing is remembered once the call finishes
+    assert group.stats()["in_flight"] == 0
+
+def test_async_cancelled_leader_does_not_cancel_followers():
+    group = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.ensure_future(group.do("k", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(group.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(leader, *followers, return_exceptions=True)
+        return results
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["result", "result"]
+    assert len(calls) == 1 and group.stats()["in_flight"] == 0
+
+def test_async_call_is_cancelled_once_nobody_waits():
+    group = AsyncSingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    async def run():
+        waiters = [asyncio.ensure_future(group.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert finished == [] and group.stats()["in_flight"] == 0
+
+def test_async_late_caller_does_not_join_a_cancelled_call():
+    group = AsyncSingleFlight()
+
+    async def work():
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.02)   # slow cleanup keeps the old task alive a while
+            raise
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(group.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        late = await group.do("k", work)
+        await asyncio.gather(first, return_exceptions=True)
+        return late
+
+    assert asyncio.run(run()) == "result"
+    assert group.executions == 2
+
+def test_api_coalesces_identical_requests(monkeypatch):
+    calls = []
+
+    async def slow_suggest(product):
+        calls.append(product)
+        await asyncio.sleep(0.05)
+        return {"suggested_price_min": 1, "suggested_price_max": 2, "reason": "ok"}
+
+    monkeypatch.setattr(api.price_agent.load(), "suggest_price_async", slow_suggest)
+    monkeypatch.setattr(api, "API_FLIGHT", AsyncSingleFlight())
+    product = {"title": "iPhone 12", "category": "Mobile", "brand": "Apple", "asking_price": 35000}
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            same = [client.post("/negotiate", json=product, headers={"x-api-key": api.API_KEY}) for _ in range(10)]
+            other = client.post("/negotiate", json={**product, "asking_price": 1}, headers={"x-api-key": api.API_KEY})
+            return await asyncio.gather(*same, other)
+
+    responses = asyncio.run(run())
+    assert all(r.status_code == 200 for r in responses)
+    assert len(calls) == 2
+    assert api.API_FLIGHT.coalesced == 9
@@ -0,0 +1,100 @@
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import preprocess, tables
+from src.agents.price_agent import suggest_prices_batch
+from tests.test_preprocess import _messy_csv
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+def _frame(n=300):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id": range(n),
+        "category": rng.choice(["Mobile", "Laptop", "Toys", np.nan], n),
+        "brand": rng.choice(["Apple", "Sony", np.nan], n),
+        "condition": rng.choice(["Like New", "Good", "Fair"], n),
+        "age_months": rng.integers(0, 120, n).astype(float),
+        "asking_price": rng.integers(500, 90000, n).astype(float),
+    }).replace("nan", np.nan)
+
+def test_format_by_extension():
+    assert tables.table_format("a/b.CSV") == tables.CSV
+    assert tables.table_format("x.parquet") == tables.PARQUET
+    assert tables.table_format("x.feather") == tables.FEATHER
+    with pytest.raises(ValueError):
+        tables.table_format("x.xlsx")
+
+def test_csv_projection_and_chunked_writer(tmp_path):
+    df = _frame()
+    path = tmp_path / "out.csv"
+    with tables.TableWriter(path) as w:
+        for part in (df.iloc[i:i + 80] for i in range(0, len(df), 80)):
+            w.write(part)
+    assert w.rows == len(df)
+    pd.testing.assert_frame_equal(tables.read_table(path), df)
+    assert list(tables.read_table(path, columns=["id", "brand"]).columns) == ["id", "brand"]
+    chunks = list(tables.iter_table(path, 128, columns=["id"]))
+    assert [len(c) for c in chunks] == [128, 128, 44]
+
+def test_batch_pricing_accepts_categorical_columns():
+    df = _frame()
+    assert suggest_prices_batch(tables.to_categoricals(df)).equals(suggest_prices_batch(df))
+
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow installed")
+def test_columnar_formats_need_pyarrow(tmp_path):
+    with pytest.raises(ImportError, match="pyarrow"):
+        tables.write_table(_frame(), tmp_path / "x.parquet")
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_columnar_roundtrip(tmp_path, suffix):
+    df = _frame()
+    path = tmp_path / f"x{suffix}"
+    tables.write_table(df, path)
+    back = tables.read_table(path)
+    assert isinstance(back["category"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(back.astype({c: object for c in ("category", "brand", "condition")}), df)
+    assert list(tables.read_table(path, columns=["asking_price"]).columns) == ["asking_price"]
+
+    chunked = tmp_path / f"chunked{suffix}"
+    with tables.TableWriter(chunked) as w:
+        for part in (df.iloc[i:i + 100] for i in range(0, len(df), 100)):
+            w.write(part)
+    assert tables.read_table(chunked)["asking_price"].equals(df["asking_price"])
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_chunked_writer_handles_columns_empty_in_the_first_chunks(tmp_path, suffix):
+    df = _frame(200)
+    df["location"] = [None] * 100 + ["Delhi", "Pune"] * 50
+    df["title"] = [np.nan] * 150 + ["iPhone"] * 50
+    path = tmp_path / f"x{suffix}"
+    with tables.TableWriter(path) as w:
+        w.write(df.iloc[:0])   # e.g. a chunk with nothing flagged
+        for part in (df.iloc[i:i + 50] for i in range(0, len(df), 50)):
+            w.write(part)
+    back = tables.read_table(path)
+    for column in ("category", "brand", "condition", "location"):
+        assert isinstance(back[column].dtype, pd.CategoricalDtype), column
+    assert back["title"].dtype == object
+    pd.testing.assert_frame_equal(back.astype({c: object for c in ("category", "brand", "condition", "location")}), df)
+
+    never = tmp_path / f"never{suffix}"
+    with tables.TableWriter(never) as w:
+        w.write(df[["id", "location"]].iloc[:100])
+    assert tables.read_table(never)["location"].isna().all()
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+def test_preprocess_parquet_matches_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    _messy_csv(tmp_path / "raw.csv")
+    preprocess.main("raw.csv", "clean.csv")
+    preprocess.main_streaming("raw.csv", "clean.parquet", 37)
+    want = pd.read_csv("clean.csv")
+    got = tables.read_table("clean.parquet")
+    pd.testing.assert_frame_equal(got.astype({"category": object, "condition": object, "brand": object}), want,
+                                  check_dtype=False)